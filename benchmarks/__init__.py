@@ -0,0 +1,4 @@
+"""Performance benchmarks on synthetic datasets.
+
+Run ``python -m benchmarks --help`` for the available options.
+"""
@@ -0,0 +1,327 @@
+"""Run the benchmarks and write machine-readable results.
+
+Example, at production scale::
+
+    python -m benchmarks --pairs 10000 --shape 600,512,512 -o results.json
+
+Every benchmark is timed ``--repeat`` times. Results are a JSON document with
+the environment under ``"meta"`` and one record per benchmark under
+``"results"``; failing benchmarks are recorded with an ``"error"``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from seg_qc_tool import io_utils
+from seg_qc_tool.cache import disk_cache, volume_cache
+from seg_qc_tool.io_utils import gzip_index_cache, load_volume, normalize_volume, volume_window
+from seg_qc_tool.manifest import ScanManifest
+from seg_qc_tool.matcher import _volume_items, pair_finder
+from seg_qc_tool.models import Settings
+from seg_qc_tool.mosaic import mosaic_cache
+from seg_qc_tool.planes import PLANES, plane
+from seg_qc_tool.render import OverlayRenderer, SliceRenderer
+
+from .datasets import FORMATS, formats, make_tree, make_volume_pair
+
+SUITES = ("scan", "load", "normalize", "controller", "startup")
+
+# Code timed in a fresh interpreter by the startup suite
+STARTUP = {
+    "import_core": "import seg_qc_tool.core",
+    "import_gui": "import seg_qc_tool.gui",
+    "first_window": (
+        "from PySide6 import QtWidgets\n"
+        "from seg_qc_tool.controller import Controller\n"
+        "from seg_qc_tool.gui import MainWindow\n"
+        "app = QtWidgets.QApplication([])\n"
+        "window = MainWindow(Controller())\n"
+        "window.show()\n"
+        "app.processEvents()\n"
+    ),
+}
+# Modules whose import dominates startup, reported when a step loaded them
+HEAVY_MODULES = ("PySide6", "nibabel", "pydicom", "SimpleITK", "indexed_gzip", "scipy")
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Return the wall time in seconds of ``repeat`` calls of ``func``."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def record(name: str, times: List[float], **params: Any) -> Dict[str, Any]:
+    return {
+        "name": name,
+        **params,
+        "repeat": len(times),
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "times_s": times,
+    }
+
+
+def cold() -> None:
+    """Forget decoded volumes and DICOM indexes (the OS page cache stays warm)."""
+    volume_cache.clear()
+    io_utils._series_indexes.clear()
+
+
+@contextmanager
+def restored_caches() -> Iterator[None]:
+    """Undo changes a review session makes to the volume cache and the on-disk caches."""
+    budget = volume_cache.budget
+    disk = [(c, c.enabled, c.max_bytes) for c in (disk_cache, gzip_index_cache, mosaic_cache)]
+    try:
+        yield
+    finally:
+        volume_cache.budget = budget
+        for cache, enabled, max_bytes in disk:
+            cache.enabled, cache.max_bytes = enabled, max_bytes
+
+
+def bench_scan(root: Path, pairs: int, fmt: str, repeat: int) -> List[Dict[str, Any]]:
+    originals, segmentations = make_tree(root / f"tree-{fmt}", pairs, fmt)
+    manifest = ScanManifest(root / f"manifest-{fmt}.json")
+    pair_finder(originals, segmentations, manifest=manifest)
+    params = dict(format=fmt, pairs=pairs)
+    return [
+        record("volume_items", measure(lambda: _volume_items(originals), repeat), **params),
+        record("pair_finder", measure(lambda: pair_finder(originals, segmentations), repeat), **params),
+        record(
+            "pair_finder_manifest",
+            measure(lambda: pair_finder(originals, segmentations, manifest=manifest), repeat),
+            **params,
+        ),
+    ]
+
+
+def bench_load(root: Path, shape: List[int], fmt: str, repeat: int) -> List[Dict[str, Any]]:
+    original, _ = make_volume_pair(root / f"volumes-{fmt}", shape, fmt)
+    middle = shape[0] // 2
+    params = dict(format=fmt, shape=shape)
+    return [
+        record("load_volume", measure(lambda: load_volume(original), repeat, cold), **params),
+        record(
+            "first_slice",
+            measure(lambda: np.asarray(load_volume(original)[middle]), repeat, cold),
+            **params,
+        ),
+        record(
+            "full_read", measure(lambda: np.asarray(load_volume(original)), repeat, cold), **params
+        ),
+        record("volume_window", measure(lambda: volume_window(original), repeat, cold), **params),
+    ]
+
+
+def bench_normalize(root: Path, shape: List[int], repeat: int) -> List[Dict[str, Any]]:
+    original, _ = make_volume_pair(root / "volumes-npy", shape, "npy")
+    volume = np.load(original)
+    return [record("normalize_volume", measure(lambda: normalize_volume(volume), repeat), shape=shape)]
+
+
+def bench_controller(root: Path, shape: List[int], fmt: str, repeat: int, pairs: int = 4) -> List[Dict[str, Any]]:
+    """Time pair switches and slice scrubbing as the GUI performs them, without Qt."""
+    from seg_qc_tool.core import ReviewSession, load_pair_data
+
+    base = root / f"controller-{fmt}"
+    for seed in range(pairs):
+        make_volume_pair(base, shape, fmt, seed)
+    renderer, overlay = SliceRenderer(), OverlayRenderer()
+    loaded = []
+
+    class Session(ReviewSession):
+        def load_settings(self) -> Settings:
+            # Not the user's config: defaults without on-disk caches, so cold
+            # switches decode every file and nothing is written to the home
+            # directory
+            return Settings(disk_cache=False, gzip_index=False, mosaic_cache=False)
+
+        def on_pair_changed(self, pair) -> None:
+            data = load_pair_data(pair)
+            # The GUI opens on the middle slice while labels are counted
+            index = data.volume.shape[0] // 2
+            gray = renderer.render(np.asarray(data.volume[index]), *data.window)
+            overlay.render(gray, np.asarray(data.seg[index]), 0.4)
+            loaded.append(data)
+
+    def switch_all() -> None:
+        for _ in range(len(session.pairs) - 1):
+            session.next_pair()
+        session.current_index = 0
+
+    def scrub(axis: int) -> None:
+        data = loaded[-1]
+        for index in range(data.volume.shape[axis]):
+            gray = renderer.render(plane(data.volume, axis, index), *data.window)
+            overlay.render(gray, plane(data.seg, axis, index), 0.4)
+
+    with restored_caches():
+        session = Session()
+        try:
+            session.manifest = ScanManifest(root / f"controller-{fmt}.json")
+            session.settings.originals_dir = base / "originals"
+            session.settings.segmentations_dir = base / "segmentations"
+            session.load_pairs()
+
+            switches = max(len(session.pairs) - 1, 1)
+            cold_times = [t / switches for t in measure(switch_all, repeat, cold)]
+            warm_times = [t / switches for t in measure(switch_all, repeat)]
+            params = dict(format=fmt, shape=shape)
+            results = [
+                record("pair_switch_cold", cold_times, **params),
+                record("pair_switch_warm", warm_times, **params),
+            ]
+            for axis, name in enumerate(PLANES):
+                frames = shape[axis]
+                times = [t / frames for t in measure(lambda: scrub(axis), repeat)]
+                results.append(record("slice_scrub_frame", times, plane=name.lower(), **params))
+        finally:
+            session.close()
+    return results
+
+
+def bench_startup(repeat: int) -> List[Dict[str, Any]]:
+    """Time each :data:`STARTUP` step in a new interpreter, as a cold start does.
+
+    Times include starting Python; Qt runs on the offscreen platform unless
+    ``QT_QPA_PLATFORM`` is set. Each record lists the heavy modules loaded.
+    """
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(Path(__file__).resolve().parent.parent), env.get("PYTHONPATH")])
+    )
+    report = (
+        "\nimport json, sys\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    results = []
+    for name, code in STARTUP.items():
+        loaded: List[str] = []
+
+        def run() -> None:
+            out = subprocess.run(
+                [sys.executable, "-c", code + report], env=env, capture_output=True, text=True, check=True
+            ).stdout
+            loaded[:] = json.loads(out.splitlines()[-1])
+
+        results.append(record(name, measure(run, repeat), modules=list(loaded)))
+    return results
+
+
+def _meta(args: argparse.Namespace) -> Dict[str, Any]:
+    try:
+        package_version: Optional[str] = version("seg_qc_tool")
+    except PackageNotFoundError:
+        package_version = None
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "package_version": package_version,
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "dir")},
+    }
+
+
+def run(args: argparse.Namespace, root: Path) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+
+    def guarded(name: str, func: Callable[[], List[Dict[str, Any]]], **params: Any) -> None:
+        print(f"{name} {params}", file=sys.stderr)
+        try:
+            results.extend(func())
+        except Exception as e:
+            results.append({"name": name, **params, "error": f"{type(e).__name__}: {e}"})
+
+    for fmt in args.formats:
+        if "scan" in args.suites:
+            guarded("scan", lambda: bench_scan(root, args.pairs, fmt, args.repeat), format=fmt)
+        if "load" in args.suites:
+            guarded("load", lambda: bench_load(root, args.shape, fmt, args.repeat), format=fmt)
+        if "controller" in args.suites:
+            guarded(
+                "controller", lambda: bench_controller(root, args.shape, fmt, args.repeat), format=fmt
+            )
+    if "normalize" in args.suites:
+        guarded("normalize", lambda: bench_normalize(root, args.shape, args.repeat))
+    if "startup" in args.suites:
+        guarded("startup", lambda: bench_startup(args.repeat))
+    return {"meta": _meta(args), "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", type=Path, help="results file (default: stdout)")
+    parser.add_argument("--pairs", type=int, default=1000, help="pairs in the scanning tree")
+    parser.add_argument(
+        "--shape",
+        type=lambda s: [int(v) for v in s.split(",")],
+        default=[64, 256, 256],
+        help="volume shape as slices,rows,columns",
+    )
+    parser.add_argument("--formats", type=formats, default=list(FORMATS), help=",".join(FORMATS))
+    parser.add_argument(
+        "--suites",
+        type=lambda s: s.split(","),
+        default=list(SUITES),
+        help=",".join(SUITES),
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", type=Path, help="keep generated data here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    root = args.dir or Path(tempfile.mkdtemp(prefix="seg_qc_bench_"))
+    root.mkdir(parents=True, exist_ok=True)
+    try:
+        report = run(args, root)
+    finally:
+        if args.dir is None:
+            shutil.rmtree(root, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Synthetic datasets in every supported format."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+import nibabel as nib
+import numpy as np
+import pydicom
+import pydicom.uid
+from pydicom.dataset import FileDataset, FileMetaDataset
+
+FORMATS = ("npy", "nii", "nii.gz", "dicom", "dicom-mf")
+
+# Suffixes of single-file formats; DICOM series are directories
+_SUFFIXES = {"npy": ".npy", "nii": ".nii", "nii.gz": ".nii.gz"}
+
+
+def synthetic_pair(shape: Sequence[int], seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Return a CT-like ``int16`` volume in ``(z, x, y)`` order and its mask.
+
+    The body is an ellipse of soft tissue with noise, surrounded by -3024 HU
+    padding; the mask is an ellipsoid inside the body.
+    """
+    depth, rows, cols = shape
+    rng = np.random.default_rng(seed)
+    x = np.linspace(-1, 1, rows, dtype=np.float32)[:, None]
+    y = np.linspace(-1, 1, cols, dtype=np.float32)[None, :]
+    body = x**2 / 0.8 + y**2 / 0.6 <= 1
+    volume = np.full(shape, -3024, dtype=np.int16)
+    seg = np.zeros(shape, dtype=np.uint8)
+    z = np.linspace(-1, 1, depth, dtype=np.float32)
+    for k in range(depth):
+        noise = rng.normal(40, 20, (rows, cols)).astype(np.int16)
+        volume[k][body] = noise[body]
+        radius = 0.3 * (1 - z[k] ** 2)
+        if radius > 0:
+            seg[k][(x - 0.1) ** 2 + y**2 <= radius**2] = 1
+    return volume, seg
+
+
+def write_volume(path: Path, volume: np.ndarray, fmt: str) -> Path:
+    """Write a ``(z, x, y)`` volume as ``fmt`` and return the path to open.
+
+    ``path`` is used without suffix; DICOM formats create a directory.
+    """
+    if fmt in _SUFFIXES:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        target = path.with_name(path.name + _SUFFIXES[fmt])
+        if fmt == "npy":
+            np.save(target, volume)
+        else:
+            nib.save(nib.Nifti1Image(volume.transpose(1, 2, 0), np.eye(4)), str(target))
+        return target
+    path.mkdir(parents=True, exist_ok=True)
+    if fmt == "dicom":
+        for k, frame in enumerate(volume):
+            _write_dicom(path / f"{k:04d}.dcm", frame[None], k + 1)
+    elif fmt == "dicom-mf":
+        _write_dicom(path / "volume.dcm", volume, 1)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    return path
+
+
+def _write_dicom(path: Path, frames: np.ndarray, instance: int) -> None:
+    meta = FileMetaDataset()
+    meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
+    meta.MediaStorageSOPClassUID = pydicom.uid.SecondaryCaptureImageStorage
+    meta.MediaStorageSOPInstanceUID = pydicom.uid.generate_uid()
+    ds = FileDataset(str(path), {}, file_meta=meta, preamble=b"\0" * 128)
+    ds.SOPClassUID = meta.MediaStorageSOPClassUID
+    ds.SOPInstanceUID = meta.MediaStorageSOPInstanceUID
+    ds.SeriesInstanceUID = pydicom.uid.generate_uid(entropy_srcs=[str(path.parent)])
+    ds.InstanceNumber = instance
+    ds.ImagePositionPatient = [0.0, 0.0, float(instance)]
+    ds.PixelSpacing = [1.0, 1.0]
+    ds.SliceThickness = 1.0
+    ds.Rows, ds.Columns = frames.shape[1:]
+    if len(frames) > 1:
+        ds.NumberOfFrames = len(frames)
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    signed = frames.dtype.kind == "i"
+    bits = frames.dtype.itemsize * 8
+    ds.BitsAllocated = ds.BitsStored = bits
+    ds.HighBit = bits - 1
+    ds.PixelRepresentation = int(signed)
+    if signed:
+        ds.RescaleSlope = 1
+        ds.RescaleIntercept = 0
+        ds.WindowCenter = 40
+        ds.WindowWidth = 400
+    ds.PixelData = np.ascontiguousarray(frames).tobytes()
+    ds.save_as(str(path))
+
+
+def make_volume_pair(root: Path, shape: Sequence[int], fmt: str, seed: int = 0) -> Tuple[Path, Path]:
+    """Write one synthetic pair of ``shape`` under ``root``; return its paths."""
+    volume, seg = synthetic_pair(shape, seed)
+    original = write_volume(root / "originals" / f"case{seed:05d}", volume, fmt)
+    segmentation = write_volume(root / "segmentations" / f"case{seed:05d}_seg", seg, fmt)
+    return original, segmentation
+
+
+def make_tree(root: Path, pairs: int, fmt: str = "nii.gz", per_folder: int = 100) -> Tuple[Path, Path]:
+    """Create ``pairs`` placeholder pairs for scanning and pairing benchmarks.
+
+    Files are empty (DICOM series hold two empty files) since only names are
+    read. They are spread over sub-folders of ``per_folder`` cases, mirrored
+    between the originals and segmentations trees, and every tenth
+    segmentation name carries a typo so fuzzy matching is exercised.
+    """
+    originals, segmentations = root / "originals", root / "segmentations"
+    for i in range(pairs):
+        folder = f"site{i // per_folder:03d}"
+        seg_name = f"patient{i:06d}_seg" if i % 10 else f"patiant{i:06d}_seg"
+        for base, name in ((originals, f"patient{i:06d}"), (segmentations, seg_name)):
+            parent = base / folder
+            parent.mkdir(parents=True, exist_ok=True)
+            if fmt in _SUFFIXES:
+                (parent / (name + _SUFFIXES[fmt])).touch()
+            else:
+                (parent / name).mkdir(exist_ok=True)
+                for k in range(2):
+                    (parent / name / f"{k}.dcm").touch()
+    return originals, segmentations
+
+
+def formats(spec: str) -> List[str]:
+    names = [f.strip() for f in spec.split(",") if f.strip()]
+    unknown = set(names) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown formats: {', '.join(sorted(unknown))}")
+    return names
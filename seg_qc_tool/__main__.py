@@ -0,0 +1,30 @@
+"""Command line entry point.
+
+``python -m seg_qc_tool`` starts the GUI and ``python -m seg_qc_tool batch``
+runs the headless QC checks.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+# Allow running this file directly without installing the package
+if __package__ in (None, ""):  # pragma: no cover - simple path fix
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "batch":
+        from seg_qc_tool.batch import main as batch_main
+
+        sys.exit(batch_main(argv[1:]))
+    from seg_qc_tool.main import main as gui_main
+
+    gui_main()
+
+
+if __name__ == "__main__":
+    main()
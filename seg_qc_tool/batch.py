@@ -0,0 +1,181 @@
+"""Headless batch QC of all pairs."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from .cache import volume_cache
+from .io_utils import load_volume
+from .matcher import pair_finder
+from .models import Pair
+
+logger = logging.getLogger(__name__)
+
+FIELDS = [
+    "original",
+    "segmentation",
+    "suspicion",
+    "error",
+    "shape",
+    "seg_shape",
+    "shape_mismatch",
+    "empty",
+    "non_binary",
+    "labels",
+    "fraction",
+]
+
+# Contribution of each failed check to the suspicion score.
+WEIGHTS = {
+    "error": 10.0,
+    "shape_mismatch": 4.0,
+    "empty": 3.0,
+    "fraction": 1.0,
+    "non_binary": 0.5,
+}
+
+
+def check_pair(
+    pair: Pair, min_fraction: float = 1e-5, max_fraction: float = 0.5
+) -> Dict[str, Any]:  # pragma: no cover - heavy I/O
+    """Run the automatic checks on one pair and return a report record.
+
+    ``fraction`` is the share of labelled voxels; values outside
+    ``[min_fraction, max_fraction]`` add to the suspicion score. Loading errors
+    are reported in the record instead of being raised.
+    """
+    record: Dict[str, Any] = {field: None for field in FIELDS}
+    record.update(original=str(pair.original), segmentation=str(pair.segmentation), error="")
+    try:
+        volume = load_volume(pair.original)
+        seg = np.asarray(load_volume(pair.segmentation))
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["suspicion"] = WEIGHTS["error"]
+        return record
+
+    labelled = int(np.count_nonzero(seg))
+    non_binary = bool(np.any((seg != 0) & (seg != 1)))
+    fraction = labelled / seg.size if seg.size else 0.0
+    record.update(
+        shape=list(volume.shape),
+        seg_shape=list(seg.shape),
+        shape_mismatch=tuple(volume.shape) != tuple(seg.shape),
+        empty=labelled == 0,
+        non_binary=non_binary,
+        # Unique values need a sort, so only count them when it matters
+        labels=int(np.unique(seg).size) if non_binary else int(labelled > 0) + int(labelled < seg.size),
+        fraction=fraction,
+    )
+    score = 0.0
+    for check in ("shape_mismatch", "empty", "non_binary"):
+        if record[check]:
+            score += WEIGHTS[check]
+    if labelled and not min_fraction <= fraction <= max_fraction:
+        score += WEIGHTS["fraction"]
+    record["suspicion"] = score
+    return record
+
+
+def _init_worker() -> None:  # pragma: no cover - runs in worker processes
+    # Every pair is read once, so caching would only hold memory
+    volume_cache.budget = 0
+
+
+def run_checks(
+    pairs: Iterable[Pair], workers: Optional[int] = None, **options: Any
+) -> Iterator[Dict[str, Any]]:
+    """Yield check records as they complete, using a process pool.
+
+    ``workers=0`` runs the checks in the calling process.
+    """
+    pairs = list(pairs)
+    if workers == 0:
+        for pair in pairs:
+            yield check_pair(pair, **options)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as pool:
+        futures = [pool.submit(check_pair, pair, **options) for pair in pairs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+class ReportWriter:
+    """Stream records to a CSV or JSON Lines file, flushing every record."""
+
+    def __init__(self, stream: TextIO, fmt: str = "jsonl") -> None:
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown report format: {fmt}")
+        self.stream = stream
+        self.fmt = fmt
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._csv is not None:
+            self._csv.writerow(
+                {k: json.dumps(v) if isinstance(v, list) else v for k, v in record.items()}
+            )
+        else:
+            self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+def read_report(path: Path) -> Dict[Tuple[str, str], float]:
+    """Return the suspicion score of each ``(original, segmentation)`` in a report."""
+    scores: Dict[Tuple[str, str], float] = {}
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows: Iterable[Dict[str, Any]] = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            scores[(row["original"], row["segmentation"])] = float(row["suspicion"] or 0.0)
+    return scores
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m seg_qc_tool batch",
+        description="Check all pairs without the GUI and write a QC report.",
+    )
+    parser.add_argument("originals", type=Path)
+    parser.add_argument("segmentations", type=Path)
+    parser.add_argument("-o", "--output", type=Path, help="report file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="default: from the output suffix")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes (0: no pool)")
+    parser.add_argument("--max-dist", type=int, default=2, help="fuzzy pairing distance")
+    parser.add_argument("--min-fraction", type=float, default=1e-5)
+    parser.add_argument("--max-fraction", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.output is not None and args.output.suffix.lower() == ".csv" else "jsonl"
+
+    pairs = pair_finder(args.originals, args.segmentations, args.max_dist)
+    logger.info("Checking %d pairs", len(pairs))
+    stream = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = ReportWriter(stream, fmt)
+        records = run_checks(
+            pairs, args.workers, min_fraction=args.min_fraction, max_fraction=args.max_fraction
+        )
+        for record in records:
+            writer.write(record)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+    return 0
@@ -0,0 +1,317 @@
+"""In-memory and on-disk caches for decoded volumes."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import stat
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+# Two 500 MB CT pairs fit comfortably in the default budget.
+DEFAULT_BUDGET = 2 * 1024 ** 3
+# Lazily read volumes cost almost no memory but keep file mappings open.
+DEFAULT_MAX_ENTRIES = 64
+
+CACHE_DIR = Path.home() / ".seg_qc_tool" / "cache"
+DEFAULT_DISK_BUDGET = 20 * 1024 ** 3
+
+CacheKey = Tuple[str, int, int]
+
+
+def cache_key(path: Path) -> CacheKey:
+    """Return the ``(path, mtime, size)`` key identifying ``path`` on disk.
+
+    A directory, such as a DICOM series, keeps its mtime when a file in it is
+    rewritten in place, so it is identified by the files directly in it: the
+    "mtime" is a digest of their names, mtimes and sizes and the size their
+    total.
+    """
+    st = path.stat()
+    if not stat.S_ISDIR(st.st_mode):
+        return (str(path), st.st_mtime_ns, st.st_size)
+    digest = hashlib.sha1()
+    total = 0
+    with os.scandir(path) as it:
+        for entry in sorted(it, key=lambda e: e.name):
+            if entry.is_file():
+                est = entry.stat()
+                digest.update(f"{entry.name}\0{est.st_mtime_ns}\0{est.st_size}\n".encode())
+                total += est.st_size
+    return (str(path), int.from_bytes(digest.digest()[:8], "big"), total)
+
+
+class _Entry:
+    __slots__ = ("value", "nbytes", "meta")
+
+    def __init__(self, value: Any, nbytes: int) -> None:
+        self.value = value
+        self.nbytes = nbytes
+        self.meta: Dict[str, Any] = {}
+
+
+class VolumeCache:
+    """LRU cache of loaded volumes bounded by a total byte budget.
+
+    Entries are keyed by ``(path, mtime, size)`` so a file that changes on disk
+    is read again. When an insertion exceeds the budget, the least recently used
+    entries are evicted until the new entry fits, and at most ``max_entries``
+    volumes are kept. A volume larger than the whole budget is returned to the
+    caller but not kept.
+    """
+
+    def __init__(self, budget: int = DEFAULT_BUDGET, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._budget = budget
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._loading: Dict[CacheKey, threading.Lock] = {}
+        self._lock = threading.RLock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def budget(self) -> int:
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: int) -> None:
+        with self._lock:
+            self._budget = value
+            self._evict(0, 0)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size in bytes of the cached volumes."""
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: Path) -> bool:
+        try:
+            key = cache_key(path)
+        except OSError:
+            return False
+        return key in self._entries
+
+    def get_or_load(self, path: Path, loader: Callable[[Path], Any]) -> Any:
+        """Return the cached volume for ``path`` or load it with ``loader``.
+
+        Concurrent requests for the same key wait for a single load instead of
+        reading the file several times.
+        """
+        key = cache_key(path)
+        with self._lock:
+            if key in self._entries:
+                return self._hit(key)
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._hit(key)
+                self.misses += 1
+            profiling.count("volume_cache.miss")
+            try:
+                value = loader(path)
+                self._insert(key, value)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return value
+
+    def meta(self, path: Path) -> Dict[str, Any]:
+        """Return the metadata dict stored alongside the cached volume.
+
+        Values derived from a volume (intensity range, statistics) are kept
+        here so they are computed once and dropped together with the volume.
+        An empty, untracked dict is returned when ``path`` is not cached.
+        """
+        try:
+            key = cache_key(path)
+        except OSError:
+            return {}
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.meta if entry is not None else {}
+
+    def replace(self, path: Path, value: Any) -> None:
+        """Cache ``value`` for ``path`` in place of its current entry, keeping the metadata.
+
+        Used when a lazily read volume is decoded in full, so that the decoded
+        copy counts against the budget and is reused.
+        """
+        key = cache_key(path)
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                self._remove(key)
+            self._insert(key, value)
+            entry = self._entries.get(key)
+            if entry is not None and old is not None:
+                entry.meta = old.meta
+
+    def invalidate(self, path: Path) -> None:
+        """Drop every cached entry for ``path`` regardless of its mtime."""
+        name = str(path)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == name]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    # Internal -------------------------------------------------
+    def _hit(self, key: CacheKey) -> Any:
+        self.hits += 1
+        profiling.count("volume_cache.hit")
+        self._entries.move_to_end(key)
+        return self._entries[key].value
+
+    def _insert(self, key: CacheKey, value: Any) -> None:
+        size = int(getattr(value, "nbytes", 0))
+        with self._lock:
+            if size > self._budget:
+                logger.debug("Not caching %s: %d bytes exceeds budget", key[0], size)
+                return
+            # Older versions of the same file can never be hit again
+            for old in [k for k in self._entries if k[0] == key[0]]:
+                self._remove(old)
+            self._evict(size)
+            self._entries[key] = _Entry(value, size)
+            self._nbytes += size
+
+    def _evict(self, incoming: int, slots: int = 1) -> None:
+        while self._entries and (
+            self._nbytes + incoming > self._budget
+            or len(self._entries) + slots > self.max_entries
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def _remove(self, key: CacheKey) -> None:
+        self._nbytes -= self._entries.pop(key).nbytes
+
+
+class DiskCache:
+    """Directory of decoded volumes stored as uncompressed ``.npy`` files.
+
+    Entries are named after a hash of the source's ``(path, mtime, size)`` key,
+    so a modified source simply misses and its stale entry ages out. Each
+    entry can carry a small JSON sidecar with values derived from the volume,
+    such as its intensity range. Lookups refresh the entry's mtime and
+    :meth:`prune` removes the least recently used entries beyond ``max_bytes``.
+    The cache does nothing until ``enabled`` is set.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_DISK_BUDGET) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    def lookup(self, path: Path, variant: str = "", suffix: str = ".npy") -> Optional[Path]:
+        """Return the cached ``.npy`` file for ``path`` or ``None``.
+
+        ``variant`` distinguishes several entries derived from one source;
+        entries written by :meth:`store_file` are looked up by their ``suffix``.
+        """
+        if not self.enabled:
+            return None
+        entry = self._entry(path, variant, suffix)
+        try:
+            os.utime(entry)
+        except OSError:
+            return None
+        return entry
+
+    def store(self, path: Path, volume: np.ndarray, variant: str = "") -> None:
+        """Write ``volume`` decoded from ``path`` and prune old entries."""
+        self.store_file(path, lambda tmp: np.save(tmp, np.ascontiguousarray(volume)), variant)
+
+    def store_file(
+        self, path: Path, write: Callable[[Path], Any], variant: str = "", suffix: str = ".npy"
+    ) -> None:
+        """Store an entry for ``path`` written by ``write(target)`` and prune old entries.
+
+        ``write`` receives a temporary file name, which is moved into place
+        once it returns, so readers never see a partial entry.
+        """
+        if not self.enabled:
+            return
+        entry = self._entry(path, variant, suffix)
+        tmp = entry.with_name(f"{entry.stem}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            write(tmp)
+            os.replace(tmp, entry)
+        except Exception as e:
+            logger.warning("Failed to cache %s on disk: %s", path, e)
+            tmp.unlink(missing_ok=True)
+            return
+        self.prune()
+
+    def read_meta(self, path: Path, variant: str = "") -> Dict[str, Any]:
+        if not self.enabled:
+            return {}
+        try:
+            return json.loads(self._entry(path, variant).with_suffix(".json").read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def write_meta(self, path: Path, variant: str = "", **values: Any) -> None:
+        """Merge ``values`` into the sidecar of an existing entry."""
+        if not self.enabled:
+            return
+        entry = self._entry(path, variant)
+        if not entry.exists():
+            return
+        meta = self.read_meta(path, variant)
+        meta.update(values)
+        try:
+            entry.with_suffix(".json").write_text(json.dumps(meta))
+        except OSError as e:  # pragma: no cover
+            logger.warning("Failed to write cache metadata for %s: %s", path, e)
+
+    def prune(self) -> None:
+        """Delete least recently used entries until the cache fits ``max_bytes``.
+
+        Only files directly in :attr:`root` count; other caches may keep their
+        own directories below it.
+        """
+        with self._lock:
+            try:
+                entries = [
+                    (e.stat(), e)
+                    for e in self.root.iterdir()
+                    if e.suffix != ".json" and ".tmp" not in e.name and e.is_file()
+                ]
+            except OSError:
+                return
+            total = sum(st.st_size for st, _ in entries)
+            for st, entry in sorted(entries, key=lambda t: t[0].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                entry.unlink(missing_ok=True)
+                entry.with_suffix(".json").unlink(missing_ok=True)
+                total -= st.st_size
+
+    def _entry(self, path: Path, variant: str = "", suffix: str = ".npy") -> Path:
+        digest = hashlib.sha1((repr(cache_key(path)) + variant).encode()).hexdigest()
+        return self.root / f"{digest}{suffix}"
+
+
+volume_cache = VolumeCache()
+disk_cache = DiskCache()
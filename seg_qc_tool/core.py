@@ -0,0 +1,356 @@
+"""Review session independent of any user interface.
+
+:class:`ReviewSession` holds the settings, pairs and review position and
+queues discards; it imports neither Qt nor the format backends, so pairs can be
+scanned, loaded and discarded in headless workers. User interfaces subclass it
+and override the ``on_*`` hooks, as :class:`~seg_qc_tool.controller.Controller`
+does to turn them into Qt signals.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import profiling
+from .cache import disk_cache, volume_cache
+from .discard import LOG_NAME, DiscardJob, DiscardWorker
+from .io_utils import (
+    gzip_index_cache,
+    has_module,
+    load_volume,
+    set_dicom_backend,
+    set_dicom_workers,
+    set_window_defaults,
+    volume_range,
+    volume_spacing,
+    volume_window,
+)
+from .manifest import ScanManifest
+from .matcher import pair_finder
+from .models import Pair, Settings
+from .mosaic import mosaic_cache
+from .stats import SliceStats, cached_slice_stats
+from .volume import LazyVolume
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = Path.home() / ".seg_qc_tool" / "config.json"
+
+# Display range of a segmentation whose values are not known yet: every
+# positive label is shown at full intensity, none as background
+PROVISIONAL_SEG_RANGE = (0.0, 1.0)
+
+
+@dataclass
+class LoadedPair:
+    """Volumes of a pair with their display ranges and label statistics.
+
+    ``window`` is the default display window of the original volume,
+    ``seg_range`` the value range of the segmentation and ``spacing`` the
+    voxel size of the original along its ``(z, x, y)`` axes. ``stats`` is
+    ``None`` until the segmentation has been counted with
+    :func:`~seg_qc_tool.stats.slice_stats`; until then ``seg_range`` of a
+    lazily read segmentation is :data:`PROVISIONAL_SEG_RANGE`, and the exact
+    one comes with the statistics.
+    """
+    pair: Pair
+    volume: np.ndarray
+    window: Tuple[float, float]
+    seg: np.ndarray
+    seg_range: Tuple[float, float]
+    stats: Optional[SliceStats]
+    spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+
+
+def load_pair_data(pair: Pair) -> LoadedPair:  # pragma: no cover - heavy I/O
+    """Load both volumes of ``pair`` through the volume cache.
+
+    Slice statistics need a pass over the whole segmentation, so they are only
+    included when already cached. The same holds for the value range of a
+    lazily read segmentation, which must not be estimated from a few slices.
+    """
+    volume = load_volume(pair.original)
+    seg = load_volume(pair.segmentation)
+    stats = cached_slice_stats(pair.segmentation)
+    if stats is not None:
+        seg_range = stats.value_range
+    elif isinstance(seg, LazyVolume):
+        seg_range = PROVISIONAL_SEG_RANGE
+    else:
+        seg_range = volume_range(pair.segmentation)
+    return LoadedPair(
+        pair,
+        volume,
+        volume_window(pair.original),
+        seg,
+        seg_range,
+        stats,
+        volume_spacing(pair.original),
+    )
+
+
+class ReviewSession:
+    """Pairs under review, the current position and the reviewer's settings.
+
+    The hooks :meth:`on_pair_changed` and :meth:`on_overlay_toggled` are called
+    on the calling thread; :meth:`on_discarded` and :meth:`on_discard_failed`
+    on the discard worker thread.
+    """
+
+    def __init__(self) -> None:
+        # Cooperative so that Qt subclasses initialise their QObject first
+        super().__init__()
+        self.settings = self.load_settings()
+        # Slider settings changed since the last save
+        self._unsaved = False
+        self.pairs: List[Pair] = []
+        self.current_index = -1
+        self.current_slice = 0
+        self.overlay = False
+        self.manifest = ScanManifest.load()
+        self._pair_roots: Optional[Tuple[Path, Path]] = None
+        self._scores: Dict[Tuple[str, str], float] = {}
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.discards = DiscardWorker(on_finished=self.on_discarded, on_failed=self.on_discard_failed)
+        volume_cache.budget = self.settings.cache_budget_mb * 1024 ** 2
+        set_dicom_workers(self.settings.dicom_workers)
+        try:
+            set_dicom_backend(self.settings.dicom_backend)
+        except ValueError as e:
+            logger.warning("%s", e)
+        set_window_defaults(self.settings.window_percentiles, self.settings.dicom_window)
+        disk_cache.enabled = self.settings.disk_cache
+        disk_cache.max_bytes = self.settings.disk_cache_mb * 1024 ** 2
+        gzip_index_cache.enabled = self.settings.gzip_index and has_module("indexed_gzip")
+        mosaic_cache.enabled = self.settings.mosaic_cache
+        if self.settings.profile:
+            profiling.enable()
+
+    # Hooks ----------------------------------------------------
+    def on_pair_changed(self, pair: Pair) -> None:
+        """Called when another pair becomes the current one."""
+
+    def on_overlay_toggled(self, enabled: bool) -> None:
+        """Called when overlay display is switched on or off."""
+
+    def on_discarded(self, job: DiscardJob) -> None:
+        """Called when ``job`` has been copied and logged."""
+
+    def on_discard_failed(self, job: DiscardJob, message: str) -> None:
+        """Called when ``job`` could not be carried out."""
+
+    def set_slice_index(self, index: int) -> None:
+        """Record currently displayed slice index."""
+        self.current_slice = index
+
+    def set_overlay(self, enabled: bool) -> None:
+        """Switch between overlay and side-by-side display."""
+        if enabled != self.overlay:
+            self.overlay = enabled
+            self.on_overlay_toggled(enabled)
+
+    # Slider values change on every step and are saved by close()
+    def set_overlay_alpha(self, alpha: float) -> None:
+        self.settings.overlay_alpha = alpha
+        self._unsaved = True
+
+    def set_brightness(self, brightness: float) -> None:
+        self.settings.brightness = brightness
+        self._unsaved = True
+
+    def set_contrast(self, contrast: float) -> None:
+        self.settings.contrast = contrast
+        self._unsaved = True
+
+    def close(self) -> None:
+        """Save settings changed since the last save and finish pending discards."""
+        if self._unsaved:
+            self.save_settings()
+        self.discards.close()
+
+    # Settings -------------------------------------------------
+    def load_settings(self) -> Settings:
+        if CONFIG_PATH.exists():
+            try:
+                data = json.loads(CONFIG_PATH.read_text())
+                return Settings(
+                    originals_dir=Path(data.get("originals_dir")) if data.get("originals_dir") else None,
+                    segmentations_dir=Path(data.get("segmentations_dir")) if data.get("segmentations_dir") else None,
+                    discard_dir=Path(data.get("discard_dir")) if data.get("discard_dir") else None,
+                    window_size=tuple(data.get("window_size")) if data.get("window_size") else None,
+                    brightness=data.get("brightness", 0.5),
+                    contrast=data.get("contrast", 0.5),
+                    window_percentiles=tuple(data.get("window_percentiles", (0.5, 99.5))),
+                    dicom_window=data.get("dicom_window", True),
+                    cache_budget_mb=data.get("cache_budget_mb", 4096),
+                    prefetch=data.get("prefetch", 1),
+                    dicom_workers=data.get("dicom_workers", 0),
+                    dicom_backend=data.get("dicom_backend", "auto"),
+                    disk_cache=data.get("disk_cache", False),
+                    disk_cache_mb=data.get("disk_cache_mb", 20480),
+                    gzip_index=data.get("gzip_index", True),
+                    mosaic_cache=data.get("mosaic_cache", True),
+                    overlay_alpha=data.get("overlay_alpha", 0.4),
+                    profile=data.get("profile", False),
+                )
+            except Exception as e:  # pragma: no cover
+                logger.warning("Failed to load settings: %s", e)
+        return Settings()
+
+    def save_settings(self) -> None:
+        CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CONFIG_PATH.write_text(json.dumps(self.settings.__dict__, default=str))
+        self._unsaved = False
+
+    def set_originals_dir(self, directory: Path) -> None:
+        """Update originals directory and reload pairs."""
+        self.settings.originals_dir = directory
+        self.save_settings()
+        self.load_pairs()
+
+    def set_segmentations_dir(self, directory: Path) -> None:
+        """Update segmentations directory and reload pairs."""
+        self.settings.segmentations_dir = directory
+        self.save_settings()
+        self.load_pairs()
+
+    def set_discard_dir(self, directory: Path) -> None:
+        """Set discard directory."""
+        self.settings.discard_dir = directory
+        self.save_settings()
+
+    # Pairing --------------------------------------------------
+    def load_pairs(self) -> None:
+        """Rescan both folders and update the pairs.
+
+        Unchanged directories are served from the scan manifest. If the pair
+        under review is still present the reviewer stays on it; otherwise the
+        position is kept when the folders are the same and reset otherwise.
+        """
+        if not self.settings.originals_dir or not self.settings.segmentations_dir:
+            return
+        roots = (self.settings.originals_dir, self.settings.segmentations_dir)
+        pairs = pair_finder(*roots, manifest=self.manifest)
+        self.manifest.save()
+        if self._scores:
+            pairs = self._sort_by_scores(pairs)
+
+        current = self.pairs[self.current_index] if self.current_index != -1 else None
+        same_roots = roots == self._pair_roots
+        self.pairs = pairs
+        self._pair_roots = roots
+        if not pairs:
+            self.current_index = -1
+            return
+        if current is not None and same_roots:
+            try:
+                self.current_index = pairs.index(current)
+                return
+            except ValueError:
+                self.current_index = min(self.current_index, len(pairs) - 1)
+        else:
+            self.current_index = 0
+        self.on_pair_changed(pairs[self.current_index])
+
+    def load_report(self, path: Path) -> None:
+        """Order pairs by the suspicion scores of a batch QC report.
+
+        The most suspicious pairs come first and review restarts at the top.
+        Pairs missing from the report keep their order after the scored ones.
+        """
+        from .batch import read_report
+
+        self._scores = read_report(path)
+        if not self.pairs:
+            return
+        self.pairs = self._sort_by_scores(self.pairs)
+        self.current_index = 0
+        self.on_pair_changed(self.pairs[0])
+
+    def _sort_by_scores(self, pairs: List[Pair]) -> List[Pair]:
+        def score(pair: Pair) -> float:
+            return self._scores.get((str(pair.original), str(pair.segmentation)), float("-inf"))
+
+        return sorted(pairs, key=score, reverse=True)
+
+    def next_pair(self) -> None:
+        if self.current_index + 1 < len(self.pairs):
+            self.current_index += 1
+            self.on_pair_changed(self.pairs[self.current_index])
+
+    def prev_pair(self) -> None:
+        if self.current_index > 0:
+            self.current_index -= 1
+            self.on_pair_changed(self.pairs[self.current_index])
+
+    def neighbours(self, count: int) -> List[Pair]:
+        """Return up to ``count`` pairs on each side of the current one.
+
+        Pairs are ordered by distance, the following pair before the previous
+        one, so prefetching favours the usual forward review direction.
+        """
+        result: List[Pair] = []
+        if self.current_index == -1:
+            return result
+        for step in range(1, count + 1):
+            for idx in (self.current_index + step, self.current_index - step):
+                if 0 <= idx < len(self.pairs):
+                    result.append(self.pairs[idx])
+        return result
+
+    def upcoming(self, count: int) -> List[Pair]:
+        """Return the current pair followed by up to ``count`` next pairs."""
+        if self.current_index == -1:
+            return []
+        return self.pairs[self.current_index : self.current_index + count + 1]
+
+    # Discard --------------------------------------------------
+    def discard_current(self, comment: str = "") -> None:
+        """Copy the current segmentation slice or volume to the discard folder.
+
+        The copy and the entry in the discard folder's log are made by
+        :attr:`discards` in the background, which reports the outcome. For a
+        DICOM series the file of the current slice is looked up there too.
+        """
+        if self.current_index == -1 or not self.settings.discard_dir:
+            return
+
+        pair = self.pairs[self.current_index]
+        seg_path = pair.segmentation
+        slice_index = None
+
+        if seg_path.is_dir() or seg_path.suffix.lower() == ".dcm":
+            series_dir = seg_path if seg_path.is_dir() else seg_path.parent
+            try:
+                dest = self.settings.discard_dir / series_dir.relative_to(self.settings.segmentations_dir)
+            except ValueError:
+                dest = self.settings.discard_dir
+            src = seg_path
+            slice_index = self.current_slice
+        else:
+            try:
+                rel = seg_path.relative_to(self.settings.segmentations_dir)
+            except ValueError:
+                rel = seg_path.name
+            dest = self.settings.discard_dir / rel
+            src = seg_path
+
+        self.discards.submit(
+            DiscardJob(
+                src=Path(src),
+                dest=dest,
+                original=pair.original,
+                segmentation=seg_path,
+                comment=comment,
+                log_path=self.settings.discard_dir / LOG_NAME,
+                slice_index=slice_index,
+            )
+        )
+        # pair is kept so user can continue reviewing other slices
@@ -0,0 +1,195 @@
+"""Background copying and logging of discarded segmentations."""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Set, TextIO
+
+from .cache import volume_cache
+from .io_utils import index_dicom_series
+
+logger = logging.getLogger(__name__)
+
+LOG_NAME = "discard_log.csv"
+# Seconds between fsyncs of the log while discards keep arriving
+FSYNC_INTERVAL = 2.0
+
+
+@dataclass
+class DiscardJob:
+    """One discard: copy ``src`` to ``dest`` and log it in ``log_path``.
+
+    ``segmentation`` is the volume ``src`` belongs to; it is dropped from the
+    volume cache once the copy is made. For one slice of a DICOM series,
+    ``src`` is the series, ``dest`` the directory to copy into and
+    ``slice_index`` the slice; :meth:`resolve` turns them into the slice's
+    file and destination.
+    """
+    src: Path
+    dest: Path
+    original: Path
+    segmentation: Path
+    comment: str
+    log_path: Path
+    slice_index: Optional[int] = None
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def resolve(self) -> None:
+        """Replace a series and slice index by the file holding that slice.
+
+        Indexing the series lists and stats every file, so this is left to
+        the discard worker instead of the thread queueing the job.
+        """
+        if self.slice_index is None:
+            return
+        files = index_dicom_series(self.src).files
+        file = files[max(0, min(self.slice_index, len(files) - 1))]
+        self.src, self.dest, self.slice_index = file, self.dest / file.name, None
+
+    def row(self) -> List[str]:
+        # Log the exact file that was copied so the filename is preserved
+        return [self.timestamp, str(self.original), self.src.name, self.comment]
+
+
+class DiscardWorker:
+    """Copy discarded files and append to the discard log on a worker thread.
+
+    Jobs queued while a batch is being processed are handled together: each
+    destination directory is created once and each file copied once per
+    batch. The log stays open between batches, is flushed after each one and
+    fsynced at most every :data:`FSYNC_INTERVAL` seconds, and when the worker
+    is idle or closed. Each job is reported to ``on_finished(job)`` or
+    ``on_failed(job, message)``, which are called on the worker thread.
+    """
+
+    def __init__(
+        self,
+        on_finished: Optional[Callable[[DiscardJob], None]] = None,
+        on_failed: Optional[Callable[[DiscardJob, str], None]] = None,
+    ) -> None:
+        self.on_finished = on_finished
+        self.on_failed = on_failed
+        # Jobs, flush() events and None to stop
+        self._queue: queue.Queue = queue.Queue()
+        self._log: Optional[TextIO] = None
+        self._log_path: Optional[Path] = None
+        self._writer = None
+        self._dirty = False
+        self._synced = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="discard", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: DiscardJob) -> None:
+        self._queue.put(job)
+
+    def flush(self) -> None:
+        """Block until all submitted jobs are done and the log is on disk."""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+
+    def close(self) -> None:
+        """Finish pending jobs, sync and close the log and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # Worker thread ------------------------------------------
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=FSYNC_INTERVAL if self._dirty else None)
+            except queue.Empty:
+                # Idle: make the last batch durable
+                self._sync()
+                continue
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            jobs = [j for j in batch if isinstance(j, DiscardJob)]
+            self._process(jobs)
+            # Sync on schedule, or right away when flush() or close() waits
+            if len(jobs) < len(batch) or time.monotonic() - self._synced >= FSYNC_INTERVAL:
+                self._sync()
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in batch:
+                self._close_log()
+                return
+
+    def _process(self, jobs: List[DiscardJob]) -> None:
+        created: Set[Path] = set()
+        copied: Set[Path] = set()
+        for job in jobs:
+            try:
+                job.resolve()
+                # The same file discarded again within a batch is only logged
+                if job.dest not in copied:
+                    if job.dest.parent not in created:
+                        job.dest.parent.mkdir(parents=True, exist_ok=True)
+                        created.add(job.dest.parent)
+                    shutil.copy2(str(job.src), str(job.dest))
+                    copied.add(job.dest)
+                    # Drop the cached segmentation so file handles are released on Windows
+                    volume_cache.invalidate(job.segmentation)
+                self._append(job)
+            except Exception as e:
+                logger.warning("Failed to discard %s: %s", job.src, e)
+                self._report(self.on_failed, job, str(e))
+                continue
+            self._report(self.on_finished, job)
+        if self._log is not None:
+            self._log.flush()
+
+    @staticmethod
+    def _report(callback: Optional[Callable[..., None]], *args: object) -> None:
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception:
+            # Keep the worker alive for the remaining jobs
+            logger.exception("Discard callback failed")
+
+    def _append(self, job: DiscardJob) -> None:
+        if job.log_path != self._log_path:
+            self._close_log()
+            job.log_path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(job.log_path, "a", newline="")
+            self._log_path = job.log_path
+            self._writer = csv.writer(self._log)
+        self._writer.writerow(job.row())
+        self._dirty = True
+
+    def _sync(self) -> None:
+        if self._log is None or not self._dirty:
+            return
+        try:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+        except OSError as e:  # pragma: no cover
+            logger.warning("Failed to sync %s: %s", self._log_path, e)
+        self._dirty = False
+        self._synced = time.monotonic()
+
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._sync()
+            self._log.close()
+            self._log = None
+            self._log_path = None
+            self._writer = None
@@ -3,52 +3,173 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from PySide6 import QtCore, QtGui, QtWidgets
-from concurrent.futures import Future
-
-from .io_utils import load_volume, normalize_volume
 
+from . import profiling
 from .controller import Controller
+from .core import LoadedPair
+from .discard import DiscardJob
+from .loader import MosaicLoader, PairLoader
 from .models import Pair
+from .mosaic import Mosaic
+from .planes import PLANES, plane, plane_aspect
+from .render import OverlayRenderer, SliceRenderer
+from .stats import SliceStats
+from .window import adjust_window
 
 
 class ImageView(QtWidgets.QLabel):
-    """Widget that displays a grayscale slice scaled to fit."""
+    """Widget that displays a grayscale slice scaled to fit.
+
+    Pixels are drawn ``aspect`` times as high as they are wide, so slices of
+    anisotropic volumes keep their physical proportions. Scaled pixmaps are
+    cached per target size until the image changes. Updates arriving in quick
+    succession (scrubbing, splitter drags) are scaled with the fast
+    transformation, and a smooth version is rendered once no update has
+    happened for :attr:`SETTLE_MS` milliseconds.
+    """
+
+    SETTLE_MS = 150
+    MAX_CACHED = 8
 
     def __init__(self) -> None:
         super().__init__()
         self.setAlignment(QtCore.Qt.AlignCenter)
         self._pixmap = QtGui.QPixmap()
-
-    def set_image(self, array) -> None:
-        """Set and scale an image from a numpy array."""
-        h, w = array.shape
-        img = QtGui.QImage(
-            array.tobytes(), w, h, QtGui.QImage.Format.Format_Grayscale8
+        self._aspect = 1.0
+        self._scaled: Dict[Tuple[int, int], QtGui.QPixmap] = {}
+        self._settle = QtCore.QTimer(self)
+        self._settle.setSingleShot(True)
+        self._settle.setInterval(self.SETTLE_MS)
+        self._settle.timeout.connect(self._update_smooth)
+
+    def set_image(self, array, aspect: float = 1.0) -> None:
+        """Set and scale an image from a ``uint8`` gray or RGBA numpy array.
+
+        The QImage wraps the array's memory using its row stride, so the only
+        copy made is the upload into the pixmap.
+        """
+        h, w = array.shape[:2]
+        fmt = (
+            QtGui.QImage.Format.Format_RGBA8888
+            if array.ndim == 3
+            else QtGui.QImage.Format.Format_Grayscale8
         )
+        img = QtGui.QImage(array.data, w, h, array.strides[0], fmt)
         self._pixmap = QtGui.QPixmap.fromImage(img)
+        self._aspect = aspect
+        self._scaled.clear()
         self._update_pixmap()
 
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:  # pragma: no cover - GUI
         self._update_pixmap()
         super().resizeEvent(event)
 
+    def _update_pixmap(self) -> None:
+        if self._pixmap.isNull():
+            return
+        size = (self.width(), self.height())
+        cached = self._scaled.get(size)
+        if cached is not None:
+            self.setPixmap(cached)
+            return
+        # Show a cheap version now; the smooth one follows once updates stop
+        self.setPixmap(self._scale(QtCore.Qt.TransformationMode.FastTransformation))
+        self._settle.start()
+
+    def _update_smooth(self) -> None:
+        if self._pixmap.isNull():
+            return
+        size = (self.width(), self.height())
+        scaled = self._scaled.get(size)
+        if scaled is None:
+            scaled = self._scale(QtCore.Qt.TransformationMode.SmoothTransformation)
+            if len(self._scaled) >= self.MAX_CACHED:
+                self._scaled.pop(next(iter(self._scaled)))
+            self._scaled[size] = scaled
+        self.setPixmap(scaled)
+
+    def _scale(self, mode: QtCore.Qt.TransformationMode) -> QtGui.QPixmap:
+        with profiling.span("scale_pixmap"):
+            physical = QtCore.QSize(
+                self._pixmap.width(), max(1, round(self._pixmap.height() * self._aspect))
+            )
+            target = physical.scaled(self.size(), QtCore.Qt.AspectRatioMode.KeepAspectRatio)
+            return self._pixmap.scaled(target, QtCore.Qt.AspectRatioMode.IgnoreAspectRatio, mode)
+
+
+class MosaicView(QtWidgets.QLabel):
+    """Strip showing the overview mosaic of a pair; clicking a tile selects its slice."""
+
+    slice_clicked = QtCore.Signal(int)
+
+    HEIGHT = 96
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.setAlignment(QtCore.Qt.AlignCenter)
+        self.setFixedHeight(self.HEIGHT)
+        self.setMinimumWidth(1)
+        self.setToolTip("Overview of evenly spaced slices; click a tile to open it")
+        self._mosaic: Optional[Mosaic] = None
+        self._pixmap = QtGui.QPixmap()
+
+    def set_mosaic(self, mosaic: Optional[Mosaic]) -> None:
+        self._mosaic = mosaic if mosaic is not None and mosaic.slices else None
+        if self._mosaic is None:
+            self._pixmap = QtGui.QPixmap()
+            self.clear()
+            return
+        rgba = self._mosaic.rgba()
+        h, w = rgba.shape[:2]
+        img = QtGui.QImage(rgba.data, w, h, rgba.strides[0], QtGui.QImage.Format.Format_RGBA8888)
+        self._pixmap = QtGui.QPixmap.fromImage(img)
+        self._update_pixmap()
+
+    def resizeEvent(self, event: QtGui.QResizeEvent) -> None:  # pragma: no cover - GUI
+        self._update_pixmap()
+        super().resizeEvent(event)
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent) -> None:  # pragma: no cover - GUI
+        shown = self.pixmap()
+        if self._mosaic is None or shown.isNull() or shown.width() == 0:
+            return
+        x = event.position().x() - (self.width() - shown.width()) / 2
+        if 0 <= x < shown.width():
+            column = int(x * self._mosaic.gray.shape[1] / shown.width())
+            self.slice_clicked.emit(self._mosaic.slice_at(column))
+
     def _update_pixmap(self) -> None:
         if not self._pixmap.isNull():
-            scaled = self._pixmap.scaled(
-                self.size(),
-                QtCore.Qt.AspectRatioMode.KeepAspectRatio,
-                QtCore.Qt.TransformationMode.SmoothTransformation,
+            self.setPixmap(
+                self._pixmap.scaled(
+                    self.size(),
+                    QtCore.Qt.AspectRatioMode.KeepAspectRatio,
+                    QtCore.Qt.TransformationMode.SmoothTransformation,
+                )
             )
-            self.setPixmap(scaled)
 
 
 class MainWindow(QtWidgets.QMainWindow):
+    # Following pairs whose mosaics are built in the background
+    MOSAIC_AHEAD = 4
+
     def __init__(self, controller: Controller) -> None:
         super().__init__()
         self.controller = controller
         self.controller.pair_changed.connect(self.load_pair)
+        self.loader = PairLoader(self.controller.executor, self)
+        self.loader.loading.connect(self._on_loading)
+        self.loader.loaded.connect(self._on_loaded)
+        self.loader.failed.connect(self._on_load_failed)
+        self.loader.stats_ready.connect(self._on_stats_ready)
+        self.loader.decoded.connect(self._on_decoded)
+        self.mosaic_loader = MosaicLoader(self.controller.executor, self)
+        self.mosaic_loader.ready.connect(self._on_mosaic_ready)
+        self.controller.discard_finished.connect(self._on_discarded)
+        self.controller.discard_failed.connect(self._on_discard_failed)
 
         menubar = self.menuBar()
         file_menu = menubar.addMenu("File")
@@ -61,6 +182,34 @@ class MainWindow(QtWidgets.QMainWindow):
         discard_act = QtGui.QAction("Set Discard Folder…", self)
         discard_act.triggered.connect(self.choose_discard)
         file_menu.addAction(discard_act)
+        report_act = QtGui.QAction("Open QC Report…", self)
+        report_act.triggered.connect(self.choose_report)
+        file_menu.addAction(report_act)
+        file_menu.addSeparator()
+        rescan_act = QtGui.QAction("Rescan Folders", self)
+        rescan_act.setShortcut(QtGui.QKeySequence.StandardKey.Refresh)
+        rescan_act.triggered.connect(self.controller.load_pairs)
+        file_menu.addAction(rescan_act)
+
+        profile_menu = menubar.addMenu("Profile")
+        timings_act = QtGui.QAction("Show Timings", self)
+        timings_act.setCheckable(True)
+        timings_act.setChecked(profiling.enabled())
+        timings_act.toggled.connect(self.show_timings)
+        profile_menu.addAction(timings_act)
+        trace_act = QtGui.QAction("Export Chrome Trace…", self)
+        trace_act.triggered.connect(self.export_trace)
+        profile_menu.addAction(trace_act)
+        reset_act = QtGui.QAction("Reset Timings", self)
+        reset_act.triggered.connect(profiling.reset)
+        profile_menu.addAction(reset_act)
+
+        self.timings_label = QtWidgets.QLabel()
+        self.statusBar().addPermanentWidget(self.timings_label)
+        self._timings_timer = QtCore.QTimer(self)
+        self._timings_timer.setInterval(500)
+        self._timings_timer.timeout.connect(self._update_timings)
+        self.show_timings(profiling.enabled())
 
         self.left_view = ImageView()
         self.right_view = ImageView()
@@ -72,9 +221,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.dataset_label = QtWidgets.QLabel("")
         self.dataset_label.setAlignment(QtCore.Qt.AlignCenter)
 
+        self.mosaic_view = MosaicView()
+        self.mosaic_view.slice_clicked.connect(self.jump_to_slice)
+
         container = QtWidgets.QWidget()
         layout = QtWidgets.QVBoxLayout(container)
         layout.addWidget(self.dataset_label)
+        layout.addWidget(self.mosaic_view)
         layout.addWidget(splitter)
         layout.setStretchFactor(splitter, 1)
         self.setCentralWidget(container)
@@ -107,45 +260,312 @@ class MainWindow(QtWidgets.QMainWindow):
 
         nav.addSeparator()
 
+        prev_label_btn = QtWidgets.QToolButton()
+        prev_label_btn.setText("◀ Label")
+        prev_label_btn.setToolTip("Previous labelled slice (Down)")
+        prev_label_btn.clicked.connect(self.prev_labelled)
+        nav.addWidget(prev_label_btn)
+
+        next_label_btn = QtWidgets.QToolButton()
+        next_label_btn.setText("Label ▶")
+        next_label_btn.setToolTip("Next labelled slice (Up)")
+        next_label_btn.clicked.connect(self.next_labelled)
+        nav.addWidget(next_label_btn)
+
+        QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_Down), self).activated.connect(
+            self.prev_labelled
+        )
+        QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_Up), self).activated.connect(
+            self.next_labelled
+        )
+
+        self.plane_box = QtWidgets.QComboBox()
+        self.plane_box.addItems(PLANES)
+        self.plane_box.setToolTip("View plane (1, 2, 3)")
+        self.plane_box.currentIndexChanged.connect(self.set_plane)
+        nav.addWidget(self.plane_box)
+        for axis, key in enumerate((QtCore.Qt.Key_1, QtCore.Qt.Key_2, QtCore.Qt.Key_3)):
+            QtGui.QShortcut(QtGui.QKeySequence(key), self).activated.connect(
+                lambda axis=axis: self.plane_box.setCurrentIndex(axis)
+            )
+
         self.slice_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
         nav.addWidget(self.slice_slider)
         self.slice_slider.valueChanged.connect(self.change_slice)
+        self._pending_slice = None
+        self._slice_timer = QtCore.QTimer(self)
+        self._slice_timer.setSingleShot(True)
+        self._slice_timer.setInterval(0)
+        self._slice_timer.timeout.connect(self._show_pending_slice)
+
+        nav.addSeparator()
+
+        overlay_btn = QtWidgets.QToolButton()
+        overlay_btn.setText("Overlay")
+        overlay_btn.setCheckable(True)
+        overlay_btn.setShortcut(QtGui.QKeySequence(QtCore.Qt.Key_O))
+        overlay_btn.toggled.connect(self.controller.set_overlay)
+        nav.addWidget(overlay_btn)
+
+        self.alpha_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
+        self.alpha_slider.setRange(0, 100)
+        self.alpha_slider.setValue(round(self.controller.settings.overlay_alpha * 100))
+        self.alpha_slider.setMaximumWidth(100)
+        self.alpha_slider.setToolTip("Overlay opacity")
+        self.alpha_slider.valueChanged.connect(self.change_alpha)
+        nav.addWidget(self.alpha_slider)
+        self.controller.overlay_toggled.connect(self._on_overlay_toggled)
+
+        nav.addSeparator()
+
+        self.brightness_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
+        self.brightness_slider.setRange(0, 100)
+        self.brightness_slider.setValue(round(self.controller.settings.brightness * 100))
+        self.brightness_slider.setMaximumWidth(100)
+        self.brightness_slider.setToolTip("Brightness")
+        self.brightness_slider.valueChanged.connect(self.change_brightness)
+        nav.addWidget(self.brightness_slider)
+
+        self.contrast_slider = QtWidgets.QSlider(QtCore.Qt.Orientation.Horizontal)
+        self.contrast_slider.setRange(0, 100)
+        self.contrast_slider.setValue(round(self.controller.settings.contrast * 100))
+        self.contrast_slider.setMaximumWidth(100)
+        self.contrast_slider.setToolTip("Contrast")
+        self.contrast_slider.valueChanged.connect(self.change_contrast)
+        nav.addWidget(self.contrast_slider)
+
+        self._pair: Optional[Pair] = None
+        self._volume = None
+        self._seg = None
+        self._window = (0.0, 0.0)
+        self._seg_range = (0.0, 0.0)
+        self._stats: Optional[SliceStats] = None
+        # Whether the reviewer moved a slider since the pair was shown
+        self._browsed = False
+        self._spacing = (1.0, 1.0, 1.0)
+        # Displayed plane and the slice shown in each plane
+        self._axis = 0
+        self._positions = [0, 0, 0]
+        # Whether streamed volumes are being decoded for another plane
+        self._decoding = False
+        self._left_renderer = SliceRenderer()
+        self._right_renderer = SliceRenderer()
+        self._overlay_renderer = OverlayRenderer()
+        # Identifies what is on screen so unchanged frames are not redrawn
+        self._loaded_count = 0
+        self._shown = None
 
     def load_pair(self, pair: Pair) -> None:
+        if self._decoding:
+            # The request drops the decode; keep the plane that is shown
+            self._decoding = False
+            self.plane_box.setCurrentIndex(self._axis)
+        self.loader.request(pair, self.controller.neighbours(self.controller.settings.prefetch))
+        self.mosaic_view.set_mosaic(None)
+        self.mosaic_loader.request(self.controller.upcoming(self.MOSAIC_AHEAD))
+
+    def _on_mosaic_ready(self, pair: Pair, mosaic: Mosaic) -> None:
+        current = self.controller.current_index
+        if current != -1 and self.controller.pairs[current] == pair:
+            self.mosaic_view.set_mosaic(mosaic)
+
+    def _on_loading(self, pair: Pair) -> None:
+        self.dataset_label.setText(f"{pair.original.name} (loading…)")
+        self.slice_slider.setEnabled(False)
+
+    def _on_load_failed(self, pair: Pair, message: str) -> None:
+        self.dataset_label.setText(f"{pair.original.name} (failed to load)")
+        self.statusBar().showMessage(message)
+        if self._decoding:
+            # The loaded volumes can still be browsed in the current plane
+            self._decoding = False
+            self.plane_box.setCurrentIndex(self._axis)
+            self._update_slider()
+
+    def _on_loaded(self, data: LoadedPair) -> None:
+        self.dataset_label.setText(data.pair.original.name)
+        self._pair = data.pair
+        self.statusBar().clearMessage()
+        self._volume, self._window = data.volume, data.window
+        self._seg, self._seg_range = data.seg, data.seg_range
+        self._stats = None
+        self._spacing = data.spacing
+        self._loaded_count += 1
+        self._pending_slice = None
+        self._browsed = False
+        if self._volume.ndim == 3:
+            # Middle slices until the labels are counted
+            self._positions = [n // 2 for n in self._volume.shape]
+            self.controller.set_slice_index(self._positions[0])
+        else:
+            self._positions = [0, 0, 0]
+        if data.stats is not None:
+            self._apply_stats(data.stats)
+        else:
+            self.statusBar().showMessage("Counting labelled slices…")
+        if self._axis != 0 and self.loader.decode(data.pair, self._volume, self._seg):
+            # Axial slices are shown until the chosen plane can be
+            self._decoding = True
+            self._axis = 0
+        self._update_slider()
+        self._redraw()
+
+    def _on_decoded(self, pair: Pair, volume, seg) -> None:
+        self._decoding = False
         self.dataset_label.setText(pair.original.name)
-        volume = self._load_volume(pair.original)
-        seg = self._load_volume(pair.segmentation)
-        if volume.ndim == 3:
-            mid = volume.shape[0] // 2
-            self.slice_slider.setMinimum(0)
-            self.slice_slider.setMaximum(volume.shape[0] - 1)
-            self.slice_slider.setValue(mid)
-            self.controller.set_slice_index(mid)
-            slice_ = volume[mid]
+        self._volume, self._seg = volume, seg
+        axis = self.plane_box.currentIndex()
+        if axis != self._axis:
+            self.set_plane(axis)
         else:
-            slice_ = volume
-        self.left_view.set_image((slice_ * 255).astype('uint8'))
-        if seg.ndim == 3:
-            seg_slice = seg[mid]
+            self._update_slider()
+
+    def _on_stats_ready(self, pair: Pair, stats: SliceStats) -> None:
+        if self._volume is None:
+            return
+        self._apply_stats(stats)
+        self._update_slider()
+        self._redraw()
+
+    def _apply_stats(self, stats: SliceStats) -> None:
+        """Use ``stats`` to navigate between labelled slices.
+
+        Unless the reviewer has moved already, every plane is opened on its
+        most labelled slice. The segmentation is shown over its exact value
+        range from now on.
+        """
+        self._stats = stats
+        self._seg_range = stats.value_range
+        if self._volume.ndim == 3 and not self._browsed:
+            self._positions = [
+                min(stats.best_slice(axis), n - 1) for axis, n in enumerate(self._volume.shape)
+            ]
+            self.controller.set_slice_index(self._positions[0])
+        if stats.empty:
+            self.statusBar().showMessage("Empty segmentation")
         else:
-            seg_slice = seg
-        self.right_view.set_image((seg_slice * 255).astype('uint8'))
+            self.statusBar().showMessage(f"Labelled slices {stats.first()}–{stats.last()}")
+
+    def set_plane(self, axis: int) -> None:
+        """Show slices across ``axis``: 0 axial, 1 coronal, 2 sagittal.
+
+        Streamed volumes are decoded in the background first and the plane
+        chosen last is shown once they are.
+        """
+        if self._decoding:
+            self.plane_box.setCurrentIndex(axis)
+            return
+        if axis == self._axis:
+            return
+        if axis != 0 and self._volume is not None:
+            self._decoding = self.loader.decode(self._pair, self._volume, self._seg)
+            if self._decoding:
+                self.plane_box.setCurrentIndex(axis)
+                return
+        self._axis = axis
+        self.plane_box.setCurrentIndex(axis)
+        if self._volume is not None:
+            self._pending_slice = None
+            self._update_slider()
+            self._redraw()
+
+    def _update_slider(self) -> None:
+        self.slice_slider.blockSignals(True)
+        if self._volume.ndim == 3:
+            self.slice_slider.setMinimum(0)
+            self.slice_slider.setMaximum(self._volume.shape[self._axis] - 1)
+            self.slice_slider.setValue(self._positions[self._axis])
+        self.slice_slider.blockSignals(False)
+        self.slice_slider.setEnabled(self._volume.ndim == 3)
+
+    def jump_to_slice(self, index: int) -> None:
+        """Show axial slice ``index``, e.g. one picked in the mosaic."""
+        if self.slice_slider.isEnabled():
+            self.set_plane(0)
+            self.slice_slider.setValue(index)
+
+    def next_labelled(self) -> None:
+        """Jump to the next slice containing labels."""
+        if self._stats is not None and self.slice_slider.isEnabled():
+            index = self._stats.next_labelled(self.slice_slider.value(), self._axis)
+            if index is not None:
+                self.slice_slider.setValue(index)
+
+    def prev_labelled(self) -> None:
+        """Jump to the previous slice containing labels."""
+        if self._stats is not None and self.slice_slider.isEnabled():
+            index = self._stats.prev_labelled(self.slice_slider.value(), self._axis)
+            if index is not None:
+                self.slice_slider.setValue(index)
 
     def change_slice(self, val: int) -> None:
-        if self.controller.current_index == -1:
+        if self.controller.current_index == -1 or self._volume is None:
+            return
+        self._positions[self._axis] = val
+        self._browsed = True
+        if self._axis == 0:
+            # Discards of DICOM series copy the file of the axial slice
+            self.controller.set_slice_index(val)
+        # Coalesce slider events so only the latest requested slice is drawn
+        self._pending_slice = val
+        if not self._slice_timer.isActive():
+            self._slice_timer.start()
+
+    def _show_pending_slice(self) -> None:
+        if self._pending_slice is not None and self._volume is not None:
+            index, self._pending_slice = self._pending_slice, None
+            self._show_slice(index)
+
+    def change_alpha(self, val: int) -> None:
+        self.controller.set_overlay_alpha(val / 100)
+        if self.controller.overlay and self._volume is not None:
+            self._redraw()
+
+    def change_brightness(self, val: int) -> None:
+        self.controller.set_brightness(val / 100)
+        if self._volume is not None:
+            self._redraw()
+
+    def change_contrast(self, val: int) -> None:
+        self.controller.set_contrast(val / 100)
+        if self._volume is not None:
+            self._redraw()
+
+    def _on_overlay_toggled(self, enabled: bool) -> None:
+        self.right_view.setVisible(not enabled)
+        if self._volume is not None:
+            self._redraw()
+
+    def _redraw(self) -> None:
+        self._show_slice(self._positions[self._axis])
+
+    def _show_slice(self, index: int) -> None:
+        """Display slice ``index`` in the current plane, converting only that slice.
+
+        Slices are strided views of the cached volumes, so the only copy is
+        the conversion to the display buffer.
+        """
+        settings = self.controller.settings
+        overlay = self.controller.overlay
+        alpha = settings.overlay_alpha
+        axis = self._axis
+        window = adjust_window(self._window, settings.brightness, settings.contrast)
+        key = (
+            self._loaded_count, axis, index, overlay, alpha if overlay else None, window, self._seg_range
+        )
+        if key == self._shown:
             return
-        pair = self.controller.pairs[self.controller.current_index]
-        volume = self._load_volume(pair.original)
-        seg = self._load_volume(pair.segmentation)
-        self.controller.set_slice_index(val)
-        self.left_view.set_image((volume[val] * 255).astype('uint8'))
-        self.right_view.set_image((seg[val] * 255).astype('uint8'))
-
-    def _load_volume(self, path: Path):
-        future: Future = self.controller.executor.submit(load_volume, path)
-        volume = future.result()
-        norm, _, _ = normalize_volume(volume)
-        return norm
+        self._shown = key
+        aspect = plane_aspect(self._spacing, axis)
+        with profiling.span("show_slice", index=index, axis=axis):
+            image = self._left_renderer.render(plane(self._volume, axis, index), *window)
+            seg_slice = plane(self._seg, axis, index)
+            if overlay and seg_slice.shape == image.shape:
+                image = self._overlay_renderer.render(image, seg_slice, alpha)
+            elif not overlay:
+                seg_image = self._right_renderer.render(seg_slice, *self._seg_range)
+                self.right_view.set_image(seg_image, aspect)
+            self.left_view.set_image(image, aspect)
 
     # Actions -------------------------------------------------
     def discard(self) -> None:
@@ -155,6 +575,44 @@ class MainWindow(QtWidgets.QMainWindow):
         if ok:
             self.controller.discard_current(text)
 
+    def _on_discarded(self, job: DiscardJob) -> None:
+        self.statusBar().showMessage(f"Discarded {job.src.name}", 3000)
+
+    def _on_discard_failed(self, job: DiscardJob, message: str) -> None:
+        self.statusBar().showMessage(f"Failed to discard {job.src.name}: {message}")
+
+    # Profiling -----------------------------------------------
+    def show_timings(self, enabled: bool) -> None:
+        """Record timings and show the latest ones in the status bar, or stop recording."""
+        if enabled:
+            profiling.enable()
+            self._timings_timer.start()
+            self._update_timings()
+        else:
+            profiling.disable()
+            self._timings_timer.stop()
+        self.timings_label.setVisible(enabled)
+
+    def _update_timings(self) -> None:
+        spans = profiling.summary()
+        parts = [
+            f"{name} {spans[name]['last_ms']:.1f} ms"
+            for name in ("load_volume", "volume_window", "show_slice", "scale_pixmap")
+            if name in spans
+        ]
+        counts = profiling.counters()
+        parts.append(
+            f"cache {counts.get('volume_cache.hit', 0)} hit / {counts.get('volume_cache.miss', 0)} miss"
+        )
+        self.timings_label.setText(" · ".join(parts))
+
+    def export_trace(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Chrome Trace", "seg_qc_trace.json", "Chrome trace (*.json)"
+        )
+        if path:
+            profiling.export_chrome_trace(Path(path))
+
     # Folder selection ---------------------------------------
     def choose_originals(self) -> None:
         directory = QtWidgets.QFileDialog.getExistingDirectory(
@@ -175,4 +633,11 @@ class MainWindow(QtWidgets.QMainWindow):
             self, "Select Discard Folder"
         )
         if directory:
-            self.controller.set_discard_dir(Path(directory))
\ No newline at end of file
+            self.controller.set_discard_dir(Path(directory))
+
+    def choose_report(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Open QC Report", "", "QC reports (*.jsonl *.csv)"
+        )
+        if path:
+            self.controller.load_report(Path(path))
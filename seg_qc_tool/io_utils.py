@@ -1,29 +1,183 @@
-"""I/O utilities for loading medical images."""
+"""I/O utilities for loading medical images.
+
+The format backends (nibabel, pydicom, SimpleITK, indexed_gzip) are imported
+on first use of their format, so importing this module stays cheap.
+"""
 
 from __future__ import annotations
 
+import functools
+import gzip
+import importlib
+import importlib.util
 import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple, List, Union
-from functools import lru_cache
+from types import ModuleType
+from typing import TYPE_CHECKING, Dict, Tuple, List, Optional, Union
 
 import numpy as np
-import nibabel as nib
 
-try:
-    import pydicom
-    import SimpleITK as sitk
-except Exception:  # pragma: no cover - optional deps
-    pydicom = None
-    sitk = None
+from . import profiling
+from .cache import CACHE_DIR, CacheKey, DiskCache, cache_key, disk_cache, volume_cache
+from .volume import LazyVolume
+from .window import DEFAULT_PERCENTILES, Window, percentile_window, preset_window, subsample
+
+if TYPE_CHECKING:  # pragma: no cover
+    from nibabel.arrayproxy import ArrayProxy
 
 logger = logging.getLogger(__name__)
 
 
+def has_module(name: str) -> bool:
+    """Return whether module ``name`` is installed, without importing it."""
+    return importlib.util.find_spec(name) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def optional_module(name: str) -> Optional[ModuleType]:
+    """Import and return module ``name``, or ``None`` if it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def _pydicom() -> ModuleType:
+    pydicom = optional_module("pydicom")
+    if pydicom is None:
+        raise ImportError("pydicom required for DICOM loading")
+    return pydicom
+
+
+# Seek points of gzipped NIfTI files, recorded on their first full read. An
+# index costs 32 KiB per point, i.e. under 1% of the uncompressed volume.
+GZIP_INDEX_SPACING = 4 * 1024**2
+GZIP_INDEX_SUFFIX = ".gzidx"
+# Disabled until the review session enables it from the ``gzip_index``
+# setting, so batch runs and scripts leave the cache directory alone
+gzip_index_cache = DiskCache(CACHE_DIR / "gzindex", 2 * 1024**3)
+
+# Threads used to decode DICOM slices; pixel decoders release the GIL.
+DICOM_WORKERS = min(16, os.cpu_count() or 1)
+
+
+def set_dicom_workers(count: int) -> None:
+    """Set the default number of DICOM decoding threads (``0`` for automatic)."""
+    global DICOM_WORKERS
+    DICOM_WORKERS = count if count > 0 else min(16, os.cpu_count() or 1)
+
+
+# Reader of DICOM pixel data: "pydicom", "sitk" or "auto"
+DICOM_BACKENDS = ("auto", "pydicom", "sitk")
+DICOM_BACKEND = "auto"
+
+
+def set_dicom_backend(backend: str) -> None:
+    """Set the default DICOM reader used by :func:`load_dicom_series`.
+
+    ``"sitk"`` reads series with ``sitk.ImageSeriesReader`` whenever that
+    gives the same values as pydicom, ``"auto"`` only for compressed series.
+    """
+    global DICOM_BACKEND
+    if backend not in DICOM_BACKENDS:
+        raise ValueError(f"Unknown DICOM backend: {backend}")
+    DICOM_BACKEND = backend
+
+
+# Default display windows: DICOM presets, otherwise these percentiles.
+WINDOW_PERCENTILES: Tuple[float, float] = DEFAULT_PERCENTILES
+DICOM_WINDOW = True
+
+
+def set_window_defaults(percentiles: Tuple[float, float], dicom_preset: bool) -> None:
+    """Set the defaults used by :func:`volume_window`."""
+    global WINDOW_PERCENTILES, DICOM_WINDOW
+    WINDOW_PERCENTILES = tuple(percentiles)
+    DICOM_WINDOW = dicom_preset
+
+
+# Integer types tried, smallest first, for values that can be stored exactly
+_COMPACT_TYPES = (np.uint8, np.int8, np.uint16, np.int16, np.int32)
+
+
+def compact_dtype(*values: float) -> np.dtype:
+    """Return the smallest integer dtype holding all ``values`` exactly.
+
+    ``float32`` is returned if any value is not an integer or none fits.
+    """
+    if not all(float(v).is_integer() for v in values):
+        return np.dtype(np.float32)
+    for dtype in _COMPACT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= min(values) and max(values) <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.float32)
+
+
+def compact(data: np.ndarray, slope: float = 1.0, intercept: float = 0.0) -> np.ndarray:
+    """Return ``data * slope + intercept`` in the most compact exact dtype.
+
+    Integer data with integral scaling stays integer, shrunk to the smallest
+    type holding its values, so label maps become ``uint8``. Float data whose
+    values are all integers, such as masks saved as float, is converted
+    losslessly too. Anything else becomes ``float32``. ``data`` may be
+    modified in place.
+    """
+    if data.size == 0:
+        return data.astype(np.float32)
+    lo, hi = float(data.min()), float(data.max())
+    dtype = np.dtype(np.float32)
+    if np.isfinite(lo) and np.isfinite(hi):
+        dtype = compact_dtype(lo, hi, lo * slope + intercept, hi * slope + intercept)
+    if dtype.kind != "f" and data.dtype.kind == "f":
+        values = data.astype(dtype)
+        if np.array_equal(values, data):
+            data = values
+        else:
+            dtype = np.dtype(np.float32)
+    out = data.astype(dtype, copy=False)
+    if slope != 1.0:
+        out *= dtype.type(slope)
+    if intercept != 0.0:
+        out += dtype.type(intercept)
+    return out
+
+
+@profiling.timed("load_nifti")
 def load_nifti(path: Path) -> np.ndarray:  # pragma: no cover - heavy I/O
-    """Load a NIfTI file as a numpy array and close the file handle."""
+    """Load a NIfTI file as a numpy array and close the file handle.
+
+    The stored values are read unscaled and converted with :func:`compact`,
+    so integer images keep a compact integer type. Gzipped files are read
+    through ``indexed_gzip`` when it is installed and the seek points found
+    on the way are kept in :data:`gzip_index_cache` for :func:`open_nifti_gz`.
+    """
+    import nibabel as nib
+
     img = nib.load(str(path), mmap=False)
-    data = img.get_fdata(dtype=np.float32)
+    proxy = img.dataobj
+    gz = None
+    igzip = optional_module("indexed_gzip") if path.name.endswith(".gz") else None
+    if gzip_index_cache.enabled and igzip is not None:
+        gz = igzip.IndexedGzipFile(str(path), spacing=GZIP_INDEX_SPACING)
+    try:
+        if gz is not None:
+            proxy = _gzip_proxy(gz, proxy)
+        data = compact(np.asarray(proxy.get_unscaled()), float(proxy.slope), float(proxy.inter))
+        if gz is not None:
+            # Only a trailing remainder is left to index after the full read
+            gz.build_full_index()
+            gzip_index_cache.store_file(
+                path, lambda target: gz.export_index(str(target)), suffix=GZIP_INDEX_SUFFIX
+            )
+    finally:
+        if gz is not None:
+            gz.close()
     if data.ndim == 4:
         data = data[..., 0]
     if data.ndim == 3:
@@ -41,69 +195,605 @@ def load_npy(path: Path) -> np.ndarray:
     return np.load(str(path))
 
 
-def load_dicom_series(path: Path, *, return_files: bool = False) -> Union[np.ndarray, Tuple[np.ndarray, List[Path]]]:  # pragma: no cover - heavy I/O
+def open_npy(path: Path) -> Union[LazyVolume, np.ndarray]:
+    """Memory-map a .npy volume so slices are read on demand.
+
+    Arrays that are not 3D are loaded eagerly with :func:`load_npy`.
+    """
+    data = np.load(str(path), mmap_mode="r")
+    if data.ndim != 3:
+        return load_npy(path)
+    return LazyVolume(data, data.shape, data.dtype, axes=range(data.ndim))
+
+
+def open_nifti(path: Path) -> Union[LazyVolume, np.ndarray]:  # pragma: no cover - heavy I/O
+    """Open an uncompressed NIfTI file for slice-on-demand access.
+
+    Slices are read through nibabel's array proxy, which seeks to the requested
+    region and applies the header scaling. Integer images keep their stored
+    type, or the smallest integer type holding every scaled value of it when
+    the scaling is integral. Volumes that are not 3D or 4D are loaded eagerly
+    with :func:`load_nifti`.
+    """
+    import nibabel as nib
+
+    img = nib.load(str(path), mmap="r")
+    if len(img.shape) not in (3, 4):
+        return load_nifti(path)
+    return _lazy_nifti(img.dataobj, img.shape)
+
+
+def open_nifti_gz(path: Path, index: Path) -> Union[LazyVolume, np.ndarray]:  # pragma: no cover - heavy I/O
+    """Open a gzipped NIfTI file for slice-on-demand access through its seek index.
+
+    ``index`` was exported by :func:`load_nifti`. Reading a slice inflates
+    the file only from the nearest seek point before it, at most
+    :data:`GZIP_INDEX_SPACING` bytes of other data, instead of the whole
+    file up to the slice.
+    """
+    import indexed_gzip as igzip
+    import nibabel as nib
+
+    img = nib.load(str(path))
+    if len(img.shape) not in (3, 4):
+        return load_nifti(path)
+    gz = igzip.IndexedGzipFile(str(path), spacing=GZIP_INDEX_SPACING, index_file=str(index))
+    # The proxy serialises seek and read on the shared file object
+    return _lazy_nifti(_gzip_proxy(gz, img.dataobj), img.shape, planar=False)
+
+
+def _gzip_proxy(gz, proxy: ArrayProxy) -> ArrayProxy:
+    """Return a copy of nibabel's ``proxy`` reading from the open gzip file ``gz``."""
+    from nibabel.arrayproxy import ArrayProxy
+
+    return ArrayProxy(gz, (proxy.shape, proxy.dtype, proxy.offset, proxy.slope, proxy.inter))
+
+
+def _lazy_nifti(proxy, shape: Tuple[int, ...], planar: bool = True) -> LazyVolume:
+    extra = (0,) if len(shape) == 4 else ()
+    stored = np.dtype(proxy.dtype)
+    slope, inter = float(proxy.slope), float(proxy.inter)
+    dtype = np.dtype(np.float32)
+    if stored.kind in "iu":
+        if slope == 1.0 and inter == 0.0:
+            dtype = stored
+        else:
+            info = np.iinfo(stored)
+            dtype = compact_dtype(info.min, info.max, info.min * slope + inter, info.max * slope + inter)
+    return LazyVolume(
+        proxy, (shape[2], shape[0], shape[1]), dtype, axes=(2, 0, 1), extra=extra, planar=planar
+    )
+
+
+@dataclass
+class DicomSeriesIndex:
+    """Header information of a DICOM series in slice order.
+
+    Built from headers only (pixel data is never read) and cached per
+    directory by :func:`index_dicom_directory`. Lists hold one entry per
+    slice; a multi-frame file contributes one slice per frame, with its
+    frame number in ``frames``. ``window`` is the first
+    ``(WindowCenter, WindowWidth)`` preset, if any, ``stored_range`` the
+    range of values the stored bits can represent and ``max_value`` the
+    largest of them after rescaling. ``spacing`` is the distance in mm
+    between slices, rows and columns. ``compressed`` is set when the pixel
+    data uses an encapsulated (compressed) transfer syntax.
+    """
+    directory: Path
+    files: List[Path]
+    frames: List[int]
+    instance_numbers: List[int]
+    positions: List[Optional[Tuple[float, float, float]]]
+    slopes: List[float]
+    intercepts: List[float]
+    photometric: str
+    rows: int
+    columns: int
+    window: Optional[Tuple[float, float]] = None
+    max_value: float = 0.0
+    stored_range: Tuple[int, int] = (0, 65535)
+    series_uid: str = ""
+    spacing: Tuple[float, float, float] = (1.0, 1.0, 1.0)
+    compressed: bool = False
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def multiframe(self) -> bool:
+        return len(set(self.files)) < len(self.files)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Most compact type holding the stored, rescaled and inverted values exactly.
+
+        Slices are decoded and rescaled in place, so the stored values must
+        fit as well as the final ones.
+        """
+        values: List[float] = list(self.stored_range)
+        for slope, intercept in zip(self.slopes, self.intercepts):
+            scaled = [v * slope + intercept for v in self.stored_range]
+            values += scaled
+            if self.photometric == "MONOCHROME1":
+                values += [self.max_value - v for v in scaled]
+        return compact_dtype(*values)
+
+
+# Series indexes of recently used directories, least recently used first,
+# with the cache key of the directory's files they were built from
+MAX_SERIES_INDEXES = 256
+_series_indexes: "OrderedDict[Path, Tuple[CacheKey, List[DicomSeriesIndex]]]" = OrderedDict()
+_series_lock = threading.Lock()
+
+# Files in a series directory that are never DICOM images
+_NON_DICOM_NAMES = {"dicomdir"}
+_NON_DICOM_SUFFIXES = {".txt", ".json", ".xml", ".csv", ".md", ".npy", ".nii", ".gz", ".zip"}
+
+
+def dicom_candidate(name: str) -> bool:
+    """Return whether a file called ``name`` may be a DICOM slice.
+
+    Hidden files, ``DICOMDIR`` and files with a known non-DICOM suffix are not.
+    """
+    name = name.lower()
+    return (
+        not name.startswith(".")
+        and name not in _NON_DICOM_NAMES
+        and os.path.splitext(name)[1] not in _NON_DICOM_SUFFIXES
+    )
+
+
+def is_dicom_file(path: Path) -> bool:
+    """Return whether ``path`` starts with the DICOM preamble and ``DICM`` prefix.
+
+    Only the first 132 bytes are read, so folders of files without a ``.dcm``
+    suffix can be recognised without parsing any headers.
+    """
+    if not dicom_candidate(path.name):
+        return False
+    try:
+        with open(path, "rb") as fp:
+            fp.seek(128)
+            return fp.read(4) == b"DICM"
+    except OSError:
+        return False
+
+
+def index_dicom_series(path: Path, *, workers: Optional[int] = None) -> DicomSeriesIndex:  # pragma: no cover - heavy I/O
+    """Return the header index of the DICOM series at ``path``.
+
+    ``path`` may be the series directory or one file from it. A directory
+    holding several series (e.g. a scout next to the main scan) resolves to
+    the series with the most slices; a file resolves to its own series.
+    """
+    series = index_dicom_directory(path if path.is_dir() else path.parent, workers=workers)
+    if not path.is_dir():
+        for index in series:
+            if path in index.files:
+                return index
+    return max(series, key=len)
+
+
+@profiling.timed("index_dicom_series")
+def index_dicom_directory(directory: Path, *, workers: Optional[int] = None) -> List[DicomSeriesIndex]:  # pragma: no cover - heavy I/O
+    """Return the header indexes of all DICOM series in ``directory``.
+
+    Every file is considered, with or without a ``.dcm`` suffix; files that
+    are not DICOM images are skipped. Slices are grouped by
+    ``SeriesInstanceUID`` and image size, and sorted along the slice normal
+    by ``ImagePositionPatient`` when every slice has a distinct position,
+    otherwise by ``InstanceNumber``. Enhanced multi-frame files contribute
+    their frames with per-frame positions and rescaling from the functional
+    groups. The result is cached for the :data:`MAX_SERIES_INDEXES` most
+    recently used directories and rebuilt when a file is added, removed or
+    rewritten.
+    """
+    _pydicom()
+    key = cache_key(directory)
+    files = sorted(
+        p
+        for p in directory.iterdir()
+        if dicom_candidate(p.name) and p.is_file()
+    )
+    with _series_lock:
+        cached = _series_indexes.get(directory)
+        if cached is not None and cached[0] == key:
+            _series_indexes.move_to_end(directory)
+            return cached[1]
+
+    workers = max(1, min(workers or DICOM_WORKERS, len(files) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        headers = [h for h in pool.map(_read_dicom_header, files) if h is not None]
+    if not headers:
+        raise FileNotFoundError("No DICOM files found")
+
+    groups: Dict[Tuple[str, int, int], list] = {}
+    for instance, file, ds in headers:
+        group = (str(getattr(ds, "SeriesInstanceUID", "")), int(ds.Rows), int(ds.Columns))
+        groups.setdefault(group, []).append((instance, file, ds))
+    series = [_index_series(directory, group) for group in groups.values()]
+    with _series_lock:
+        _series_indexes[directory] = (key, series)
+        _series_indexes.move_to_end(directory)
+        while len(_series_indexes) > MAX_SERIES_INDEXES:
+            _series_indexes.popitem(last=False)
+    return series
+
+
+def _index_series(directory: Path, headers: list) -> DicomSeriesIndex:  # pragma: no cover - heavy I/O
+    """Build the index of one series from its ``(InstanceNumber, path, dataset)`` headers."""
+    # One entry per frame: (instance, path, frame, position, slope, intercept)
+    slices = []
+    for instance, file, ds in headers:
+        for frame in range(int(getattr(ds, "NumberOfFrames", 1) or 1)):
+            ipp = _frame_attr(ds, frame, "PlanePositionSequence", "ImagePositionPatient")
+            position = tuple(float(v) for v in ipp) if ipp is not None else None
+            slope = _frame_attr(ds, frame, "PixelValueTransformationSequence", "RescaleSlope", 1.0)
+            intercept = _frame_attr(ds, frame, "PixelValueTransformationSequence", "RescaleIntercept", 0.0)
+            slices.append((instance, file, frame, position, float(slope), float(intercept)))
+
+    first = headers[0][2]
+    orientation = _frame_attr(first, 0, "PlaneOrientationSequence", "ImageOrientationPatient")
+    positions = [s[3] for s in slices]
+    if orientation is not None and None not in positions:
+        normal = np.cross(
+            np.asarray(orientation[:3], dtype=float), np.asarray(orientation[3:], dtype=float)
+        )
+        distances = [float(np.dot(p, normal)) for p in positions]
+    else:
+        distances = []
+    slice_spacing = None
+    if distances and len(set(distances)) == len(distances):
+        order = sorted(range(len(slices)), key=distances.__getitem__)
+        if len(distances) > 1:
+            slice_spacing = float(np.median(np.diff(sorted(distances))))
+    else:
+        order = sorted(range(len(slices)), key=lambda i: (slices[i][0], str(slices[i][1]), slices[i][2]))
+    slices = [slices[i] for i in order]
+
+    bits = int(getattr(first, "BitsStored", 16))
+    if getattr(first, "PixelRepresentation", 0):
+        stored_range = (-(2 ** (bits - 1)), 2 ** (bits - 1) - 1)
+    else:
+        stored_range = (0, 2**bits - 1)
+    slopes = [s[4] for s in slices]
+    intercepts = [s[5] for s in slices]
+    syntax = getattr(getattr(first, "file_meta", None), "TransferSyntaxUID", None)
+    if slice_spacing is None:
+        slice_spacing = _frame_attr(first, 0, "PixelMeasuresSequence", "SpacingBetweenSlices")
+    if slice_spacing is None:
+        slice_spacing = _frame_attr(first, 0, "PixelMeasuresSequence", "SliceThickness", 1.0)
+    pixel_spacing = _frame_attr(first, 0, "PixelMeasuresSequence", "PixelSpacing", (1.0, 1.0))
+
+    return DicomSeriesIndex(
+        directory=directory,
+        files=[s[1] for s in slices],
+        frames=[s[2] for s in slices],
+        instance_numbers=[s[0] for s in slices],
+        positions=[s[3] for s in slices],
+        slopes=slopes,
+        intercepts=intercepts,
+        photometric=getattr(first, "PhotometricInterpretation", ""),
+        rows=int(first.Rows),
+        columns=int(first.Columns),
+        window=_window_preset(first),
+        max_value=max(stored_range[1] * m + b for m, b in zip(slopes, intercepts)),
+        stored_range=stored_range,
+        series_uid=str(getattr(first, "SeriesInstanceUID", "")),
+        spacing=(float(slice_spacing), float(pixel_spacing[0]), float(pixel_spacing[1])),
+        compressed=bool(getattr(syntax, "is_compressed", False)),
+    )
+
+
+def _frame_attr(ds, frame: int, group: str, name: str, default=None):
+    """Return attribute ``name`` of ``frame``.
+
+    Enhanced multi-frame objects keep per-frame attributes in functional
+    group sequences (``group``), either per frame or shared by all frames;
+    other objects have them at the top level.
+    """
+    per_frame = getattr(ds, "PerFrameFunctionalGroupsSequence", None)
+    shared = getattr(ds, "SharedFunctionalGroupsSequence", None)
+    for item in (
+        per_frame[frame] if per_frame and frame < len(per_frame) else None,
+        shared[0] if shared else None,
+    ):
+        sequence = getattr(item, group, None) if item is not None else None
+        if sequence:
+            value = getattr(sequence[0], name, None)
+            if value is not None:
+                return value
+    value = getattr(ds, name, None)
+    return default if value is None else value
+
+
+def _window_preset(ds) -> Optional[Tuple[float, float]]:
+    from pydicom.multival import MultiValue
+
+    center = _frame_attr(ds, 0, "FrameVOILUTSequence", "WindowCenter")
+    width = _frame_attr(ds, 0, "FrameVOILUTSequence", "WindowWidth")
+    if center is None or width is None:
+        return None
+    # Multi-valued when several presets are offered; take the first
+    if isinstance(center, MultiValue):
+        center = center[0]
+    if isinstance(width, MultiValue):
+        width = width[0]
+    return float(center), float(width)
+
+
+@profiling.timed("load_dicom_series")
+def load_dicom_series(
+    path: Path,
+    *,
+    return_files: bool = False,
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Union[np.ndarray, Tuple[np.ndarray, List[Path]]]:  # pragma: no cover - heavy I/O
     """Load a DICOM series from a file or directory.
 
     Parameters
     ----------
     path:
-        Directory containing ``.dcm`` files or one file from the series.
+        Series directory or one file from the series.
     return_files:
-        If ``True`` the sorted list of slice file paths is also returned.
+        If ``True`` the file of every slice is also returned, in slice order.
+    workers:
+        Number of threads decoding files. Defaults to :data:`DICOM_WORKERS`.
+    backend:
+        ``"pydicom"``, ``"sitk"`` or ``"auto"``; see :func:`set_dicom_backend`.
 
-    Sorting is based on the ``InstanceNumber`` attribute when available to
-    preserve slice order. ``RescaleSlope`` and ``RescaleIntercept`` are applied
-    and MONOCHROME1 images are inverted to maintain correct intensity mapping.
+    The series, slice order and output shape come from
+    :func:`index_dicom_series`, so the volume is allocated once and files are
+    decoded in parallel straight into their slices of the volume; a
+    multi-frame file is read once for all its frames. ``RescaleSlope`` and
+    ``RescaleIntercept`` are applied and MONOCHROME1 images are inverted to
+    maintain correct intensity mapping. Inversion subtracts each slice from
+    the series' ``max_value`` while it is decoded, so it needs no extra pass
+    over the volume. The volume has the compact type given by
+    :attr:`DicomSeriesIndex.dtype`, e.g. ``int16`` for 12 bit CT and
+    ``uint8`` for 8 bit label maps.
     """
-    directory = path if path.is_dir() else path.parent
+    index = index_dicom_series(path, workers=workers)
 
-    # Use pydicom directly to keep raw intensities. SimpleITK sometimes applies
-    # windowing automatically which can invert the data.
+    volume = None
+    if _use_sitk(index, backend or DICOM_BACKEND):
+        try:
+            volume = _load_dicom_sitk(index)
+        except Exception as e:
+            logger.warning("SimpleITK failed to read %s, using pydicom: %s", index.directory, e)
+    if volume is None:
+        volume = np.empty((len(index), index.rows, index.columns), dtype=index.dtype)
+        invert = index.max_value if index.photometric == "MONOCHROME1" else None
+        slots: Dict[Path, List[Tuple[int, int]]] = {}
+        for i, (file, frame) in enumerate(zip(index.files, index.frames)):
+            slots.setdefault(file, []).append((frame, i))
+        workers = max(1, min(workers or DICOM_WORKERS, len(slots)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() propagates the first decoding error, if any
+            list(
+                pool.map(
+                    lambda item: _decode_dicom_file(
+                        item[0],
+                        [frame for frame, _ in item[1]],
+                        [volume[i] for _, i in item[1]],
+                        [index.slopes[i] for _, i in item[1]],
+                        [index.intercepts[i] for _, i in item[1]],
+                        invert,
+                    ),
+                    slots.items(),
+                )
+            )
 
-    if pydicom is None:
-        raise ImportError("pydicom or SimpleITK required for DICOM loading")
+    if return_files:
+        return volume, list(index.files)
+    return volume
 
-    files = sorted(directory.glob("*.dcm"))
-    if not files:
-        files = sorted(directory.glob("*.DCM"))
-    if not files:
-        raise FileNotFoundError("No DICOM files found")
 
-    slices = []
-    for f in files:
-        with open(f, "rb") as fp:
-            ds = pydicom.dcmread(fp)
-            inst_num = int(getattr(ds, "InstanceNumber", 0))
-            arr = ds.pixel_array.astype(np.float32)
-            slope = float(getattr(ds, "RescaleSlope", 1.0))
-            intercept = float(getattr(ds, "RescaleIntercept", 0.0))
-            arr = arr * slope + intercept
-            photometric = getattr(ds, "PhotometricInterpretation", "")
-        slices.append((inst_num, arr, photometric, f))
-
-    slices.sort(key=lambda t: t[0])
-    arrays = [s[1] for s in slices]
-    files = [s[3] for s in slices]
-    photometric = slices[0][2] if slices else ""
-
-    volume = np.stack(arrays)
-    if photometric == "MONOCHROME1":
-        volume = volume.max() - volume
-    if return_files:
-        return volume, files
+def _use_sitk(index: DicomSeriesIndex, backend: str) -> bool:
+    """Return whether ``index`` should be read with SimpleITK under ``backend``.
+
+    SimpleITK is only used where it yields the same values as the pydicom
+    path: one frame per file, MONOCHROME2 and one rescaling for the whole
+    series. ``"auto"`` uses it for compressed series only, where GDCM's
+    native codecs beat pydicom's decoders; uncompressed series are decoded
+    in parallel with pydicom.
+    """
+    if backend == "pydicom":
+        return False
+    eligible = (
+        not index.multiframe
+        and index.photometric == "MONOCHROME2"
+        and len(set(index.slopes)) == 1
+        and len(set(index.intercepts)) == 1
+    )
+    # Checked last so SimpleITK is only imported when it will be used
+    return eligible and (backend == "sitk" or index.compressed) and has_module("SimpleITK")
+
+
+def _load_dicom_sitk(index: DicomSeriesIndex) -> np.ndarray:  # pragma: no cover - heavy I/O
+    """Read ``index`` with ``sitk.ImageSeriesReader`` in the index's slice order."""
+    import SimpleITK as sitk
+
+    reader = sitk.ImageSeriesReader()
+    # Files are passed in our order; the reader does not sort or group them
+    reader.SetFileNames([str(f) for f in index.files])
+    volume = sitk.GetArrayFromImage(reader.Execute())
+    expected = (len(index), index.rows, index.columns)
+    if volume.shape != expected:
+        raise ValueError(f"expected shape {expected}, got {volume.shape}")
+    return volume.astype(index.dtype, copy=False)
+
+
+def _read_dicom_header(path: Path):  # pragma: no cover - heavy I/O
+    """Return ``(InstanceNumber, path, dataset)`` without reading pixel data.
+
+    Returns ``None`` for files that are not DICOM images.
+    """
+    pydicom = _pydicom()
+    from pydicom.errors import InvalidDicomError
+
+    try:
+        with open(path, "rb") as fp:
+            ds = pydicom.dcmread(fp, stop_before_pixels=True)
+    except (InvalidDicomError, OSError) as e:
+        logger.debug("Skipping %s: %s", path, e)
+        return None
+    if "Rows" not in ds or "Columns" not in ds:
+        # Structured reports, presentation states and other non-image objects
+        return None
+    return int(getattr(ds, "InstanceNumber", 0) or 0), path, ds
+
+
+def _decode_dicom_file(
+    path: Path,
+    frames: List[int],
+    outs: List[np.ndarray],
+    slopes: List[float],
+    intercepts: List[float],
+    invert: Optional[float] = None,
+) -> None:  # pragma: no cover - heavy I/O
+    """Decode ``frames`` of one DICOM file into ``outs``.
+
+    Each frame is rescaled with its slope/intercept and, with ``invert``,
+    replaced by ``invert - value``. The factors are converted to the type of
+    the output, which holds them exactly.
+    """
+    with open(path, "rb") as fp:
+        pixels = _pydicom().dcmread(fp).pixel_array
+    if pixels.ndim == 2:
+        pixels = pixels[None]
+    for frame, out, slope, intercept in zip(frames, outs, slopes, intercepts):
+        out[...] = pixels[frame]
+        cast = out.dtype.type
+        if slope != 1.0:
+            out *= cast(slope)
+        if intercept != 0.0:
+            out += cast(intercept)
+        if invert is not None:
+            np.subtract(cast(invert), out, out=out)
+
+
+def load_volume(path: Path) -> Union[np.ndarray, LazyVolume]:  # pragma: no cover - heavy I/O
+    """Load a volume from a supported file path through :data:`volume_cache`.
+
+    Uncompressed NIfTI and ``.npy`` files are returned as :class:`LazyVolume`
+    objects that read slices on demand; other formats are decoded eagerly.
+    """
+    with profiling.span("load_volume", path=path.name):
+        return volume_cache.get_or_load(path, _read_volume)
+
+
+def load_full_volume(path: Path) -> np.ndarray:  # pragma: no cover - heavy I/O
+    """Return the volume at ``path`` decoded in full, through :data:`volume_cache`.
+
+    A lazily read volume in the cache is replaced by the decoded array, so
+    the copy counts against the budget and is reused when the pair is shown
+    again.
+    """
+    volume = load_volume(path)
+    if isinstance(volume, LazyVolume):
+        volume = np.asarray(volume)
+        volume_cache.replace(path, volume)
     return volume
 
 
-@lru_cache(maxsize=2)
-def load_volume(path: Path) -> np.ndarray:  # pragma: no cover - heavy I/O
-    """Load a volume from a supported file path with simple caching."""
-    if path.suffix in {".nii", ".nii.gz", ".gz"}:
-        return load_nifti(path)
+def _read_volume(path: Path) -> Union[np.ndarray, LazyVolume]:  # pragma: no cover - heavy I/O
+    """Read a volume from disk, dispatching on the file type.
+
+    Formats that must be decoded in full (compressed NIfTI, DICOM) are served
+    from :data:`disk_cache` when enabled and written to it after decoding.
+    Gzipped NIfTI files with a seek index are otherwise read lazily.
+    """
+    if path.suffix == ".nii":
+        return open_nifti(path)
     if path.suffix == ".npy":
-        return load_npy(path)
-    return load_dicom_series(path)
+        return open_npy(path)
+    entry = disk_cache.lookup(path)
+    if entry is not None:
+        profiling.count("disk_cache.hit")
+        return open_npy(entry)
+    if disk_cache.enabled:
+        profiling.count("disk_cache.miss")
+    if path.suffix in {".nii.gz", ".gz"}:
+        index = gzip_index_cache.lookup(path, suffix=GZIP_INDEX_SUFFIX)
+        if index is not None:
+            try:
+                return open_nifti_gz(path, index)
+            except Exception as e:
+                logger.warning("Ignoring gzip index of %s: %s", path, e)
+        volume = load_nifti(path)
+    else:
+        volume = load_dicom_series(path)
+    disk_cache.store(path, volume)
+    return volume
+
+
+def open_volume(path: Path) -> Union[np.ndarray, LazyVolume]:  # pragma: no cover - heavy I/O
+    """Open a volume for reading a few slices, bypassing :data:`volume_cache`.
+
+    Volumes in the cache are returned from it. Others are opened so that
+    only the slices indexed are read: memory-mapped when uncompressed or in
+    :data:`disk_cache`, through the seek index of a gzipped NIfTI file or
+    else from a single gzip stream, which is cheap only while slices are read
+    in ascending order, and one file per slice of a DICOM series. Nothing is
+    added to the cache, so the volumes under review are not evicted.
+    """
+    if path in volume_cache:
+        return load_volume(path)
+    if path.suffix in {".nii", ".npy"}:
+        return _read_volume(path)
+    entry = disk_cache.lookup(path)
+    if entry is not None:
+        return open_npy(entry)
+    if path.suffix in {".nii.gz", ".gz"}:
+        index = gzip_index_cache.lookup(path, suffix=GZIP_INDEX_SUFFIX)
+        if index is not None:
+            return open_nifti_gz(path, index)
+        import nibabel as nib
+
+        img = nib.load(str(path))
+        if len(img.shape) not in (3, 4):
+            return load_nifti(path)
+        # One stream for all reads, so slices read in ascending order inflate
+        # the file once instead of from its start for every slice
+        return _lazy_nifti(_gzip_proxy(gzip.open(path), img.dataobj), img.shape, planar=False)
+    index = index_dicom_series(path)
+    return LazyVolume(
+        _DicomSlices(index), (len(index), index.rows, index.columns), index.dtype, planar=False
+    )
+
+
+class _DicomSlices:
+    """Decode the slices of a DICOM series that are indexed, one file at a time."""
+
+    def __init__(self, index: DicomSeriesIndex) -> None:
+        self.index = index
+
+    def __getitem__(self, key: Tuple) -> np.ndarray:  # pragma: no cover - heavy I/O
+        index = self.index
+        picked = range(len(index))[key[0]]
+        single = isinstance(picked, int)
+        slices = [picked] if single else list(picked)
+        out = np.empty((len(slices), index.rows, index.columns), dtype=index.dtype)
+        invert = index.max_value if index.photometric == "MONOCHROME1" else None
+        # Multi-frame files are read once for all their requested frames
+        slots: Dict[Path, List[Tuple[int, int]]] = {}
+        for i, k in enumerate(slices):
+            slots.setdefault(index.files[k], []).append((i, k))
+        for file, items in slots.items():
+            _decode_dicom_file(
+                file,
+                [index.frames[k] for _, k in items],
+                [out[i] for i, _ in items],
+                [index.slopes[k] for _, k in items],
+                [index.intercepts[k] for _, k in items],
+                invert,
+            )
+        return out[(0 if single else slice(None),) + tuple(key[1:])]
 
 
+@profiling.timed("normalize_volume")
 def normalize_volume(volume: np.ndarray) -> Tuple[np.ndarray, float, float]:
     """Normalize a volume to 0-1 range. Returns volume, min, max."""
     vmin = float(volume.min())
@@ -112,4 +802,135 @@ def normalize_volume(volume: np.ndarray) -> Tuple[np.ndarray, float, float]:
         norm = np.zeros_like(volume, dtype=np.float32)
     else:
         norm = (volume - vmin) / (vmax - vmin)
-    return norm.astype(np.float32), vmin, vmax
\ No newline at end of file
+    return norm.astype(np.float32), vmin, vmax
+
+
+def volume_spacing(path: Path) -> Tuple[float, float, float]:  # pragma: no cover - heavy I/O
+    """Return the voxel size of the volume at ``path`` along its ``(z, x, y)`` axes.
+
+    The spacing comes from the NIfTI header zooms or the DICOM pixel spacing
+    and slice positions; ``.npy`` volumes and unset values count as 1.
+    """
+    if path.suffix == ".npy":
+        return (1.0, 1.0, 1.0)
+    if _is_dicom(path):
+        return index_dicom_series(path).spacing
+    import nibabel as nib
+
+    zooms = [float(z) for z in nib.load(str(path)).header.get_zooms()[:3]]
+    zooms += [1.0] * (3 - len(zooms))
+    sx, sy, sz = (z if z > 0 else 1.0 for z in zooms)
+    return (sz, sx, sy)
+
+
+def volume_range(path: Path) -> Tuple[float, float]:  # pragma: no cover - heavy I/O
+    """Return the intensity range of the volume at ``path``.
+
+    The range is computed once and cached with the volume so individual slices
+    can be normalized with :func:`normalize_slice` without a full-volume pass.
+    Lazily read volumes are read slice by slice, so only one slice is resident
+    at a time; every slice counts, since a sparse label map may have its
+    labels on a few of them. Ranges of volumes held in the disk cache are
+    persisted next to them.
+    """
+    volume = load_volume(path)
+    meta = volume_cache.meta(path)
+    if "range" not in meta:
+        stored = disk_cache.read_meta(path).get("range")
+        if stored is not None:
+            meta["range"] = tuple(stored)
+        else:
+            meta["range"] = _value_range(volume)
+            disk_cache.write_meta(path, range=meta["range"])
+    return meta["range"]
+
+
+def _value_range(volume) -> Tuple[float, float]:
+    if not isinstance(volume, LazyVolume):
+        return (float(volume.min()), float(volume.max()))
+    lo, hi = np.inf, -np.inf
+    for k in range(volume.shape[0]):
+        slice_ = volume[k]
+        lo, hi = min(lo, float(slice_.min())), max(hi, float(slice_.max()))
+    return (lo, hi)
+
+
+def _is_dicom(path: Path) -> bool:
+    return path.suffix not in {".nii", ".npy", ".gz"}
+
+
+@profiling.timed("volume_window")
+def volume_window(
+    path: Path,
+    percentiles: Optional[Tuple[float, float]] = None,
+    dicom_preset: Optional[bool] = None,
+    sample: Optional[np.ndarray] = None,
+) -> Window:  # pragma: no cover - heavy I/O
+    """Return the default display window of the volume at ``path``.
+
+    DICOM series use their ``WindowCenter``/``WindowWidth`` preset when
+    ``dicom_preset`` is set and the headers carry one. Otherwise the window
+    spans the given percentiles of a strided voxel subsample, so outliers do
+    not wash out the image and large volumes are not read in full. Windows
+    are cached like :func:`volume_range`. Unset arguments take the defaults
+    from :func:`set_window_defaults`. A window that has to be computed is
+    taken from ``sample``, the :func:`~seg_qc_tool.window.subsample` of the
+    volume, if given, and otherwise from the volume loaded through the cache.
+    """
+    percentiles = WINDOW_PERCENTILES if percentiles is None else percentiles
+    volume = load_volume(path) if sample is None else None
+    window = cached_window(path, percentiles, dicom_preset)
+    if window is None:
+        if sample is None:
+            sample = subsample(volume)
+        window = percentile_window(sample, *percentiles)
+        volume_cache.meta(path)[("window", tuple(percentiles))] = window
+        disk_cache.write_meta(path, **{_window_name(percentiles): window})
+    return window
+
+
+def cached_window(
+    path: Path,
+    percentiles: Optional[Tuple[float, float]] = None,
+    dicom_preset: Optional[bool] = None,
+) -> Optional[Window]:  # pragma: no cover - heavy I/O
+    """Return the default display window of ``path`` if it needs no voxels read.
+
+    That is a DICOM preset, or a window that :func:`volume_window` computed
+    before and cached with the volume in :data:`volume_cache` or
+    :data:`disk_cache`; otherwise ``None``.
+    """
+    percentiles = WINDOW_PERCENTILES if percentiles is None else percentiles
+    dicom_preset = DICOM_WINDOW if dicom_preset is None else dicom_preset
+    if dicom_preset and _is_dicom(path):
+        index = index_dicom_series(path)
+        if index.window is not None:
+            vmin, vmax = preset_window(*index.window)
+            if index.photometric == "MONOCHROME1":
+                # The preset refers to values before inversion
+                vmin, vmax = index.max_value - vmax, index.max_value - vmin
+            return (vmin, vmax)
+    meta = volume_cache.meta(path)
+    key = ("window", tuple(percentiles))
+    if key not in meta:
+        stored = disk_cache.read_meta(path).get(_window_name(percentiles))
+        if stored is None:
+            return None
+        meta[key] = tuple(stored)
+    return meta[key]
+
+
+def _window_name(percentiles: Tuple[float, float]) -> str:
+    return "window_{:g}_{:g}".format(*percentiles)
+
+
+def normalize_slice(slice_: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Normalize a single slice to 0-1 using a precomputed volume range."""
+    if vmax - vmin == 0:
+        return np.zeros(slice_.shape, dtype=np.float32)
+    norm = slice_.astype(np.float32)
+    norm -= vmin
+    norm *= 1.0 / (vmax - vmin)
+    # An estimated range may not cover every slice
+    np.clip(norm, 0.0, 1.0, out=norm)
+    return norm
\ No newline at end of file
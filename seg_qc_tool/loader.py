@@ -0,0 +1,201 @@
+"""Background loading of volume pairs."""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import Executor, Future
+from typing import List, Optional
+
+from PySide6 import QtCore
+
+from .core import load_pair_data
+from .io_utils import load_full_volume
+from .models import Pair
+from .mosaic import pair_mosaic
+from .stats import slice_stats
+from .volume import LazyVolume
+
+logger = logging.getLogger(__name__)
+
+
+class PairLoader(QtCore.QObject):
+    """Load pairs on an executor without blocking the Qt main thread.
+
+    Each :meth:`request` supersedes the previous one: queued work that has not
+    started yet is cancelled and results of stale requests are dropped. While
+    the requested pair is shown, its neighbours are prefetched into the volume
+    cache so that stepping to them is served from memory. Pairs are announced
+    through :attr:`loaded` as soon as their volumes are open; slice statistics
+    that were not cached yet follow through :attr:`stats_ready`. Streamed
+    volumes of the shown pair are decoded in full through :meth:`decode`.
+    """
+
+    loading = QtCore.Signal(Pair)
+    loaded = QtCore.Signal(object)
+    failed = QtCore.Signal(Pair, str)
+    stats_ready = QtCore.Signal(Pair, object)
+    decoded = QtCore.Signal(Pair, object, object)
+    _done = QtCore.Signal(int, object, object)
+    _stats_done = QtCore.Signal(int, object, object)
+    _decode_done = QtCore.Signal(int, object, object)
+
+    def __init__(self, executor: Executor, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.executor = executor
+        self._generation = 0
+        self._futures: List[Future] = []
+        # Emitted from worker threads, delivered on the thread owning the loader
+        self._done.connect(self._on_done)
+        self._stats_done.connect(self._on_stats_done)
+        self._decode_done.connect(self._on_decode_done)
+
+    def request(self, pair: Pair, neighbours: List[Pair]) -> None:
+        """Load ``pair`` and prefetch ``neighbours`` in order."""
+        self.cancel()
+        generation = self._generation
+        self.loading.emit(pair)
+        future = self.executor.submit(load_pair_data, pair)
+        future.add_done_callback(lambda f: self._report(generation, pair, f))
+        self._futures.append(future)
+        for other in neighbours:
+            self._futures.append(self.executor.submit(self._prefetch, other))
+
+    def decode(self, pair: Pair, volume, seg) -> bool:
+        """Decode the streamed volumes of the loaded ``pair`` in full.
+
+        Coronal and sagittal slices of a gzip stream or a DICOM series read
+        every axial slice, so such volumes are decoded once before these
+        planes are shown. Returns ``False`` if neither volume is streamed.
+        Otherwise :attr:`loading` is emitted and the volumes follow through
+        :attr:`decoded`, or :attr:`failed`, unless another pair is requested
+        first.
+        """
+        if not (_streamed(volume) or _streamed(seg)):
+            return False
+        generation = self._generation
+        self.loading.emit(pair)
+        future = self.executor.submit(self._decode, pair, volume, seg)
+        future.add_done_callback(
+            lambda f: None if f.cancelled() else self._decode_done.emit(generation, pair, f)
+        )
+        self._futures.append(future)
+        return True
+
+    def cancel(self) -> None:
+        """Drop pending work and ignore results of requests in flight."""
+        self._generation += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+
+    # Internal -------------------------------------------------
+    @staticmethod
+    def _decode(pair: Pair, volume, seg) -> tuple:
+        if _streamed(volume):
+            volume = load_full_volume(pair.original)
+        if _streamed(seg):
+            seg = load_full_volume(pair.segmentation)
+        return volume, seg
+
+    @staticmethod
+    def _prefetch(pair: Pair) -> None:  # pragma: no cover - heavy I/O
+        try:
+            load_pair_data(pair)
+            slice_stats(pair.segmentation)
+        except Exception as e:
+            logger.debug("Prefetch of %s failed: %s", pair.original, e)
+
+    def _report(self, generation: int, pair: Pair, future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        self._done.emit(generation, pair if error else future.result(), error)
+
+    def _on_done(self, generation: int, result: object, error: object) -> None:
+        if generation != self._generation:
+            return
+        if error is not None:
+            logger.warning("Failed to load %s: %s", result.original, error)
+            self.failed.emit(result, str(error))
+            return
+        self.loaded.emit(result)
+        if result.stats is None:
+            pair = result.pair
+            future = self.executor.submit(slice_stats, pair.segmentation)
+            future.add_done_callback(
+                lambda f: None if f.cancelled() else self._stats_done.emit(generation, pair, f)
+            )
+            self._futures.append(future)
+
+    def _on_stats_done(self, generation: int, pair: Pair, future: Future) -> None:
+        if generation != self._generation:
+            return
+        error = future.exception()
+        if error is not None:
+            logger.warning("Failed to count labels of %s: %s", pair.segmentation, error)
+        else:
+            self.stats_ready.emit(pair, future.result())
+
+    def _on_decode_done(self, generation: int, pair: Pair, future: Future) -> None:
+        if generation != self._generation:
+            return
+        error = future.exception()
+        if error is not None:
+            logger.warning("Failed to decode %s: %s", pair.original, error)
+            self.failed.emit(pair, str(error))
+        else:
+            self.decoded.emit(pair, *future.result())
+
+
+def _streamed(volume) -> bool:
+    """Return whether ``volume`` is read slice by slice from a stream."""
+    return isinstance(volume, LazyVolume) and not volume.planar
+
+
+class MosaicLoader(QtCore.QObject):
+    """Build overview mosaics of pairs on an executor.
+
+    :meth:`request` supersedes earlier requests like :meth:`PairLoader.request`.
+    Every requested mosaic is announced through :attr:`ready` as it completes,
+    so mosaics of upcoming pairs are on disk before the reviewer reaches them.
+    """
+
+    ready = QtCore.Signal(Pair, object)
+    _done = QtCore.Signal(int, object, object)
+
+    def __init__(self, executor: Executor, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.executor = executor
+        self._generation = 0
+        self._futures: List[Future] = []
+        self._done.connect(self._on_done)
+
+    def request(self, pairs: List[Pair]) -> None:
+        """Build the mosaics of ``pairs`` in order."""
+        self.cancel()
+        generation = self._generation
+        for pair in pairs:
+            future = self.executor.submit(pair_mosaic, pair)
+            future.add_done_callback(lambda f, p=pair: self._report(generation, p, f))
+            self._futures.append(future)
+
+    def cancel(self) -> None:
+        """Drop pending work and ignore results of requests in flight."""
+        self._generation += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+
+    def _report(self, generation: int, pair: Pair, future: Future) -> None:
+        if future.cancelled():
+            return
+        error = future.exception()
+        self._done.emit(generation, pair, error or future.result())
+
+    def _on_done(self, generation: int, pair: Pair, result: object) -> None:
+        if generation != self._generation:
+            return
+        if isinstance(result, BaseException):
+            logger.debug("Mosaic of %s failed: %s", pair.segmentation, result)
+        else:
+            self.ready.emit(pair, result)
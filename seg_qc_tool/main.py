@@ -22,7 +22,10 @@ def main() -> None:
     window = MainWindow(controller)
     window.show()
     controller.load_pairs()
-    sys.exit(app.exec())
+    status = app.exec()
+    # Save slider settings and write out discards still in flight
+    controller.close()
+    sys.exit(status)
 
 
 if __name__ == "__main__":
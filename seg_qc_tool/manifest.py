@@ -0,0 +1,128 @@
+"""Persisted scan results used to re-pair folders incrementally."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .models import Pair
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = Path.home() / ".seg_qc_tool" / "manifest.json"
+_VERSION = 2
+
+Listing = Tuple[bool, List[Tuple[bool, Path]]]
+
+
+class ScanManifest:
+    """Directory listings and pairs from the last scan, keyed by directory mtime.
+
+    A directory's mtime changes whenever entries are added, removed or renamed
+    in it, so a listing recorded with the same mtime can be reused without
+    reading the directory again. Only the directories visited by the latest
+    scan are kept. The pairs of the latest pair of roots are stored together
+    with the scanned items and reused while the items are unchanged.
+    ``path`` defaults to :data:`MANIFEST_PATH` as set when the manifest is
+    created.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = MANIFEST_PATH if path is None else path
+        self._listings: Dict[str, Tuple[int, Listing]] = {}
+        self._visited: Dict[str, Tuple[int, Listing]] = {}
+        self._roots: Optional[List[str]] = None
+        self._items: Optional[List[List[str]]] = None
+        self._pairs: List[Tuple[str, str]] = []
+        self._max_dist: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "ScanManifest":
+        manifest = cls(path)
+        path = manifest.path
+        if not path.exists():
+            return manifest
+        try:
+            data = json.loads(path.read_text())
+            if data.get("version") != _VERSION:
+                return manifest
+            for name, (mtime, is_series, entries) in data["listings"].items():
+                listing = (is_series, [(is_dir, Path(p)) for is_dir, p in entries])
+                manifest._listings[name] = (mtime, listing)
+            manifest._roots = data.get("roots")
+            manifest._items = data.get("items")
+            manifest._pairs = [tuple(p) for p in data.get("pairs", [])]
+            manifest._max_dist = data.get("max_dist")
+        except Exception as e:  # pragma: no cover
+            logger.warning("Failed to load scan manifest: %s", e)
+            return cls(path)
+        return manifest
+
+    def save(self) -> None:
+        listings = {
+            name: (mtime, listing[0], [(is_dir, str(p)) for is_dir, p in listing[1]])
+            for name, (mtime, listing) in self._listings.items()
+        }
+        data = {
+            "version": _VERSION,
+            "listings": listings,
+            "roots": self._roots,
+            "items": self._items,
+            "pairs": self._pairs,
+            "max_dist": self._max_dist,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data))
+            tmp.replace(self.path)
+        except OSError as e:  # pragma: no cover
+            logger.warning("Failed to save scan manifest: %s", e)
+
+    # Scanning -------------------------------------------------
+    def begin_scan(self) -> None:
+        with self._lock:
+            self._visited = {}
+
+    def listing(self, directory: Path, mtime: int) -> Optional[Listing]:
+        """Return the recorded listing of ``directory`` if it is unchanged."""
+        name = str(directory)
+        with self._lock:
+            cached = self._listings.get(name)
+            if cached is None or cached[0] != mtime:
+                return None
+            self._visited[name] = cached
+            return cached[1]
+
+    def record(self, directory: Path, mtime: int, listing: Listing) -> None:
+        with self._lock:
+            self._visited[str(directory)] = (mtime, listing)
+
+    def end_scan(self) -> None:
+        """Keep only the listings visited since :meth:`begin_scan`."""
+        with self._lock:
+            self._listings = self._visited
+            self._visited = {}
+
+    # Pairs ----------------------------------------------------
+    def pairs(
+        self, roots: Sequence[Path], items: Sequence[List[Path]], max_dist: int
+    ) -> Optional[List[Pair]]:
+        """Return the stored pairs if they were made from the same items."""
+        if self._roots != [str(r) for r in roots] or self._max_dist != max_dist:
+            return None
+        if self._items != [[str(p) for p in group] for group in items]:
+            return None
+        return [Pair(Path(o), Path(s)) for o, s in self._pairs]
+
+    def set_pairs(
+        self, roots: Sequence[Path], items: Sequence[List[Path]], max_dist: int, pairs: List[Pair]
+    ) -> None:
+        self._roots = [str(r) for r in roots]
+        self._max_dist = max_dist
+        self._items = [[str(p) for p in group] for group in items]
+        self._pairs = [(str(p.original), str(p.segmentation)) for p in pairs]
@@ -2,17 +2,25 @@
 
 from __future__ import annotations
 
+import os
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Iterable, List
+from typing import Deque, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
 
+from . import profiling
+from .io_utils import dicom_candidate, is_dicom_file
+from .manifest import ScanManifest
 from .models import Pair
 
 try:
     import Levenshtein  # type: ignore
+    _EXACT_DISTANCE = True
     def distance(a: str, b: str) -> int:
         return Levenshtein.distance(a, b)
 except Exception:  # pragma: no cover - optional
+    _EXACT_DISTANCE = False
     def distance(a: str, b: str) -> int:
         matcher = SequenceMatcher(a=a, b=b)
         return int((1 - matcher.ratio()) * max(len(a), len(b)))
@@ -28,52 +36,263 @@ def _strip_suffix(name: str) -> str:
     return name
 
 
+_VOLUME_SUFFIXES = (".nii", ".nii.gz", ".npy")
+
+# Directory listings are I/O bound, so threads overlap network round trips.
+SCAN_WORKERS = 16
+
+
+def _scan_dir(directory: Path) -> Tuple[bool, List[Tuple[bool, Path]]]:
+    """List ``directory`` once.
+
+    Returns ``(True, [])`` as soon as a ``.dcm`` file is seen, since the folder
+    is then a single DICOM series. Exports without suffixes (``IM0``, ``IM1``,
+    ...) are recognised by the ``DICM`` prefix of the first other file that
+    may be a slice, so at most one file is opened per directory. Otherwise returns ``False`` and the
+    sub-directories and volume files as ``(is_dir, path)`` in listing order.
+    ``DirEntry`` caches the file type from the listing, so no extra ``stat``
+    calls are made except for symlinks.
+    """
+    entries: List[Tuple[bool, Path]] = []
+    unknown: Optional[Path] = None
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = entry.name.lower()
+            if name.endswith(".dcm") and entry.is_file():
+                return True, []
+            if entry.is_dir():
+                entries.append((True, Path(entry.path)))
+            elif name.endswith(_VOLUME_SUFFIXES):
+                entries.append((False, Path(entry.path)))
+            elif unknown is None and dicom_candidate(name) and entry.is_file():
+                unknown = Path(entry.path)
+    if unknown is not None and is_dicom_file(unknown):
+        return True, []
+    return False, entries
+
+
+def _scan_dir_cached(
+    directory: Path, manifest: Optional[ScanManifest]
+) -> Tuple[bool, List[Tuple[bool, Path]]]:
+    """List ``directory`` unless ``manifest`` holds a listing with its current mtime."""
+    if manifest is None:
+        return _scan_dir(directory)
+    # stat before listing so a concurrent change is picked up by the next scan
+    mtime = os.stat(directory).st_mtime_ns
+    listing = manifest.listing(directory, mtime)
+    if listing is None:
+        listing = _scan_dir(directory)
+        manifest.record(directory, mtime, listing)
+    return listing
+
+
+def _scan_trees(
+    roots: Sequence[Path],
+    workers: int = SCAN_WORKERS,
+    manifest: Optional[ScanManifest] = None,
+) -> List[List[Path]]:
+    """Return the volume items of each root, scanning all trees concurrently.
+
+    Every directory is listed on a shared thread pool as soon as its parent
+    has been listed, and the results are assembled in the same depth-first
+    order a sequential walk would produce. With a ``manifest``, directories
+    whose mtime is unchanged are only stat'ed, not listed again.
+    """
+    listings: Dict[Path, Tuple[bool, List[Tuple[bool, Path]]]] = {}
+    if manifest is not None:
+        manifest.begin_scan()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        seen = set(roots)
+        pending = {pool.submit(_scan_dir_cached, root, manifest): root for root in seen}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory = pending.pop(future)
+                _, entries = listings[directory] = future.result()
+                for is_dir, child in entries:
+                    if is_dir and child not in seen:
+                        seen.add(child)
+                        pending[pool.submit(_scan_dir_cached, child, manifest)] = child
+    if manifest is not None:
+        manifest.end_scan()
+
+    def collect(directory: Path, items: List[Path]) -> None:
+        is_series, entries = listings[directory]
+        if is_series:
+            items.append(directory)
+            return
+        for is_dir, child in entries:
+            if is_dir:
+                collect(child, items)
+            else:
+                items.append(child)
+
+    result = []
+    for root in roots:
+        items: List[Path] = []
+        collect(root, items)
+        result.append(items)
+    return result
+
+
 def _volume_items(directory: Path) -> List[Path]:
     """Return all volume paths inside ``directory`` recursively.
 
-    A folder containing ``.dcm`` files is treated as a single volume and its
-    sub-directories are not searched further. Supported file formats for single
-    volumes include NIfTI and ``.npy`` files.
+    A folder containing DICOM files, with or without a ``.dcm`` suffix, is
+    treated as a single volume and its sub-directories are not searched
+    further. Supported file formats for single volumes include NIfTI and
+    ``.npy`` files.
+    """
+    return _scan_trees([directory])[0]
+
+
+def _base_name(path: Path) -> str:
+    """Return the name used for pairing: the stem without a mask suffix."""
+    name = path.name
+    name = name[:-7] if name.lower().endswith(".nii.gz") else path.stem
+    return _strip_suffix(name)
+
+
+def _relative_parent(path: Path, root: Optional[Path]) -> str:
+    if root is None:
+        return ""
+    try:
+        return path.parent.relative_to(root).as_posix()
+    except ValueError:
+        return ""
+
+
+def _bigrams(name: str) -> Set[str]:
+    return {name[i : i + 2] for i in range(len(name) - 1)}
+
+
+class _FuzzyIndex:
+    """Candidate index pruning segmentations that cannot be within ``max_dist``.
+
+    Segmentations are bucketed by name length, since the edit distance is at
+    least the length difference. When the exact Levenshtein distance is
+    available, a bigram filter is applied as well: ``k`` edits remove at most
+    ``2 * k`` of the distinct bigrams of a name, so a candidate must share the
+    remaining ones.
+    """
+
+    def __init__(self, names: Dict[int, str], max_dist: int) -> None:
+        self.max_dist = max_dist
+        # The difflib fallback only guarantees distance >= length difference / 2
+        self.window = max_dist if _EXACT_DISTANCE else 2 * max_dist + 1
+        self.by_length: Dict[int, List[int]] = defaultdict(list)
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        for idx, name in names.items():
+            self.by_length[len(name)].append(idx)
+            for gram in _bigrams(name):
+                self.postings[gram].add(idx)
+
+    def candidates(self, name: str) -> List[int]:
+        """Return candidate indices in their original order."""
+        length = len(name)
+        found: List[int] = []
+        for other in range(max(0, length - self.window), length + self.window + 1):
+            found.extend(self.by_length.get(other, ()))
+        grams = _bigrams(name)
+        threshold = len(grams) - 2 * self.max_dist
+        if _EXACT_DISTANCE and threshold > 0:
+            shared: Dict[int, int] = defaultdict(int)
+            for gram in grams:
+                for idx in self.postings.get(gram, ()):
+                    shared[idx] += 1
+            found = [idx for idx in found if shared.get(idx, 0) >= threshold]
+        return sorted(found)
+
+
+def match_items(
+    originals: List[Path],
+    segs: List[Path],
+    original_dir: Optional[Path] = None,
+    seg_dir: Optional[Path] = None,
+    max_dist: int = 2,
+) -> List[Pair]:
+    """Pair volume paths by base name.
+
+    Originals are matched in three passes, each considering only what the
+    previous passes left over: the same base name in the same relative folder,
+    the same base name anywhere, and finally the closest base name within
+    ``max_dist`` edits. The first two passes are hash lookups; the fuzzy pass
+    only compares names a :class:`_FuzzyIndex` cannot rule out. Ties go to the
+    segmentation listed first. Pairs are returned in the order of
+    ``originals``.
     """
+    if len(originals) == 1 and len(segs) == 1:
+        return [Pair(originals[0], segs[0])]
+
+    orig_names = [_base_name(p) for p in originals]
+    seg_names = [_base_name(p) for p in segs]
+    orig_keys = [(_relative_parent(p, original_dir), n) for p, n in zip(originals, orig_names)]
+    seg_keys = [(_relative_parent(p, seg_dir), n) for p, n in zip(segs, seg_names)]
+
+    used: Set[int] = set()
+    matches: Dict[int, int] = {}
 
-    # If this directory itself holds DICOM slices, treat it as one volume
-    entries = list(directory.iterdir())
-    if any(e.is_file() and e.suffix.lower() == ".dcm" for e in entries):
-        return [directory]
-
-    items: List[Path] = []
-    for child in entries:
-        if child.is_dir():
-            items.extend(_volume_items(child))
-        elif child.suffix.lower() in {".nii", ".nii.gz", ".npy"}:
-            items.append(child)
-    return items
-
-
-def pair_finder(original_dir: Path, seg_dir: Path, max_dist: int = 2) -> List[Pair]:
-    """Pair files in two directories using fuzzy matching."""
-    originals = _volume_items(original_dir)
-    segs = _volume_items(seg_dir)
-    pairs = []
-    used_segs = set()
-    force_pair = len(originals) == 1 and len(segs) == 1
-    for orig in originals:
-        if force_pair:
-            pairs.append(Pair(orig, segs[0]))
-            used_segs.add(segs[0])
-            continue
-        base_orig = _strip_suffix(orig.stem)
-        best = None
-        best_dist = max_dist + 1
-        for seg in segs:
-            if seg in used_segs:
+    def exact_pass(orig_keys: List[Hashable], seg_keys: List[Hashable]) -> None:
+        lookup: Dict[Hashable, Deque[int]] = defaultdict(deque)
+        for idx, key in enumerate(seg_keys):
+            if idx not in used:
+                lookup[key].append(idx)
+        for idx, key in enumerate(orig_keys):
+            if idx in matches:
                 continue
-            base_seg = _strip_suffix(seg.stem)
-            dist = distance(base_orig, base_seg)
-            if dist < best_dist:
-                best = seg
-                best_dist = dist
-        if best is not None and best_dist <= max_dist:
-            pairs.append(Pair(orig, best))
-            used_segs.add(best)
-    return pairs
\ No newline at end of file
+            candidates = lookup.get(key)
+            while candidates:
+                seg_idx = candidates.popleft()
+                if seg_idx not in used:
+                    matches[idx] = seg_idx
+                    used.add(seg_idx)
+                    break
+
+    exact_pass(orig_keys, seg_keys)
+    exact_pass(orig_names, seg_names)
+
+    leftovers = [idx for idx in range(len(originals)) if idx not in matches]
+    if leftovers and len(used) < len(segs):
+        index = _FuzzyIndex(
+            {idx: name for idx, name in enumerate(seg_names) if idx not in used}, max_dist
+        )
+        for idx in leftovers:
+            best = None
+            best_dist = max_dist + 1
+            for seg_idx in index.candidates(orig_names[idx]):
+                if seg_idx in used:
+                    continue
+                dist = distance(orig_names[idx], seg_names[seg_idx])
+                if dist < best_dist:
+                    best = seg_idx
+                    best_dist = dist
+            if best is not None and best_dist <= max_dist:
+                matches[idx] = best
+                used.add(best)
+
+    return [Pair(originals[idx], segs[matches[idx]]) for idx in sorted(matches)]
+
+
+@profiling.timed("pair_finder")
+def pair_finder(
+    original_dir: Path,
+    seg_dir: Path,
+    max_dist: int = 2,
+    manifest: Optional[ScanManifest] = None,
+) -> List[Pair]:
+    """Pair files in two directories using exact and fuzzy name matching.
+
+    With a ``manifest``, unchanged directories are not listed again and the
+    stored pairs are reused when the scanned items did not change. The
+    manifest is updated but not saved.
+    """
+    roots = [original_dir, seg_dir]
+    originals, segs = _scan_trees(roots, manifest=manifest)
+    if manifest is not None:
+        pairs = manifest.pairs(roots, [originals, segs], max_dist)
+        if pairs is not None:
+            return pairs
+    pairs = match_items(originals, segs, original_dir, seg_dir, max_dist)
+    if manifest is not None:
+        manifest.set_pairs(roots, [originals, segs], max_dist, pairs)
+    return pairs
@@ -17,3 +17,15 @@ class Settings:
     window_size: Optional[tuple[int, int]] = None
     brightness: float = 0.5
     contrast: float = 0.5
+    window_percentiles: tuple[float, float] = (0.5, 99.5)
+    dicom_window: bool = True
+    cache_budget_mb: int = 4096
+    prefetch: int = 1
+    dicom_workers: int = 0
+    dicom_backend: str = "auto"
+    disk_cache: bool = False
+    disk_cache_mb: int = 20480
+    gzip_index: bool = True
+    mosaic_cache: bool = True
+    overlay_alpha: float = 0.4
+    profile: bool = False
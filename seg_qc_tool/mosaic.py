@@ -0,0 +1,207 @@
+"""Downsampled overview mosaics of volume pairs."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import CACHE_DIR, DiskCache, cache_key
+from .io_utils import cached_window, open_volume, volume_window
+from .models import Pair
+from .volume import LazyVolume
+from .window import sample_step, subsample
+
+logger = logging.getLogger(__name__)
+
+MOSAIC_TILES = 8
+MOSAIC_TILE_SIZE = 96
+
+# Mosaics are small and kept in their own directory; the review session
+# enables the cache from the ``mosaic_cache`` setting
+mosaic_cache = DiskCache(CACHE_DIR / "mosaics", 512 * 1024**2)
+
+
+@dataclass
+class Mosaic:
+    """A row of downsampled slices with the mask outline of each tile.
+
+    ``gray`` and ``outline`` hold the tiles side by side; tile ``i`` shows
+    slice ``slices[i]`` and is ``tile_width`` pixels wide.
+    """
+    slices: List[int]
+    gray: np.ndarray
+    outline: np.ndarray
+
+    @property
+    def tile_width(self) -> int:
+        return self.gray.shape[1] // max(len(self.slices), 1)
+
+    def slice_at(self, x: int) -> int:
+        """Return the slice shown at column ``x`` of the mosaic."""
+        tile = min(max(x // max(self.tile_width, 1), 0), len(self.slices) - 1)
+        return self.slices[tile]
+
+    def rgba(self, color: Tuple[int, int, int] = (255, 0, 0)) -> np.ndarray:
+        """Compose the tiles into an ``(h, w, 4)`` image with a coloured outline."""
+        out = np.empty(self.gray.shape + (4,), dtype=np.uint8)
+        out[..., :3] = self.gray[..., None]
+        out[..., 3] = 255
+        out[self.outline, :3] = color
+        return out
+
+
+def mosaic_slices(depth: int, count: int) -> List[int]:
+    """Return up to ``count`` evenly spaced slice indices of ``depth`` slices."""
+    if depth <= 0:
+        return []
+    # Centre the samples in equal bins so the first and last slices, usually
+    # empty, are not wasted on the overview.
+    positions = (np.arange(min(count, depth)) + 0.5) * depth / min(count, depth)
+    return sorted({int(p) for p in positions})
+
+
+def _blocks(slice_: np.ndarray, factor: int) -> np.ndarray:
+    """View ``slice_`` as ``(h, factor, w, factor)`` blocks, dropping the remainder."""
+    h, w = slice_.shape[0] // factor, slice_.shape[1] // factor
+    return slice_[: h * factor, : w * factor].reshape(h, factor, w, factor)
+
+
+def downsample(slice_: np.ndarray, factor: int) -> np.ndarray:
+    """Average ``factor`` x ``factor`` blocks of ``slice_`` into float32."""
+    if factor <= 1:
+        return slice_.astype(np.float32)
+    return _blocks(slice_, factor).mean(axis=(1, 3), dtype=np.float32)
+
+
+def downsample_mask(mask: np.ndarray, factor: int) -> np.ndarray:
+    """Mark blocks of ``mask`` containing any labelled pixel."""
+    if factor <= 1:
+        return mask.astype(bool)
+    return _blocks(mask, factor).any(axis=(1, 3))
+
+
+def outline(mask: np.ndarray) -> np.ndarray:
+    """Return the pixels of ``mask`` with an unlabelled 4-neighbour."""
+    inner = mask.copy()
+    inner[1:] &= mask[:-1]
+    inner[:-1] &= mask[1:]
+    inner[:, 1:] &= mask[:, :-1]
+    inner[:, :-1] &= mask[:, 1:]
+    return mask & ~inner
+
+
+def build_mosaic(
+    volume,
+    seg,
+    window: Tuple[float, float],
+    count: int = MOSAIC_TILES,
+    tile: int = MOSAIC_TILE_SIZE,
+) -> Mosaic:
+    """Downsample ``count`` evenly spaced slices of ``volume`` into a mosaic.
+
+    Only the sampled slices are read, so lazily loaded volumes stay on disk.
+    Each slice is reduced by block averaging until its longer side fits
+    ``tile`` pixels and mapped to 0-255 over ``window``. Slices whose mask has
+    a different shape are shown without an outline.
+    """
+    if volume.ndim == 2:
+        volume = np.asarray(volume)[None]
+    if seg.ndim == 2:
+        seg = np.asarray(seg)[None]
+    slices = mosaic_slices(volume.shape[0], count)
+    height, width = volume.shape[1:3]
+    factor = max(1, -(-max(height, width) // tile))
+    vmin, vmax = window
+    scale = 255.0 / (vmax - vmin) if vmax != vmin else 0.0
+    grays, outlines = [], []
+    for index in slices:
+        gray = downsample(np.asarray(volume[index]), factor)
+        gray -= vmin
+        gray *= scale
+        np.clip(gray, 0.0, 255.0, out=gray)
+        grays.append(gray.astype(np.uint8))
+        edge = np.zeros(gray.shape, dtype=bool)
+        if index < seg.shape[0] and seg.shape[1:3] == (height, width):
+            edge = outline(downsample_mask(np.asarray(seg[index]) != 0, factor))
+        outlines.append(edge)
+    if not slices:
+        empty = np.zeros((0, 0), dtype=np.uint8)
+        return Mosaic([], empty, empty.astype(bool))
+    return Mosaic(slices, np.hstack(grays), np.hstack(outlines))
+
+
+class _Planes:
+    """Slices read ahead, served to a :class:`~seg_qc_tool.volume.LazyVolume` by index."""
+
+    def __init__(self, planes: Dict[int, np.ndarray]) -> None:
+        self.planes = planes
+
+    def __getitem__(self, key: Tuple) -> np.ndarray:
+        return self.planes[key[0]][key[1:]]
+
+
+def read_in_order(
+    volume: LazyVolume, slices: List[int], sample: bool = False
+) -> Tuple[LazyVolume, Optional[np.ndarray]]:
+    """Read ``slices`` of ``volume`` in one ascending pass.
+
+    Returns a volume serving the slices read and, with ``sample``, the voxel
+    subsample of :func:`~seg_qc_tool.window.subsample` gathered in the same
+    pass. Meant for volumes such as gzip streams that are only cheap to read
+    front to back.
+    """
+    step = sample_step(volume.shape) if sample else 0
+    wanted = set(slices)
+    if step:
+        wanted.update(range(0, volume.shape[0], step))
+    planes: Dict[int, np.ndarray] = {}
+    rows = []
+    for index in sorted(wanted):
+        plane = volume[index]
+        if index in slices:
+            planes[index] = plane
+        if step and index % step == 0:
+            rows.append(plane[::step, ::step])
+    read = LazyVolume(_Planes(planes), volume.shape, volume.dtype)
+    if not step:
+        return read, None
+    return read, np.stack(rows) if rows else np.empty(0, dtype=volume.dtype)
+
+
+def pair_mosaic(
+    pair: Pair, count: int = MOSAIC_TILES, tile: int = MOSAIC_TILE_SIZE
+) -> Mosaic:  # pragma: no cover - heavy I/O
+    """Return the mosaic of ``pair``, built once and then read from disk.
+
+    The volumes are opened with :func:`~seg_qc_tool.io_utils.open_volume`,
+    so only the sampled slices are read and the volume cache is left alone.
+    The window of the pair's view is reused when it is known; otherwise it is
+    computed, for volumes read front to back in the same pass as the tiles.
+    The cache entry is keyed by both files, so editing either rebuilds it.
+    """
+    variant = f"mosaic:{cache_key(pair.original)!r}:{count}:{tile}"
+    entry = mosaic_cache.lookup(pair.segmentation, variant)
+    if entry is not None:
+        try:
+            stacked = np.load(entry)
+            slices = mosaic_cache.read_meta(pair.segmentation, variant)["slices"]
+            return Mosaic(slices, stacked[0], stacked[1].astype(bool))
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug("Ignoring cached mosaic of %s: %s", pair.segmentation, e)
+    volume = open_volume(pair.original)
+    window = cached_window(pair.original)
+    sample = None
+    if isinstance(volume, LazyVolume) and not volume.planar:
+        volume, sample = read_in_order(volume, mosaic_slices(len(volume), count), window is None)
+    if window is None:
+        window = volume_window(pair.original, sample=subsample(volume) if sample is None else sample)
+    # The tiles of the segmentation are read in ascending order as well
+    mosaic = build_mosaic(volume, open_volume(pair.segmentation), window, count, tile)
+    mosaic_cache.store(
+        pair.segmentation, np.stack([mosaic.gray, mosaic.outline.view(np.uint8)]), variant
+    )
+    mosaic_cache.write_meta(pair.segmentation, variant, slices=mosaic.slices)
+    return mosaic
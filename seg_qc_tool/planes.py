@@ -0,0 +1,42 @@
+"""Orthogonal slice planes of ``(z, x, y)`` volumes."""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+# Plane names by the volume axis they cut across
+PLANES = ("Axial", "Coronal", "Sagittal")
+
+Spacing = Tuple[float, float, float]
+
+
+def plane(volume, axis: int, index: int) -> np.ndarray:
+    """Return slice ``index`` across ``axis`` of ``volume`` without copying it.
+
+    In-memory volumes yield strided views: axial slices are ``volume[k]``,
+    coronal and sagittal slices take every ``z`` row of one ``x`` or ``y``
+    position and are flipped so that the last slice is at the top. Lazily
+    read volumes read only the requested plane. 2D volumes are returned as
+    they are.
+    """
+    if volume.ndim != 3:
+        return volume
+    index = min(index, volume.shape[axis] - 1)
+    if axis == 0:
+        return volume[index]
+    cut = volume[:, index] if axis == 1 else volume[:, :, index]
+    return cut[::-1]
+
+
+def plane_spacing(spacing: Spacing, axis: int) -> Tuple[float, float]:
+    """Return the ``(row, column)`` pixel size of planes across ``axis``."""
+    dz, dx, dy = spacing
+    return ((dx, dy), (dz, dy), (dz, dx))[axis]
+
+
+def plane_aspect(spacing: Spacing, axis: int) -> float:
+    """Return the height of a pixel relative to its width in planes across ``axis``."""
+    rows, columns = plane_spacing(spacing, axis)
+    return rows / columns if rows > 0 and columns > 0 else 1.0
@@ -0,0 +1,143 @@
+"""Lightweight timing spans and counters for hot paths.
+
+Recording is off unless the ``SEG_QC_PROFILE`` environment variable is set to
+a non-empty value other than ``0``, the ``profile`` setting is enabled, or
+:func:`enable` is called. While off, :func:`span` and :func:`count` only check
+a flag. Recorded spans can be summarised with :func:`summary` or written as a
+Chrome trace (``chrome://tracing``, Perfetto) with :func:`export_chrome_trace`.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, Tuple, TypeVar
+
+ENV_VAR = "SEG_QC_PROFILE"
+# Spans kept for export; the oldest are dropped first
+MAX_EVENTS = 100_000
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_enabled = os.environ.get(ENV_VAR, "") not in ("", "0")
+_lock = threading.Lock()
+# (name, start in µs, duration in µs, thread id, args)
+_events: Deque[Tuple[str, float, float, int, Dict[str, Any]]] = deque(maxlen=MAX_EVENTS)
+_totals: Dict[str, list] = {}
+_counters: Dict[str, int] = {}
+_origin = time.perf_counter()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(flag: bool = True) -> None:
+    """Switch recording on or off; recorded data is kept."""
+    global _enabled
+    _enabled = flag
+
+
+def disable() -> None:
+    """Stop recording; recorded data is kept for export."""
+    enable(False)
+
+
+def reset() -> None:
+    """Drop all recorded spans and counters."""
+    with _lock:
+        _events.clear()
+        _totals.clear()
+        _counters.clear()
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """Record the duration of the enclosed block as ``name``."""
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, start, time.perf_counter(), args)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorate a function so every call is recorded as a span."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, start, time.perf_counter(), {})
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def count(name: str, value: int = 1) -> None:
+    """Add ``value`` to counter ``name``."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def counters() -> Dict[str, int]:
+    with _lock:
+        return dict(_counters)
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Return the calls, total and last duration in milliseconds of every span."""
+    with _lock:
+        return {
+            name: {"calls": calls, "total_ms": total * 1e3, "last_ms": last * 1e3}
+            for name, (calls, total, last) in _totals.items()
+        }
+
+
+def export_chrome_trace(path: Path) -> None:
+    """Write recorded spans and final counter values in Chrome trace format."""
+    pid = os.getpid()
+    with _lock:
+        events = [
+            {"name": name, "ph": "X", "ts": ts, "dur": dur, "pid": pid, "tid": tid, "args": args}
+            for name, ts, dur, tid, args in _events
+        ]
+        end = max((e["ts"] + e["dur"] for e in events), default=0.0)
+        events.extend(
+            {"name": name, "ph": "C", "ts": end, "pid": pid, "args": {name: value}}
+            for name, value in _counters.items()
+        )
+    Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+
+def _record(name: str, start: float, end: float, args: Dict[str, Any]) -> None:
+    duration = end - start
+    event = (
+        name,
+        (start - _origin) * 1e6,
+        duration * 1e6,
+        threading.get_ident(),
+        {k: str(v) for k, v in args.items()},
+    )
+    with _lock:
+        _events.append(event)
+        totals = _totals.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+        totals[2] = duration
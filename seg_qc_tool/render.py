@@ -0,0 +1,125 @@
+"""Conversion of slices to display buffers."""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Integer types small enough to map through a lookup table indexed by value.
+_LUT_TYPES = {
+    np.dtype(np.uint8): np.uint8,
+    np.dtype(np.int8): np.uint8,
+    np.dtype(np.uint16): np.uint16,
+    np.dtype(np.int16): np.uint16,
+}
+
+
+def _reuse(buffer: Optional[np.ndarray], shape: Tuple[int, ...], dtype) -> np.ndarray:
+    if buffer is None or buffer.shape != shape:
+        return np.empty(shape, dtype=dtype)
+    return buffer
+
+
+class SliceRenderer:
+    """Map slices to ``uint8`` gray levels in a reused, contiguous buffer.
+
+    Values between ``vmin`` and ``vmax`` are scaled linearly to 0-255 and
+    clipped outside. 8 and 16 bit integer slices go through a lookup table
+    built once per dtype and range, so a frame costs a single gather. Other
+    types are scaled in place in a float32 scratch buffer. The returned array
+    is only valid until the next call to :meth:`render`.
+    """
+
+    def __init__(self) -> None:
+        self._out: Optional[np.ndarray] = None
+        self._scratch: Optional[np.ndarray] = None
+        self._lut: Optional[np.ndarray] = None
+        self._lut_key: Optional[Tuple[np.dtype, float, float]] = None
+
+    def render(self, slice_: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+        self._out = out = _reuse(self._out, slice_.shape, np.uint8)
+        index_type = _LUT_TYPES.get(slice_.dtype)
+        if index_type is not None:
+            lut = self._table(slice_.dtype, vmin, vmax)
+            # Signed values are reinterpreted as unsigned table indices. The
+            # table covers every index, so "wrap" only skips the bounds check.
+            np.take(lut, slice_.view(index_type), out=out, mode="wrap")
+            return out
+        if vmax - vmin == 0:
+            out.fill(0)
+            return out
+        self._scratch = scratch = _reuse(self._scratch, slice_.shape, np.float32)
+        np.subtract(slice_, vmin, out=scratch, casting="unsafe")
+        np.multiply(scratch, 255.0 / (vmax - vmin), out=scratch)
+        np.clip(scratch, 0.0, 255.0, out=scratch)
+        np.copyto(out, scratch, casting="unsafe")
+        return out
+
+    def _table(self, dtype: np.dtype, vmin: float, vmax: float) -> np.ndarray:
+        key = (dtype, vmin, vmax)
+        if self._lut_key != key:
+            index_type = _LUT_TYPES[dtype]
+            values = np.arange(np.iinfo(index_type).max + 1, dtype=index_type).view(dtype)
+            self._lut = np.zeros(values.shape, dtype=np.uint8)
+            if vmax - vmin != 0:
+                scaled = (values.astype(np.float32) - vmin) * (255.0 / (vmax - vmin))
+                np.copyto(self._lut, np.clip(scaled, 0.0, 255.0), casting="unsafe")
+            self._lut_key = key
+        return self._lut
+
+
+def label_colors(count: int = 256) -> np.ndarray:
+    """Return a ``(count, 3)`` uint8 colour table; label 0 is background."""
+    palette = np.array(
+        [
+            [230, 25, 75], [60, 180, 75], [255, 225, 25], [0, 130, 200],
+            [245, 130, 48], [145, 30, 180], [70, 240, 240], [240, 50, 230],
+            [210, 245, 60], [250, 190, 212], [0, 128, 128], [170, 110, 40],
+        ],
+        dtype=np.uint8,
+    )
+    colors = np.zeros((count, 3), dtype=np.uint8)
+    colors[1:] = palette[np.arange(count - 1) % len(palette)]
+    return colors
+
+
+class OverlayRenderer:
+    """Blend colour-mapped labels onto a gray slice in a reused RGBA buffer.
+
+    A table holding the blended RGBA value of every ``(label, gray)`` pair is
+    built once per alpha, so compositing a frame is a single gather indexed by
+    ``label << 8 | gray``. Labels are clipped to the 0-255 range of the colour
+    table and label 0 leaves the gray value untouched.
+    """
+
+    def __init__(self, colors: Optional[np.ndarray] = None) -> None:
+        self.colors = label_colors() if colors is None else colors
+        self._out: Optional[np.ndarray] = None
+        self._index: Optional[np.ndarray] = None
+        self._table: Optional[np.ndarray] = None
+        self._alpha: Optional[float] = None
+
+    def render(self, gray: np.ndarray, labels: np.ndarray, alpha: float) -> np.ndarray:
+        """Return an ``(h, w, 4)`` RGBA image valid until the next call."""
+        shape = gray.shape
+        self._out = out = _reuse(self._out, shape + (4,), np.uint8)
+        self._index = index = _reuse(self._index, shape, np.uint16)
+        np.clip(labels, 0, 255, out=index, casting="unsafe")
+        np.left_shift(index, 8, out=index)
+        np.bitwise_or(index, gray, out=index)
+        table = self._blend_table(alpha)
+        np.take(table, index, out=out.view(np.uint32).reshape(shape), mode="wrap")
+        return out
+
+    def _blend_table(self, alpha: float) -> np.ndarray:
+        if self._alpha != alpha:
+            gray = np.arange(256, dtype=np.float32)[None, :, None]
+            colors = self.colors[:256, None, :].astype(np.float32)
+            rgba = np.full((256, 256, 4), 255, dtype=np.uint8)
+            blended = gray * (1.0 - alpha) + colors * alpha
+            np.copyto(rgba[..., :3], np.rint(blended), casting="unsafe")
+            rgba[0, :, :3] = np.arange(256, dtype=np.uint8)[:, None]
+            self._table = rgba.reshape(-1).view(np.uint32)
+            self._alpha = alpha
+        return self._table
@@ -0,0 +1,118 @@
+"""Per-slice statistics of segmentation volumes."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .cache import disk_cache, volume_cache
+from .io_utils import load_volume
+from .volume import LazyVolume
+
+
+@dataclass
+class SliceStats:
+    """Label voxel counts of a segmentation summed per slice along each axis.
+
+    ``counts[axis][i]`` is the number of labelled voxels in slice ``i`` taken
+    along ``axis``. The bounding box and the first and last labelled slices
+    follow from the non-zero entries. ``value_range`` is the exact
+    ``(min, max)`` of the segmentation, found in the same pass.
+    """
+    counts: Tuple[np.ndarray, ...]
+    value_range: Tuple[float, float] = (0.0, 0.0)
+    _labelled: List[np.ndarray] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._labelled = [np.flatnonzero(c) for c in self.counts]
+
+    @property
+    def empty(self) -> bool:
+        return self._labelled[0].size == 0
+
+    @property
+    def bbox(self) -> Optional[Tuple[Tuple[int, int], ...]]:
+        """Inclusive ``(first, last)`` labelled index per axis, or ``None``."""
+        if self.empty:
+            return None
+        return tuple((int(nz[0]), int(nz[-1])) for nz in self._labelled)
+
+    def first(self, axis: int = 0) -> Optional[int]:
+        nz = self._labelled[axis]
+        return int(nz[0]) if nz.size else None
+
+    def last(self, axis: int = 0) -> Optional[int]:
+        nz = self._labelled[axis]
+        return int(nz[-1]) if nz.size else None
+
+    def best_slice(self, axis: int = 0) -> int:
+        """Return the slice with the most labelled voxels, or the middle one."""
+        if self.empty:
+            return len(self.counts[axis]) // 2
+        return int(np.argmax(self.counts[axis]))
+
+    def next_labelled(self, index: int, axis: int = 0) -> Optional[int]:
+        """Return the first labelled slice after ``index``."""
+        nz = self._labelled[axis]
+        pos = int(np.searchsorted(nz, index, side="right"))
+        return int(nz[pos]) if pos < nz.size else None
+
+    def prev_labelled(self, index: int, axis: int = 0) -> Optional[int]:
+        """Return the last labelled slice before ``index``."""
+        nz = self._labelled[axis]
+        pos = int(np.searchsorted(nz, index, side="left")) - 1
+        return int(nz[pos]) if pos >= 0 else None
+
+
+def compute_slice_stats(seg) -> SliceStats:
+    """Count labelled voxels per slice along every axis of ``seg``.
+
+    In-memory arrays are reduced with vectorized sums over one boolean mask.
+    Lazily read volumes are processed slice by slice so that only one slice is
+    resident at a time. 2D segmentations are treated as a single slice.
+    """
+    if seg.ndim == 2:
+        seg = np.asarray(seg)[None]
+    if 0 in seg.shape:
+        return SliceStats(tuple(np.zeros(n, dtype=np.int64) for n in seg.shape))
+    if isinstance(seg, LazyVolume):
+        counts = [np.zeros(n, dtype=np.int64) for n in seg.shape]
+        lo, hi = np.inf, -np.inf
+        for k in range(seg.shape[0]):
+            slice_ = seg[k]
+            lo, hi = min(lo, float(slice_.min())), max(hi, float(slice_.max()))
+            mask = slice_ != 0
+            counts[0][k] = np.count_nonzero(mask)
+            counts[1] += mask.sum(axis=1)
+            counts[2] += mask.sum(axis=0)
+        return SliceStats(tuple(counts), (lo, hi))
+    mask = seg != 0
+    return SliceStats(
+        (mask.sum(axis=(1, 2)), mask.sum(axis=(0, 2)), mask.sum(axis=(0, 1))),
+        (float(seg.min()), float(seg.max())),
+    )
+
+
+def cached_slice_stats(path: Path) -> Optional[SliceStats]:
+    """Return the slice statistics of ``path`` if they are cached, without reading it."""
+    return volume_cache.meta(path).get("slice_stats")
+
+
+def slice_stats(path: Path) -> SliceStats:  # pragma: no cover - heavy I/O
+    """Return the slice statistics of the segmentation at ``path``.
+
+    They are computed once and cached with the volume, and their exact value
+    range is kept as the volume's intensity range for
+    :func:`~seg_qc_tool.io_utils.volume_range`.
+    """
+    seg = load_volume(path)
+    meta = volume_cache.meta(path)
+    if "slice_stats" not in meta:
+        stats = meta["slice_stats"] = compute_slice_stats(seg)
+        if "range" not in meta:
+            meta["range"] = stats.value_range
+            disk_cache.write_meta(path, range=stats.value_range)
+    return meta["slice_stats"]
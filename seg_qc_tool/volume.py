@@ -0,0 +1,76 @@
+"""Lazily read volumes that serve slices on demand."""
+
+from __future__ import annotations
+
+from typing import Any, Sequence, Tuple
+
+import numpy as np
+
+
+class LazyVolume:
+    """Read-only 3D volume backed by a memory map or a nibabel array proxy.
+
+    ``source`` is any object supporting NumPy basic indexing whose axes,
+    reordered by ``axes``, give the ``(z, x, y)`` layout used throughout the
+    application. Indexing the volume reads only the requested region, so
+    showing one slice does not load or convert the whole file. ``extra`` is
+    appended to every source index, e.g. ``(0,)`` to pick the first frame of a
+    4D NIfTI file. ``planar`` is false for sources such as gzip streams where
+    only axis 0 slices are cheap, since a slice across another axis touches
+    every one of them.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        shape: Tuple[int, ...],
+        dtype: np.dtype,
+        axes: Sequence[int] = (0, 1, 2),
+        extra: Tuple[Any, ...] = (),
+        planar: bool = True,
+    ) -> None:
+        self._source = source
+        self._axes = tuple(axes)
+        self._extra = extra
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.planar = planar
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def nbytes(self) -> int:
+        """Resident size; the voxel data stays on disk until it is sliced."""
+        return 0
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if any(k is Ellipsis or k is None for k in key) or len(key) > self.ndim:
+            raise IndexError("LazyVolume supports integer and slice indices only")
+        key = key + (slice(None),) * (self.ndim - len(key))
+        source_key = [slice(None)] * len(self._axes)
+        kept = []
+        for k, axis in zip(key, self._axes):
+            source_key[axis] = k
+            if not isinstance(k, (int, np.integer)):
+                kept.append(axis)
+        data = np.asarray(self._source[tuple(source_key) + self._extra])
+        # The source returns the kept axes in its own order; restore ours
+        order = sorted(kept)
+        data = data.transpose([order.index(a) for a in kept])
+        return data.astype(self.dtype, copy=False)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        data = self[:]
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    def sample(self, max_slices: int = 32) -> np.ndarray:
+        """Return up to ``max_slices`` evenly spaced slices along axis 0."""
+        step = max(1, -(-self.shape[0] // max_slices))
+        return self[::step]
@@ -0,0 +1,69 @@
+"""Display windows: intensity ranges mapped to black and white."""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+Window = Tuple[float, float]
+
+# Voxels read to estimate percentiles; enough for a stable estimate
+SAMPLE_VOXELS = 1 << 20
+DEFAULT_PERCENTILES = (0.5, 99.5)
+
+
+def sample_step(shape: Tuple[int, ...], max_voxels: int = SAMPLE_VOXELS) -> int:
+    """Return the stride along every axis used by :func:`subsample` for ``shape``."""
+    size = int(np.prod(shape))
+    step = 1
+    while -(-size // step**len(shape)) > max_voxels:
+        step += 1
+    return step
+
+
+def subsample(volume, max_voxels: int = SAMPLE_VOXELS) -> np.ndarray:
+    """Return a strided subsample of ``volume`` with at most ``max_voxels`` voxels.
+
+    The same step is taken along every axis, so in-memory arrays yield a view
+    and lazily read volumes only read the sampled rows of every sampled slice.
+    """
+    step = sample_step(volume.shape, max_voxels)
+    return np.asarray(volume[(slice(None, None, step),) * volume.ndim])
+
+
+def percentile_window(
+    sample: np.ndarray, low: float = DEFAULT_PERCENTILES[0], high: float = DEFAULT_PERCENTILES[1]
+) -> Window:
+    """Return the ``low`` and ``high`` percentiles of the finite values in ``sample``.
+
+    Outliers such as padding values outside the scanned field of view do not
+    stretch the window. If the percentiles coincide the full range is used.
+    """
+    values = sample.ravel()
+    if values.dtype.kind == "f":
+        values = values[np.isfinite(values)]
+    if values.size == 0:
+        return (0.0, 0.0)
+    vmin, vmax = np.percentile(values, (low, high))
+    if vmin == vmax:
+        vmin, vmax = values.min(), values.max()
+    return (float(vmin), float(vmax))
+
+
+def preset_window(center: float, width: float) -> Window:
+    """Convert a DICOM ``WindowCenter``/``WindowWidth`` pair to a window."""
+    return (center - width / 2.0, center + width / 2.0)
+
+
+def adjust_window(window: Window, brightness: float = 0.5, contrast: float = 0.5) -> Window:
+    """Apply brightness and contrast settings in ``[0, 1]`` to ``window``.
+
+    0.5 leaves the window unchanged. Raising the contrast narrows the window
+    (by up to 4x at 1.0, widening by up to 4x at 0.0) and raising the
+    brightness moves it towards lower intensities, by up to half its width.
+    """
+    vmin, vmax = window
+    width = (vmax - vmin) * 4.0 ** (1.0 - 2.0 * contrast)
+    center = (vmin + vmax) / 2.0 - (brightness - 0.5) * width
+    return (center - width / 2.0, center + width / 2.0)
@@ -0,0 +1,18 @@
+import pytest
+
+from seg_qc_tool import core, manifest
+from seg_qc_tool.cache import disk_cache
+from seg_qc_tool.io_utils import gzip_index_cache
+from seg_qc_tool.mosaic import mosaic_cache
+
+
+@pytest.fixture(autouse=True)
+def _isolated_home_files(tmp_path_factory, monkeypatch):
+    """Keep files written by review sessions out of the home directory."""
+    root = tmp_path_factory.mktemp("cache")
+    monkeypatch.setattr(manifest, "MANIFEST_PATH", root / "manifest.json")
+    monkeypatch.setattr(core, "CONFIG_PATH", root / "config.json")
+    for cache, name in ((disk_cache, "volumes"), (gzip_index_cache, "gzindex"), (mosaic_cache, "mosaics")):
+        monkeypatch.setattr(cache, "root", root / name)
+        # Restored after the test even when a session switched it on
+        monkeypatch.setattr(cache, "enabled", cache.enabled)
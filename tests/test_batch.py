@@ -0,0 +1,51 @@
+import json
+import numpy as np
+from pathlib import Path
+from seg_qc_tool.batch import main, read_report, run_checks
+from seg_qc_tool.models import Pair
+
+
+def _dataset(tmp_path: Path):
+    orig = tmp_path / "orig"
+    seg = tmp_path / "seg"
+    orig.mkdir()
+    seg.mkdir()
+    vol = np.random.rand(4, 8, 8).astype(np.float32)
+    good = np.zeros((4, 8, 8), dtype=np.uint8)
+    good[1:3, 2:6, 2:6] = 1
+    multi = good * 3
+    for name, mask in {"good": good, "empty": np.zeros_like(good), "multi": multi,
+                       "shape": good[:2]}.items():
+        np.save(orig / f"{name}.npy", vol)
+        np.save(seg / f"{name}_seg.npy", mask)
+    return orig, seg
+
+
+def test_run_checks(tmp_path: Path) -> None:
+    orig, seg = _dataset(tmp_path)
+    pairs = [Pair(orig / f"{n}.npy", seg / f"{n}_seg.npy") for n in ("good", "empty", "multi", "shape")]
+    pairs.append(Pair(orig / "missing.npy", seg / "missing_seg.npy"))
+    records = {Path(r["original"]).stem: r for r in run_checks(pairs, workers=0)}
+    assert records["good"]["suspicion"] == 0
+    assert records["good"]["fraction"] == 32 / 256
+    assert records["good"]["labels"] == 2
+    assert records["empty"]["empty"]
+    assert records["multi"]["non_binary"] and not records["multi"]["empty"]
+    assert records["shape"]["shape_mismatch"]
+    assert records["missing"]["error"]
+    order = sorted(records, key=lambda n: -records[n]["suspicion"])
+    assert order == ["missing", "shape", "empty", "multi", "good"]
+
+
+def test_batch_cli_writes_report(tmp_path: Path) -> None:
+    orig, seg = _dataset(tmp_path)
+    out = tmp_path / "report.jsonl"
+    assert main([str(orig), str(seg), "-o", str(out), "-j", "2"]) == 0
+    lines = [json.loads(line) for line in out.read_text().splitlines()]
+    assert len(lines) == 4
+    scores = read_report(out)
+    assert scores[(str(orig / "good.npy"), str(seg / "good_seg.npy"))] == 0
+
+    csv_out = tmp_path / "report.csv"
+    assert main([str(orig), str(seg), "-o", str(csv_out), "-j", "0"]) == 0
+    assert read_report(csv_out) == scores
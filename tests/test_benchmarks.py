@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.__main__ import main
+from benchmarks.datasets import synthetic_pair, write_volume
+from seg_qc_tool import core
+from seg_qc_tool.cache import disk_cache, volume_cache
+from seg_qc_tool.io_utils import gzip_index_cache, load_dicom_series, load_nifti
+from seg_qc_tool.mosaic import mosaic_cache
+
+
+def test_synthetic_volumes_round_trip(tmp_path: Path) -> None:
+    volume, seg = synthetic_pair((4, 8, 6))
+    assert volume.dtype == np.int16 and seg.dtype == np.uint8
+    assert volume.min() == -3024 and seg.any()
+    assert np.array_equal(np.load(write_volume(tmp_path / "v", volume, "npy")), volume)
+    assert np.array_equal(load_nifti(write_volume(tmp_path / "v", volume, "nii.gz")), volume)
+    assert np.array_equal(load_dicom_series(write_volume(tmp_path / "d", volume, "dicom")), volume)
+    assert np.array_equal(load_dicom_series(write_volume(tmp_path / "mf", volume, "dicom-mf")), volume)
+
+
+def test_benchmarks_write_results(tmp_path: Path) -> None:
+    # A reviewer's config must not change what is measured
+    core.CONFIG_PATH.write_text(json.dumps({"cache_budget_mb": 1, "disk_cache": True, "gzip_index": True}))
+    budget = volume_cache.budget
+    out = tmp_path / "results.json"
+    argv = ["--pairs", "20", "--shape", "4,16,16", "--repeat", "1", "--formats", "npy,nii.gz"]
+    assert main(argv + ["-o", str(out), "--dir", str(tmp_path / "data")]) == 0
+    report = json.loads(out.read_text())
+    assert report["meta"]["params"]["shape"] == [4, 16, 16]
+    names = {(r["name"], r.get("format")) for r in report["results"] if "error" not in r}
+    for name in ("volume_items", "pair_finder", "load_volume", "pair_switch_cold", "slice_scrub_frame"):
+        assert (name, "npy") in names and (name, "nii.gz") in names
+    assert ("normalize_volume", None) in names
+    startup = {r["name"]: r for r in report["results"] if "modules" in r}
+    assert startup["import_core"]["modules"] == []
+    assert "PySide6" in startup["first_window"]["modules"]
+    assert volume_cache.budget == budget
+    for cache in (disk_cache, gzip_index_cache, mosaic_cache):
+        assert not cache.enabled and not cache.root.exists()
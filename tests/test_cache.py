@@ -0,0 +1,168 @@
+import os
+import numpy as np
+from pathlib import Path
+from seg_qc_tool.cache import DiskCache, VolumeCache
+
+
+def _loader(calls):
+    def load(path: Path) -> np.ndarray:
+        calls.append(path)
+        return np.load(str(path))
+    return load
+
+
+def _save(path: Path, nbytes: int) -> Path:
+    np.save(path, np.zeros(nbytes, dtype=np.uint8))
+    return path
+
+
+def test_cache_hit_and_reload_on_change(tmp_path: Path) -> None:
+    calls = []
+    cache = VolumeCache(budget=1000)
+    file = _save(tmp_path / "a.npy", 100)
+    cache.get_or_load(file, _loader(calls))
+    cache.get_or_load(file, _loader(calls))
+    assert len(calls) == 1
+    assert cache.hits == 1 and cache.misses == 1
+
+    _save(file, 200)
+    st = file.stat()
+    os.utime(file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    vol = cache.get_or_load(file, _loader(calls))
+    assert len(calls) == 2
+    assert vol.shape == (200,)
+    # the stale version was replaced, not kept alongside
+    assert len(cache) == 1
+    assert cache.nbytes == 200
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    calls = []
+    cache = VolumeCache(budget=250)
+    a = _save(tmp_path / "a.npy", 100)
+    b = _save(tmp_path / "b.npy", 100)
+    c = _save(tmp_path / "c.npy", 100)
+    cache.get_or_load(a, _loader(calls))
+    cache.get_or_load(b, _loader(calls))
+    cache.get_or_load(a, _loader(calls))
+    cache.get_or_load(c, _loader(calls))
+    assert a in cache
+    assert b not in cache
+    assert c in cache
+    assert cache.nbytes == 200
+
+
+def test_cache_skips_oversized_volume(tmp_path: Path) -> None:
+    cache = VolumeCache(budget=50)
+    a = _save(tmp_path / "a.npy", 100)
+    vol = cache.get_or_load(a, _loader([]))
+    assert vol.shape == (100,)
+    assert len(cache) == 0
+
+
+def test_cache_invalidate(tmp_path: Path) -> None:
+    cache = VolumeCache(budget=1000)
+    a = _save(tmp_path / "a.npy", 100)
+    b = _save(tmp_path / "b.npy", 100)
+    cache.get_or_load(a, _loader([]))
+    cache.get_or_load(b, _loader([]))
+    cache.invalidate(a)
+    assert a not in cache
+    assert b in cache
+    assert cache.nbytes == 100
+
+
+def test_cache_max_entries(tmp_path: Path) -> None:
+    cache = VolumeCache(budget=10 ** 6, max_entries=2)
+    files = [_save(tmp_path / f"{i}.npy", 10) for i in range(3)]
+    for f in files:
+        cache.get_or_load(f, _loader([]))
+    assert len(cache) == 2
+    assert files[0] not in cache
+
+
+def test_disk_cache_roundtrip(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache", max_bytes=10 ** 6)
+    src = tmp_path / "vol.nii.gz"
+    src.write_text("compressed")
+    vol = np.arange(24, dtype=np.int16).reshape(2, 3, 4)
+
+    cache.store(src, vol)
+    assert cache.lookup(src) is None  # disabled by default
+    cache.enabled = True
+    assert cache.lookup(src) is None
+    cache.store(src, vol)
+    entry = cache.lookup(src)
+    assert entry is not None
+    assert np.array_equal(np.load(entry, mmap_mode="r"), vol)
+
+    cache.write_meta(src, range=(0, 23))
+    assert cache.read_meta(src) == {"range": [0, 23]}
+
+    # a modified source misses
+    src.write_text("changed source")
+    assert cache.lookup(src) is None
+
+
+def test_disk_cache_prunes_least_recently_used(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache", max_bytes=2500)
+    cache.enabled = True
+    sources = []
+    for i in range(3):
+        src = tmp_path / f"{i}.dcm"
+        src.write_text(str(i))
+        sources.append(src)
+    cache.store(sources[0], np.zeros(1000, dtype=np.uint8))
+    cache.store(sources[1], np.zeros(1000, dtype=np.uint8))
+    entry = cache.lookup(sources[0])
+    st = entry.stat()
+    os.utime(entry, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    cache.store(sources[2], np.zeros(1000, dtype=np.uint8))
+    assert cache.lookup(sources[0]) is not None
+    assert cache.lookup(sources[1]) is None
+    assert cache.lookup(sources[2]) is not None
+
+
+def test_disk_cache_prune_skips_subdirectories(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache", max_bytes=100)
+    cache.enabled = True
+    (tmp_path / "cache" / "gzindex").mkdir(parents=True)
+    (tmp_path / "cache" / "gzindex" / "x.gzidx").write_bytes(b"i" * 10)
+    src = tmp_path / "vol.dcm"
+    src.write_text("s")
+    cache.store(src, np.zeros(1000, dtype=np.uint8))
+    # The entry is over budget and removed; the other cache is left alone
+    assert cache.lookup(src) is None
+    assert (tmp_path / "cache" / "gzindex" / "x.gzidx").exists()
+
+
+def test_disk_cache_store_file(tmp_path: Path) -> None:
+    cache = DiskCache(tmp_path / "cache", max_bytes=10 ** 6)
+    cache.enabled = True
+    src = tmp_path / "vol.nii.gz"
+    src.write_text("compressed")
+    cache.store_file(src, lambda target: target.write_bytes(b"index"), suffix=".idx")
+    entry = cache.lookup(src, suffix=".idx")
+    assert entry is not None and entry.read_bytes() == b"index"
+    assert cache.lookup(src) is None
+
+    def fail(target: Path) -> None:
+        target.write_bytes(b"partial")
+        raise RuntimeError("write failed")
+
+    cache.store_file(src, fail, variant="other", suffix=".idx")
+    assert cache.lookup(src, "other", ".idx") is None
+    assert not [p for p in (tmp_path / "cache").iterdir() if ".tmp" in p.name]
+
+
+def test_volume_cache_replace_keeps_meta(tmp_path: Path) -> None:
+    src = tmp_path / "vol.nii.gz"
+    src.write_text("compressed")
+    cache = VolumeCache(budget=1000)
+    cache.get_or_load(src, lambda p: np.zeros(10, dtype=np.uint8))
+    cache.meta(src)["range"] = (0, 1)
+    decoded = np.ones(100, dtype=np.uint8)
+    cache.replace(src, decoded)
+    assert cache.nbytes == 100 and len(cache) == 1
+    assert cache.get_or_load(src, lambda p: None) is decoded
+    assert cache.meta(src) == {"range": (0, 1)}
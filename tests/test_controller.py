@@ -1,5 +1,4 @@
 from pathlib import Path
-import os
 import csv
 from seg_qc_tool.controller import Controller, CONFIG_PATH
 
@@ -23,19 +22,15 @@ def test_discard_current(tmp_path: Path) -> None:
     c.set_discard_dir(discard)
 
     assert len(c.pairs) == 1
-    old = Path.cwd()
-    try:
-        os.chdir(tmp_path)
-        c.discard_current("bad")
-    finally:
-        os.chdir(old)
+    c.discard_current("bad")
+    c.discards.flush()
     # segmentation copied
     assert (seg / "v_seg.npy").exists()
     assert (discard / "v_seg.npy").exists()
     # pair still present
     assert c.current_index == 0
     # log contains full segmentation path
-    row = next(csv.reader((tmp_path / "discard_log.csv").read_text().splitlines()))
+    row = next(csv.reader((discard / "discard_log.csv").read_text().splitlines()))
     assert row[1].endswith("v.npy")
     assert row[2] == "v_seg.npy"
 
@@ -67,19 +62,15 @@ def test_discard_current_dicom_slice(tmp_path: Path) -> None:
     assert len(c.pairs) == 1
 
     c.set_slice_index(1)
-    old = Path.cwd()
-    try:
-        os.chdir(tmp_path)
-        c.discard_current("bad slice")
-    finally:
-        os.chdir(old)
+    c.discard_current("bad slice")
+    c.discards.flush()
 
     # both segmentation files remain
     assert (seg_series / "a.dcm").exists()
     assert (seg_series / "b.dcm").exists()
     # copied second slice
     assert (discard / "p1_seg" / "b.dcm").exists()
-    row = list(csv.reader((tmp_path / "discard_log.csv").read_text().splitlines()))[-1]
+    row = list(csv.reader((discard / "discard_log.csv").read_text().splitlines()))[-1]
     assert row[1].endswith("p1")
     assert row[2] == "b.dcm"
 
@@ -104,3 +95,77 @@ def test_navigation(tmp_path: Path) -> None:
     assert c.current_index == 1
     c.prev_pair()
     assert c.current_index == 0
+
+
+def test_neighbours(tmp_path: Path) -> None:
+    orig = tmp_path / "orig"
+    seg = tmp_path / "seg"
+    orig.mkdir()
+    seg.mkdir()
+    for name in "abcd":
+        (orig / f"{name}.npy").write_text("o")
+        (seg / f"{name}_seg.npy").write_text("s")
+
+    c = Controller()
+    c.set_segmentations_dir(seg)
+    c.set_originals_dir(orig)
+    assert len(c.pairs) == 4
+    c.next_pair()
+    near = c.neighbours(2)
+    # following pair first, then previous, then further out
+    assert near == [c.pairs[2], c.pairs[0], c.pairs[3]]
+    assert c.neighbours(0) == []
+    assert c.upcoming(1) == c.pairs[1:3]
+    assert c.upcoming(5) == c.pairs[1:]
+
+
+def test_load_pairs_keeps_current_pair(tmp_path: Path) -> None:
+    orig = tmp_path / "orig"
+    seg = tmp_path / "seg"
+    orig.mkdir()
+    seg.mkdir()
+    for name in "bd":
+        (orig / f"{name}.npy").write_text("o")
+        (seg / f"{name}_seg.npy").write_text("s")
+
+    c = Controller()
+    c.set_segmentations_dir(seg)
+    c.set_originals_dir(orig)
+    c.next_pair()
+    current = c.pairs[c.current_index]
+    emitted = []
+    c.pair_changed.connect(emitted.append)
+
+    for name in "ac":
+        (orig / f"{name}.npy").write_text("o")
+        (seg / f"{name}_seg.npy").write_text("s")
+    c.load_pairs()
+    assert len(c.pairs) == 4
+    assert c.pairs[c.current_index] == current
+    assert emitted == []
+
+
+def test_load_report_orders_by_suspicion(tmp_path: Path) -> None:
+    import json
+
+    orig = tmp_path / "orig"
+    seg = tmp_path / "seg"
+    orig.mkdir()
+    seg.mkdir()
+    for name in "abc":
+        (orig / f"{name}.npy").write_text("o")
+        (seg / f"{name}_seg.npy").write_text("s")
+
+    c = Controller()
+    c.set_segmentations_dir(seg)
+    c.set_originals_dir(orig)
+    report = tmp_path / "report.jsonl"
+    report.write_text("\n".join(
+        json.dumps({"original": str(orig / f"{n}.npy"), "segmentation": str(seg / f"{n}_seg.npy"), "suspicion": s})
+        for n, s in (("a", 0.0), ("b", 4.0))
+    ))
+    c.load_report(report)
+    assert [p.original.name for p in c.pairs][:2] == ["b.npy", "a.npy"]
+    assert c.current_index == 0
+    c.load_pairs()
+    assert [p.original.name for p in c.pairs][:2] == ["b.npy", "a.npy"]
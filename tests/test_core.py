@@ -0,0 +1,78 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from seg_qc_tool.core import ReviewSession
+
+
+def test_core_imports_without_qt_or_format_backends() -> None:
+    code = (
+        "import json, sys\n"
+        "from seg_qc_tool import core, io_utils, mosaic\n"
+        "heavy = ('PySide6', 'nibabel', 'pydicom', 'SimpleITK', 'indexed_gzip')\n"
+        "enabled = [c.enabled for c in (core.disk_cache, io_utils.gzip_index_cache, mosaic.mosaic_cache)]\n"
+        "print(json.dumps([[m for m in heavy if m in sys.modules], enabled]))\n"
+    )
+    root = Path(__file__).resolve().parent.parent
+    out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    loaded, enabled = json.loads(out.stdout)
+    assert loaded == []
+    # Only a review session writes to the on-disk caches
+    assert enabled == [False, False, False]
+
+
+def test_review_session_hooks(tmp_path: Path) -> None:
+    orig = tmp_path / "orig"
+    seg = tmp_path / "seg"
+    discard = tmp_path / "discard"
+    orig.mkdir()
+    seg.mkdir()
+    for name in "ab":
+        (orig / f"{name}.npy").write_text("o")
+        (seg / f"{name}_seg.npy").write_text("s")
+    events = []
+
+    class Session(ReviewSession):
+        def on_pair_changed(self, pair):
+            events.append(("pair", pair.original.name))
+
+        def on_overlay_toggled(self, enabled):
+            events.append(("overlay", enabled))
+
+        def on_discarded(self, job):
+            events.append(("discarded", job.src.name))
+
+    s = Session()
+    s.settings.originals_dir = orig
+    s.settings.segmentations_dir = seg
+    s.settings.discard_dir = discard
+    s.load_pairs()
+    s.next_pair()
+    s.set_overlay(True)
+    s.set_overlay(True)
+    s.discard_current("bad")
+    s.discards.close()
+    assert events == [
+        ("pair", "a.npy"),
+        ("pair", "b.npy"),
+        ("overlay", True),
+        ("discarded", "b_seg.npy"),
+    ]
+    assert (discard / "b_seg.npy").exists()
+
+
+def test_close_saves_slider_settings(tmp_path: Path, monkeypatch) -> None:
+    from seg_qc_tool import core
+
+    config = tmp_path / "config.json"
+    monkeypatch.setattr(core, "CONFIG_PATH", config)
+    s = ReviewSession()
+    s.set_overlay_alpha(0.7)
+    s.set_brightness(0.2)
+    s.set_contrast(0.9)
+    assert not config.exists()
+    s.close()
+    saved = json.loads(config.read_text())
+    assert (saved["overlay_alpha"], saved["brightness"], saved["contrast"]) == (0.7, 0.2, 0.9)
+    assert ReviewSession().settings.brightness == 0.2
@@ -0,0 +1,72 @@
+import csv
+from pathlib import Path
+
+from seg_qc_tool.discard import DiscardJob, DiscardWorker
+
+
+def _job(tmp_path: Path, name: str, comment: str = "") -> DiscardJob:
+    return DiscardJob(
+        src=tmp_path / "seg" / name,
+        dest=tmp_path / "discard" / "nested" / name,
+        original=tmp_path / "orig" / name,
+        segmentation=tmp_path / "seg" / name,
+        comment=comment,
+        log_path=tmp_path / "discard" / "discard_log.csv",
+    )
+
+
+def test_discard_worker_copies_and_logs(tmp_path: Path) -> None:
+    (tmp_path / "seg").mkdir()
+    (tmp_path / "seg" / "a.npy").write_text("a")
+    (tmp_path / "seg" / "b.npy").write_text("b")
+    finished, failed = [], []
+    worker = DiscardWorker(finished.append, lambda job, message: failed.append((job, message)))
+
+    jobs = [_job(tmp_path, "a.npy", "one"), _job(tmp_path, "a.npy", "two"),
+            _job(tmp_path, "b.npy"), _job(tmp_path, "missing.npy")]
+    for job in jobs:
+        worker.submit(job)
+    worker.flush()
+
+    assert (tmp_path / "discard" / "nested" / "a.npy").read_text() == "a"
+    assert (tmp_path / "discard" / "nested" / "b.npy").read_text() == "b"
+    rows = list(csv.reader((tmp_path / "discard" / "discard_log.csv").read_text().splitlines()))
+    assert [(r[2], r[3]) for r in rows] == [("a.npy", "one"), ("a.npy", "two"), ("b.npy", "")]
+    assert finished == jobs[:3]
+    assert [job for job, _ in failed] == [jobs[3]]
+
+    # The log is appended to across batches and after reopening
+    worker.submit(_job(tmp_path, "b.npy", "again"))
+    worker.close()
+    worker = DiscardWorker()
+    worker.submit(_job(tmp_path, "a.npy", "later"))
+    worker.close()
+    rows = list(csv.reader((tmp_path / "discard" / "discard_log.csv").read_text().splitlines()))
+    assert [r[3] for r in rows[3:]] == ["again", "later"]
+
+
+def test_discard_worker_resolves_dicom_slices(tmp_path: Path) -> None:
+    from tests.test_io_utils import _write_dcm
+
+    series = tmp_path / "seg" / "series"
+    series.mkdir(parents=True)
+    _write_dcm(series / "a.dcm", 1, instance=1)
+    _write_dcm(series / "b.dcm", 2, instance=2)
+    finished = []
+    worker = DiscardWorker(finished.append)
+    job = DiscardJob(
+        src=series,
+        dest=tmp_path / "discard" / "series",
+        original=tmp_path / "orig",
+        segmentation=series,
+        comment="",
+        log_path=tmp_path / "discard" / "discard_log.csv",
+        slice_index=5,
+    )
+    worker.submit(job)
+    worker.close()
+
+    # Out of range indices pick the last slice
+    assert (tmp_path / "discard" / "series" / "b.dcm").exists()
+    assert not (tmp_path / "discard" / "series" / "a.dcm").exists()
+    assert [job.src.name for job in finished] == ["b.dcm"]
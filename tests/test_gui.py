@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import QtCore, QtTest, QtWidgets  # noqa: E402
+
+from seg_qc_tool.gui import ImageView  # noqa: E402
+
+
+def test_image_view_scales_fast_during_bursts_then_smooth_once() -> None:
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    view = ImageView()
+    view.resize(120, 90)
+    modes = []
+    scale = view._scale
+
+    def record(mode):
+        modes.append(mode)
+        return scale(mode)
+
+    view._scale = record
+    image = np.zeros((32, 32), dtype=np.uint8)
+    for k in range(10):
+        image[:] = k
+        view.set_image(image)
+        app.processEvents()
+    fast = QtCore.Qt.TransformationMode.FastTransformation
+    smooth = QtCore.Qt.TransformationMode.SmoothTransformation
+    assert modes == [fast] * 10
+    assert view._settle.isActive()
+
+    QtTest.QTest.qWait(ImageView.SETTLE_MS * 3)
+    assert modes == [fast] * 10 + [smooth]
+    assert not view._settle.isActive()
+    # The smooth pixmap is reused for further updates at the same size
+    view._update_pixmap()
+    assert len(modes) == 11
+
+
+def test_unchecking_show_timings_stops_recording() -> None:
+    from seg_qc_tool import profiling
+    from seg_qc_tool.controller import Controller
+    from seg_qc_tool.gui import MainWindow
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    was_enabled = profiling.enabled()
+    controller = Controller()
+    window = MainWindow(controller)
+    try:
+        window.show_timings(True)
+        assert profiling.enabled() and window._timings_timer.isActive()
+        window.show_timings(False)
+        app.processEvents()
+        assert not profiling.enabled() and not window._timings_timer.isActive()
+    finally:
+        profiling.enable(was_enabled)
+        controller.discards.close()
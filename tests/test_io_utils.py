@@ -1,6 +1,11 @@
+import os
 import numpy as np
 from pathlib import Path
-from seg_qc_tool.io_utils import normalize_volume, load_npy, load_dicom_series, load_nifti
+from seg_qc_tool.io_utils import normalize_volume, normalize_slice, volume_range, load_npy, load_dicom_series, load_nifti, index_dicom_series, compact, compact_dtype, has_module, volume_spacing
+from seg_qc_tool import io_utils
+from seg_qc_tool.volume import LazyVolume
+import pytest
+from pydicom.sequence import Sequence
 import nibabel as nib
 import pydicom
 from pydicom.dataset import Dataset, FileMetaDataset, FileDataset
@@ -13,6 +18,16 @@ def test_normalize_volume(tmp_path: Path) -> None:
     assert vmax == 2
     assert np.allclose(norm, vol / 2)
 
+def test_normalize_slice_matches_volume(tmp_path: Path) -> None:
+    vol = np.arange(24, dtype=np.int16).reshape(2, 3, 4) - 5
+    file = tmp_path / "vol.npy"
+    np.save(file, vol)
+    vmin, vmax = volume_range(file)
+    assert (vmin, vmax) == (-5, 18)
+    norm, _, _ = normalize_volume(vol)
+    assert np.allclose(normalize_slice(vol[1], vmin, vmax), norm[1])
+    assert not normalize_slice(vol[0], 3, 3).any()
+
 def test_load_npy(tmp_path: Path) -> None:
     arr = np.arange(6, dtype=np.float32).reshape(2, 3)
     file = tmp_path / "arr.npy"
@@ -21,7 +36,7 @@ def test_load_npy(tmp_path: Path) -> None:
     assert np.array_equal(loaded, arr)
 
 
-def _write_dcm(path: Path, value: int, photometric: str = "MONOCHROME2", instance: int = 0) -> None:
+def _write_dcm(path: Path, value: int, photometric: str = "MONOCHROME2", instance: int = 0, **attrs) -> None:
     meta = FileMetaDataset()
     meta.TransferSyntaxUID = pydicom.uid.ExplicitVRLittleEndian
     ds = FileDataset(str(path), {}, file_meta=meta, preamble=b"\0" * 128)
@@ -37,6 +52,8 @@ def _write_dcm(path: Path, value: int, photometric: str = "MONOCHROME2", instanc
     ds.HighBit = 7
     ds.PixelRepresentation = 0
     ds.PixelData = (np.full((2, 2), value, dtype=np.uint8)).tobytes()
+    for name, attr in attrs.items():
+        setattr(ds, name, attr)
     ds.save_as(str(path))
 
 
@@ -52,6 +69,72 @@ def test_load_dicom_series_from_file(tmp_path: Path) -> None:
     assert volume2.shape == volume.shape
 
 
+def test_load_dicom_series_parallel_matches_serial(tmp_path: Path) -> None:
+    series = tmp_path / "series"
+    series.mkdir()
+    for i in range(6):
+        _write_dcm(series / f"{i}.dcm", 10 * i, instance=6 - i)
+    serial, files = load_dicom_series(series, return_files=True, workers=1)
+    parallel = load_dicom_series(series, workers=4)
+    assert np.array_equal(serial, parallel)
+    # slices are ordered by InstanceNumber, not file name
+    assert [f.name for f in files] == [f"{i}.dcm" for i in reversed(range(6))]
+    assert serial[:, 0, 0].tolist() == [50, 40, 30, 20, 10, 0]
+
+
+def test_index_dicom_series(tmp_path: Path) -> None:
+    series = tmp_path / "series"
+    series.mkdir()
+    _write_dcm(series / "b.dcm", 1, instance=2)
+    _write_dcm(series / "a.dcm", 2, instance=1)
+    index = index_dicom_series(series / "b.dcm")
+    assert [f.name for f in index.files] == ["a.dcm", "b.dcm"]
+    assert index.instance_numbers == [1, 2]
+    assert (index.rows, index.columns) == (2, 2)
+    assert index.photometric == "MONOCHROME2"
+    # cached per directory until its contents change
+    assert index_dicom_series(series) is index
+    _write_dcm(series / "c.dcm", 3, instance=3)
+    assert len(index_dicom_series(series)) == 3
+    # a file rewritten in place leaves the directory's mtime unchanged
+    _write_dcm(series / "a.dcm", 2, instance=4)
+    assert index_dicom_series(series).files[-1].name == "a.dcm"
+
+
+def test_load_volume_rereads_series_rewritten_in_place(tmp_path: Path, monkeypatch) -> None:
+    from seg_qc_tool.cache import disk_cache, volume_cache
+
+    monkeypatch.setattr(disk_cache, "enabled", True)
+    series = tmp_path / "series"
+    series.mkdir()
+    for i in range(3):
+        _write_dcm(series / f"{i}.dcm", i, instance=i)
+    volume_cache.clear()
+    assert io_utils.load_volume(series)[:, 0, 0].tolist() == [0, 1, 2]
+    mtime = os.stat(series).st_mtime_ns
+    _write_dcm(series / "1.dcm", 99, instance=1)
+    os.utime(series / "1.dcm", ns=(mtime + 10**9, mtime + 10**9))
+    assert os.stat(series).st_mtime_ns == mtime
+    assert io_utils.load_volume(series)[:, 0, 0].tolist() == [0, 99, 2]
+    # nor is the stale volume served from the disk cache in a later session
+    volume_cache.clear()
+    assert io_utils.load_volume(series)[:, 0, 0].tolist() == [0, 99, 2]
+
+
+def test_series_index_cache_is_bounded(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(io_utils, "MAX_SERIES_INDEXES", 2)
+    for name in "abc":
+        (tmp_path / name).mkdir()
+        _write_dcm(tmp_path / name / "0.dcm", 0)
+    first = index_dicom_series(tmp_path / "a")
+    index_dicom_series(tmp_path / "b")
+    assert index_dicom_series(tmp_path / "a") is first
+    index_dicom_series(tmp_path / "c")
+    # "b" was used least recently
+    assert tmp_path / "b" not in io_utils._series_indexes
+    assert index_dicom_series(tmp_path / "a") is first
+
+
 def test_load_dicom_series_monochrome1(tmp_path: Path) -> None:
     series = tmp_path / "mono1"
     series.mkdir()
@@ -60,8 +143,23 @@ def test_load_dicom_series_monochrome1(tmp_path: Path) -> None:
     volume = load_dicom_series(series)
     # Files were written out of order but should be sorted by InstanceNumber
     assert volume.shape[0] == 2
-    # Intensity should be inverted
-    assert volume.max() == 10
+    # Intensity should be inverted against the largest storable value
+    assert index_dicom_series(series).max_value == 255
+    assert (volume[0] == 235).all() and (volume[1] == 245).all()
+    assert volume.dtype == np.uint8
+
+
+def test_index_dicom_series_window_preset(tmp_path: Path) -> None:
+    series = tmp_path / "windowed"
+    series.mkdir()
+    _write_dcm(series / "a.dcm", 1, WindowCenter=[40, 400], WindowWidth=[80, 1500],
+               RescaleSlope=2, RescaleIntercept=-10)
+    index = index_dicom_series(series)
+    assert index.window == (40.0, 80.0)
+    assert index.max_value == 255 * 2 - 10
+    # Stored 0..255 rescaled to -10..500 needs a signed 16 bit type
+    assert index.dtype == np.int16
+    assert load_dicom_series(series)[0, 0, 0] == 1 * 2 - 10
 
 
 def test_load_nifti_transpose(tmp_path: Path) -> None:
@@ -72,3 +170,183 @@ def test_load_nifti_transpose(tmp_path: Path) -> None:
     loaded = load_nifti(file)
     assert loaded.shape == (3, 3, 3)
     assert np.array_equal(loaded, arr.transpose(2, 0, 1))
+
+
+def test_compact_dtype() -> None:
+    assert compact_dtype(0, 255) == np.uint8
+    assert compact_dtype(-1, 100) == np.int8
+    assert compact_dtype(-1024, 3071) == np.int16
+    assert compact_dtype(0, 70000) == np.int32
+    assert compact_dtype(0, 0.5) == np.float32
+    assert compact_dtype(0, 2**40) == np.float32
+
+
+def test_compact() -> None:
+    mask = np.array([0, 1, 2], dtype=np.uint8)
+    assert compact(mask).dtype == np.uint8
+    # Masks saved as float become integer again
+    assert compact(np.array([0.0, 1.0, 3.0])).dtype == np.uint8
+    assert compact(np.array([0.0, 0.5])).dtype == np.float32
+    scaled = compact(np.array([0, 100], dtype=np.uint16), slope=1, intercept=-1024)
+    assert scaled.dtype == np.int16 and scaled.tolist() == [-1024, -924]
+    fractional = compact(np.array([0, 3], dtype=np.int16), slope=0.5)
+    assert fractional.dtype == np.float32 and fractional.tolist() == [0.0, 1.5]
+
+
+def test_load_nifti_keeps_scaled_integers(tmp_path: Path) -> None:
+    arr = np.arange(8, dtype=np.int16).reshape(2, 2, 2)
+    img = nib.Nifti1Image(arr, np.eye(4))
+    img.header.set_slope_inter(2, -1024)
+    file = tmp_path / "ct.nii"
+    nib.save(img, str(file))
+    loaded = load_nifti(file)
+    assert loaded.dtype == np.int16
+    assert np.array_equal(loaded, (arr * 2 - 1024).transpose(2, 0, 1))
+
+
+def test_index_dicom_series_groups_by_series_uid(tmp_path: Path) -> None:
+    series = tmp_path / "export"
+    series.mkdir()
+    # PACS exports often carry no suffix and mix a scout with the main series
+    for i in range(3):
+        _write_dcm(series / f"IM{i}", 10 * i, instance=i + 1, SeriesInstanceUID="1.2.3")
+    _write_dcm(series / "scout.dcm", 99, instance=1, SeriesInstanceUID="1.2.4")
+    (series / "notes.txt").write_text("not dicom")
+    (series / "README").write_text("not dicom either")
+    index = index_dicom_series(series)
+    assert index.series_uid == "1.2.3" and len(index) == 3
+    assert index_dicom_series(series / "scout.dcm").series_uid == "1.2.4"
+    assert load_dicom_series(series)[:, 0, 0].tolist() == [0, 10, 20]
+    assert load_dicom_series(series / "scout.dcm")[:, 0, 0].tolist() == [99]
+
+
+def test_index_dicom_series_sorts_by_position(tmp_path: Path) -> None:
+    series = tmp_path / "series"
+    series.mkdir()
+    for i, z in enumerate([5.0, -5.0, 0.0]):
+        _write_dcm(series / f"{i}.dcm", i, instance=i + 1,
+                   ImagePositionPatient=[0, 0, z], ImageOrientationPatient=[1, 0, 0, 0, 1, 0])
+    index = index_dicom_series(series)
+    assert [p[2] for p in index.positions] == [-5.0, 0.0, 5.0]
+    assert index.spacing == (5.0, 1.0, 1.0)
+    assert load_dicom_series(series)[:, 0, 0].tolist() == [1, 2, 0]
+
+
+def _frame_group(**items) -> Dataset:
+    group = Dataset()
+    for name, (sequence, attrs) in items.items():
+        item = Dataset()
+        for attr, value in attrs.items():
+            setattr(item, attr, value)
+        setattr(group, sequence, Sequence([item]))
+    return group
+
+
+def test_load_enhanced_multiframe(tmp_path: Path) -> None:
+    series = tmp_path / "enhanced"
+    series.mkdir()
+    frames = np.arange(3 * 4, dtype=np.uint8).reshape(3, 2, 2)
+    _write_dcm(
+        series / "volume.dcm", 0, NumberOfFrames=3, PixelData=frames.tobytes(),
+        SharedFunctionalGroupsSequence=Sequence([_frame_group(
+            orientation=("PlaneOrientationSequence", {"ImageOrientationPatient": [1, 0, 0, 0, 1, 0]}),
+        )]),
+        PerFrameFunctionalGroupsSequence=Sequence([
+            _frame_group(
+                position=("PlanePositionSequence", {"ImagePositionPatient": [0, 0, z]}),
+                scale=("PixelValueTransformationSequence", {"RescaleSlope": 1, "RescaleIntercept": -k}),
+            )
+            for k, z in enumerate([2.0, 0.0, 1.0])
+        ]),
+    )
+    index = index_dicom_series(series)
+    assert index.frames == [1, 2, 0] and index.multiframe
+    volume = load_dicom_series(series)
+    expected = np.stack([frames[1] - 1, frames[2].astype(np.int16) - 2, frames[0]])
+    assert np.array_equal(volume, expected)
+
+
+@pytest.mark.skipif(not has_module("SimpleITK"), reason="SimpleITK not installed")
+def test_load_dicom_series_sitk_matches_pydicom(tmp_path: Path) -> None:
+    series = tmp_path / "series"
+    series.mkdir()
+    for i in range(4):
+        _write_dcm(series / f"{i}.dcm", 20 * i, instance=4 - i, Modality="CT",
+                   RescaleSlope=1, RescaleIntercept=-100)
+    pydicom_volume = load_dicom_series(series, backend="pydicom")
+    sitk_volume = load_dicom_series(series, backend="sitk")
+    assert sitk_volume.dtype == pydicom_volume.dtype
+    assert np.array_equal(sitk_volume, pydicom_volume)
+    assert pydicom_volume[:, 0, 0].tolist() == [-40, -60, -80, -100]
+
+
+@pytest.mark.skipif(not has_module("indexed_gzip"), reason="indexed_gzip not installed")
+def test_gzip_index_reads_slices_lazily(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(io_utils.gzip_index_cache, "root", tmp_path / "gzindex")
+    monkeypatch.setattr(io_utils.gzip_index_cache, "enabled", True)
+    # Small spacing so the volume spans many seek points
+    monkeypatch.setattr(io_utils, "GZIP_INDEX_SPACING", 64 * 1024)
+    arr = np.random.default_rng(0).integers(-1000, 1000, (64, 64, 40)).astype(np.int16)
+    file = tmp_path / "ct.nii.gz"
+    nib.save(nib.Nifti1Image(arr, np.eye(4)), str(file))
+
+    first = io_utils._read_volume(file)
+    assert isinstance(first, np.ndarray)
+    assert io_utils.gzip_index_cache.lookup(file, suffix=io_utils.GZIP_INDEX_SUFFIX) is not None
+    lazy = io_utils._read_volume(file)
+    assert isinstance(lazy, LazyVolume) and lazy.dtype == np.int16
+    assert not lazy.planar
+    assert np.array_equal(lazy[25], arr[:, :, 25])
+    assert np.array_equal(lazy[3], arr[:, :, 3])
+    assert np.array_equal(np.asarray(lazy), first)
+
+
+@pytest.mark.skipif(not has_module("indexed_gzip"), reason="indexed_gzip not installed")
+def test_load_nifti_closes_gzip_index_on_error(tmp_path: Path, monkeypatch) -> None:
+    import indexed_gzip
+
+    opened = []
+
+    class Recording(indexed_gzip.IndexedGzipFile):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    def fail(*args):
+        raise RuntimeError("decode failed")
+
+    monkeypatch.setattr(indexed_gzip, "IndexedGzipFile", Recording)
+    monkeypatch.setattr(io_utils.gzip_index_cache, "enabled", True)
+    monkeypatch.setattr(io_utils, "compact", fail)
+    file = tmp_path / "ct.nii.gz"
+    nib.save(nib.Nifti1Image(np.zeros((4, 4, 2), dtype=np.int16), np.eye(4)), str(file))
+    with pytest.raises(RuntimeError):
+        load_nifti(file)
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_volume_spacing(tmp_path: Path) -> None:
+    img = nib.Nifti1Image(np.zeros((4, 5, 6), dtype=np.int16), np.eye(4))
+    img.header.set_zooms((0.7, 0.8, 2.5))
+    nib.save(img, str(tmp_path / "ct.nii.gz"))
+    assert volume_spacing(tmp_path / "ct.nii.gz") == pytest.approx((2.5, 0.7, 0.8))
+    np.save(tmp_path / "vol.npy", np.zeros((2, 2, 2)))
+    assert volume_spacing(tmp_path / "vol.npy") == (1.0, 1.0, 1.0)
+    series = tmp_path / "series"
+    series.mkdir()
+    for i in range(2):
+        _write_dcm(series / f"{i}.dcm", i, instance=i + 1, PixelSpacing=[0.6, 0.9], SliceThickness=3)
+    # Without positions the slice thickness is used
+    assert volume_spacing(series) == pytest.approx((3.0, 0.6, 0.9))
+
+
+def test_open_volume_decodes_dicom_slices_on_demand(tmp_path: Path) -> None:
+    series = tmp_path / "series"
+    series.mkdir()
+    for i in range(4):
+        _write_dcm(series / f"{i}.dcm", 10 * i, instance=i + 1)
+    volume = io_utils.open_volume(series)
+    assert isinstance(volume, LazyVolume) and volume.shape == (4, 2, 2)
+    assert volume[2].tolist() == [[20, 20], [20, 20]]
+    assert np.array_equal(volume[::2], load_dicom_series(series)[::2])
+    assert series not in io_utils.volume_cache
@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PySide6 import QtCore
+
+from seg_qc_tool import loader
+from seg_qc_tool.cache import volume_cache
+from seg_qc_tool.core import LoadedPair
+from seg_qc_tool.loader import PairLoader
+from seg_qc_tool.models import Pair
+from seg_qc_tool.stats import compute_slice_stats
+
+
+def test_pair_loader_emits_only_latest_request(monkeypatch) -> None:
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    started, release = threading.Event(), threading.Event()
+
+    def fake_load(pair: Pair) -> LoadedPair:
+        started.set()
+        release.wait(5)
+        empty = np.zeros((1, 1, 1))
+        return LoadedPair(pair, empty, (0, 0), empty, (0, 0), compute_slice_stats(empty))
+
+    monkeypatch.setattr(loader, "load_pair_data", fake_load)
+    pairs = [Pair(Path(f"{n}.npy"), Path(f"{n}_seg.npy")) for n in "abc"]
+    executor = ThreadPoolExecutor(max_workers=1)
+    pair_loader = PairLoader(executor)
+    loaded, failed = [], []
+    pair_loader.loaded.connect(lambda data: loaded.append(data.pair.original.name))
+    pair_loader.failed.connect(lambda pair, message: failed.append(pair))
+
+    # "a" occupies the only worker, "b" waits in the queue
+    pair_loader.request(pairs[0], [])
+    assert started.wait(5)
+    pair_loader.request(pairs[1], [])
+    queued = list(pair_loader._futures)
+    pair_loader.request(pairs[2], [])
+    assert all(f.cancelled() for f in queued)
+
+    release.set()
+    executor.shutdown(wait=True)
+    app.processEvents()
+    # The result of "a" arrives after "c" was requested and is dropped
+    assert loaded == ["c.npy"]
+    assert failed == []
+
+
+def test_pair_loader_reports_stats_after_loading(tmp_path: Path) -> None:
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    seg = np.zeros((5, 4, 4), dtype=np.uint8)
+    seg[3, 1:3, 1:3] = 1
+    np.save(tmp_path / "v.npy", seg.astype(np.int16))
+    np.save(tmp_path / "v_seg.npy", seg)
+    pair = Pair(tmp_path / "v.npy", tmp_path / "v_seg.npy")
+    volume_cache.clear()
+    executor = ThreadPoolExecutor(max_workers=2)
+    pair_loader = PairLoader(executor)
+    events = []
+    pair_loader.loaded.connect(lambda data: events.append(("loaded", data.stats)))
+    pair_loader.stats_ready.connect(lambda p, stats: events.append(("stats", stats.best_slice())))
+
+    pair_loader.request(pair, [])
+    for _ in range(100):
+        app.processEvents()
+        if len(events) == 2:
+            break
+        time.sleep(0.01)
+    # The pair is shown before its labels are counted
+    assert events == [("loaded", None), ("stats", 3)]
+
+    # Counted labels are cached with the volume and come with the next load
+    events.clear()
+    pair_loader.request(pair, [])
+    executor.shutdown(wait=True)
+    app.processEvents()
+    assert events[0][0] == "loaded" and events[0][1].best_slice() == 3
+    assert len(events) == 1
+
+
+def test_pair_loader_decodes_streamed_volumes_on_the_executor(monkeypatch) -> None:
+    from seg_qc_tool.volume import LazyVolume
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    data = np.arange(24, dtype=np.int16).reshape(2, 3, 4)
+    main = threading.current_thread()
+    decoded_on = []
+
+    def fake_full(path: Path) -> np.ndarray:
+        decoded_on.append((path.name, threading.current_thread()))
+        return data.copy()
+
+    monkeypatch.setattr(loader, "load_full_volume", fake_full)
+    pair = Pair(Path("a.nii.gz"), Path("a_seg.nii"))
+    streamed = LazyVolume(data, data.shape, data.dtype, planar=False)
+    planar = LazyVolume(data, data.shape, data.dtype)
+    executor = ThreadPoolExecutor(max_workers=1)
+    pair_loader = PairLoader(executor)
+    events = []
+    pair_loader.loading.connect(lambda p: events.append("loading"))
+    pair_loader.decoded.connect(lambda p, volume, seg: events.append((volume, seg)))
+
+    # Volumes read plane by plane need no decoding
+    assert not pair_loader.decode(pair, data, planar)
+    assert pair_loader.decode(pair, streamed, planar)
+    executor.submit(lambda: None).result()
+    app.processEvents()
+    assert events[0] == "loading"
+    volume, seg = events[1]
+    assert np.array_equal(volume, data) and seg is planar
+    assert [name for name, _ in decoded_on] == ["a.nii.gz"]
+    assert decoded_on[0][1] is not main
+
+    # A new request drops the decode in flight
+    events.clear()
+    pair_loader.decode(pair, streamed, streamed)
+    pair_loader.request(pair, [])
+    executor.shutdown(wait=True)
+    app.processEvents()
+    assert events == ["loading", "loading"]
@@ -0,0 +1,58 @@
+from pathlib import Path
+import seg_qc_tool.matcher as matcher
+from seg_qc_tool.manifest import ScanManifest
+from seg_qc_tool.matcher import pair_finder
+
+
+def _count_scans(monkeypatch):
+    scanned = []
+    original = matcher._scan_dir
+
+    def scan(directory):
+        scanned.append(directory)
+        return original(directory)
+
+    monkeypatch.setattr(matcher, "_scan_dir", scan)
+    return scanned
+
+
+def test_manifest_rescans_only_changed_dirs(tmp_path: Path, monkeypatch) -> None:
+    orig = tmp_path / "orig"
+    seg = tmp_path / "seg"
+    (orig / "a").mkdir(parents=True)
+    (orig / "b").mkdir(parents=True)
+    (seg / "a").mkdir(parents=True)
+    (seg / "b").mkdir(parents=True)
+    (orig / "a" / "p1.nii").write_text("o")
+    (orig / "b" / "p2.nii").write_text("o")
+    (seg / "a" / "p1_seg.nii").write_text("s")
+
+    manifest_path = tmp_path / "manifest.json"
+    manifest = ScanManifest.load(manifest_path)
+    assert len(pair_finder(orig, seg, manifest=manifest)) == 1
+    manifest.save()
+
+    scanned = _count_scans(monkeypatch)
+    manifest = ScanManifest.load(manifest_path)
+    assert len(pair_finder(orig, seg, manifest=manifest)) == 1
+    assert scanned == []
+
+    (seg / "b" / "p2_seg.nii").write_text("s")
+    pairs = pair_finder(orig, seg, manifest=manifest)
+    assert scanned == [seg / "b"]
+    assert {p.original.name for p in pairs} == {"p1.nii", "p2.nii"}
+
+
+def test_manifest_drops_unvisited_listings(tmp_path: Path) -> None:
+    root = tmp_path / "root"
+    (root / "old").mkdir(parents=True)
+    other = tmp_path / "other"
+    other.mkdir()
+    manifest = ScanManifest(tmp_path / "manifest.json")
+    pair_finder(root, other, manifest=manifest)
+    (root / "old").rmdir()
+    pair_finder(root, other, manifest=manifest)
+    manifest.save()
+    reloaded = ScanManifest.load(tmp_path / "manifest.json")
+    assert str(root / "old") not in reloaded._listings
+    assert str(root) in reloaded._listings
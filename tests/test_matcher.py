@@ -64,3 +64,101 @@ def test_pair_finder_single_volume(tmp_path: Path) -> None:
 
     pairs = pair_finder(orig_root, seg_root)
     assert len(pairs) == 1
+
+
+def test_pair_finder_prefers_exact_and_same_folder(tmp_path: Path) -> None:
+    orig_root = tmp_path / "orig"
+    seg_root = tmp_path / "seg"
+    for sub in ("a", "b"):
+        (orig_root / sub).mkdir(parents=True)
+        (seg_root / sub).mkdir(parents=True)
+    (orig_root / "a" / "case1.nii").write_text("o")
+    (orig_root / "b" / "case1.nii").write_text("o")
+    (orig_root / "a" / "case12.nii").write_text("o")
+    (seg_root / "b" / "case1_seg.nii").write_text("s")
+    (seg_root / "a" / "case1_seg.nii").write_text("s")
+    (seg_root / "a" / "case12_mask.nii").write_text("s")
+    pairs = pair_finder(orig_root, seg_root)
+    found = {(p.original.relative_to(orig_root), p.segmentation.relative_to(seg_root)) for p in pairs}
+    assert found == {
+        (Path("a/case1.nii"), Path("a/case1_seg.nii")),
+        (Path("b/case1.nii"), Path("b/case1_seg.nii")),
+        (Path("a/case12.nii"), Path("a/case12_mask.nii")),
+    }
+
+
+def test_match_items_fuzzy_matches_brute_force() -> None:
+    import random
+    from seg_qc_tool.matcher import distance, match_items
+
+    rng = random.Random(0)
+    alphabet = "abcdef0123"
+
+    def mutate(name: str) -> str:
+        chars = list(name)
+        for _ in range(rng.randint(1, 3)):
+            op = rng.randrange(3)
+            pos = rng.randrange(len(chars))
+            if op == 0:
+                chars[pos] = rng.choice(alphabet)
+            elif op == 1:
+                chars.insert(pos, rng.choice(alphabet))
+            elif len(chars) > 1:
+                del chars[pos]
+        return "".join(chars)
+
+    names = sorted({"".join(rng.choice(alphabet) for _ in range(rng.randint(4, 9))) for _ in range(150)})
+    segs = [mutate(n) for n in names] + [mutate(mutate(n)) for n in names[:50]]
+    rng.shuffle(segs)
+    # file names within a folder are unique
+    segs = [s for s in dict.fromkeys(segs) if s not in names]
+    originals = [Path(f"{n}.nii") for n in names]
+    seg_paths = [Path(f"{s}_seg.nii") for s in segs]
+
+    # Reference: the original all-pairs greedy matching
+    expected = []
+    used = set()
+    for orig in originals:
+        best, best_dist = None, 3
+        for seg in seg_paths:
+            if seg in used:
+                continue
+            dist = distance(orig.stem, seg.stem[:-4])
+            if dist < best_dist:
+                best, best_dist = seg, dist
+        if best is not None:
+            expected.append(Pair(orig, best))
+            used.add(best)
+
+    assert match_items(originals, seg_paths) == expected
+
+
+def test_volume_items_scan(tmp_path: Path) -> None:
+    from seg_qc_tool.matcher import _volume_items
+
+    root = tmp_path / "root"
+    series = root / "deep" / "series"
+    (series / "ignored").mkdir(parents=True)
+    _write_dcm(series / "0.dcm", 0, instance=1)
+    (series / "ignored" / "x.nii").write_text("x")
+    (root / "deep" / "a.nii.gz").write_text("a")
+    (root / "b.npy").write_text("b")
+    (root / "notes.txt").write_text("n")
+    items = _volume_items(root)
+    assert sorted(items) == sorted([series, root / "deep" / "a.nii.gz", root / "b.npy"])
+
+
+def test_volume_items_suffixless_dicom(tmp_path: Path) -> None:
+    from seg_qc_tool.matcher import _volume_items
+
+    root = tmp_path / "root"
+    series = root / "export"
+    series.mkdir(parents=True)
+    (series / "notes.txt").write_text("n")
+    for i in range(3):
+        _write_dcm(series / f"IM{i}", i, instance=i + 1)
+    other = root / "other"
+    other.mkdir()
+    (other / "README").write_text("not a slice")
+    (other / "a.nii").write_text("a")
+    assert sorted(_volume_items(root)) == sorted([series, other / "a.nii"])
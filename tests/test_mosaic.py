@@ -0,0 +1,122 @@
+import numpy as np
+from seg_qc_tool.mosaic import (
+    build_mosaic,
+    downsample,
+    downsample_mask,
+    mosaic_slices,
+    outline,
+    read_in_order,
+)
+from seg_qc_tool.volume import LazyVolume
+from seg_qc_tool.window import subsample
+
+
+def test_mosaic_slices_evenly_spaced() -> None:
+    assert mosaic_slices(80, 8) == [5, 15, 25, 35, 45, 55, 65, 75]
+    assert mosaic_slices(3, 8) == [0, 1, 2]
+    assert mosaic_slices(0, 8) == []
+
+
+def test_downsample_block_average() -> None:
+    slice_ = np.arange(36, dtype=np.int16).reshape(6, 6)
+    out = downsample(slice_, 3)
+    assert out.dtype == np.float32 and out.shape == (2, 2)
+    assert out[0, 0] == slice_[:3, :3].mean()
+    assert out[1, 1] == slice_[3:, 3:].mean()
+    # Remainder rows and columns are dropped
+    assert downsample(np.ones((7, 8)), 3).shape == (2, 2)
+
+
+def test_mask_outline() -> None:
+    mask = np.zeros((6, 6), dtype=bool)
+    mask[1:5, 1:5] = True
+    edge = outline(mask)
+    assert edge[1, 1:5].all() and edge[1:5, 1].all()
+    assert not edge[2:4, 2:4].any()
+    assert not edge[0].any()
+    # Any labelled pixel marks its block
+    small = np.zeros((4, 4), dtype=bool)
+    small[3, 0] = True
+    assert downsample_mask(small, 2).tolist() == [[False, False], [True, False]]
+
+
+def test_build_mosaic() -> None:
+    vol = np.zeros((10, 40, 20), dtype=np.float32)
+    vol[:, :20] = 100
+    seg = np.zeros(vol.shape, dtype=np.uint8)
+    seg[:5, 8:32, 4:16] = 1
+    mosaic = build_mosaic(vol, seg, (0.0, 100.0), count=4, tile=10)
+    assert mosaic.slices == [1, 3, 6, 8]
+    # 40x20 slices shrink by 4 to 10x5 tiles
+    assert mosaic.gray.shape == (10, 20) and mosaic.outline.shape == (10, 20)
+    assert mosaic.tile_width == 5
+    assert mosaic.gray[0, 0] == 255 and mosaic.gray[-1, 0] == 0
+    assert mosaic.outline[:, :10].any() and not mosaic.outline[:, 10:].any()
+    assert mosaic.slice_at(0) == 1 and mosaic.slice_at(12) == 6 and mosaic.slice_at(99) == 8
+    rgba = mosaic.rgba()
+    assert rgba.shape == (10, 20, 4)
+    assert (rgba[mosaic.outline, :3] == (255, 0, 0)).all()
+
+
+def test_build_mosaic_reads_sampled_slices_only() -> None:
+    class Source:
+        def __init__(self, data):
+            self.data = data
+            self.read = set()
+
+        def __getitem__(self, key):
+            self.read.add(key[0])
+            return self.data[key]
+
+    data = np.random.default_rng(0).random((20, 8, 8)).astype(np.float32)
+    source = Source(data)
+    vol = LazyVolume(source, data.shape, data.dtype)
+    seg = np.zeros((20, 4, 4), dtype=np.uint8)  # mismatched shape: no outline
+    mosaic = build_mosaic(vol, seg, (0.0, 1.0), count=4, tile=8)
+    assert source.read == set(mosaic.slices)
+    assert not mosaic.outline.any()
+
+
+def test_read_in_order_reads_tiles_and_sample_in_one_pass() -> None:
+    class Stream:
+        def __init__(self, data):
+            self.data = data
+            self.read = []
+
+        def __getitem__(self, key):
+            self.read.append(key[0])
+            return self.data[key]
+
+    data = np.random.default_rng(0).random((40, 200, 200)).astype(np.float32)
+    stream = Stream(data)
+    vol = LazyVolume(stream, data.shape, data.dtype, planar=False)
+    slices = mosaic_slices(40, 4)
+    read, sample = read_in_order(vol, slices, sample=True)
+    # Every slice is read once, front to back
+    assert stream.read == sorted(set(stream.read))
+    assert set(slices) <= set(stream.read)
+    assert np.array_equal(sample, subsample(data))
+    # The mosaic is built from the slices read without reading again
+    stream.read.clear()
+    mosaic = build_mosaic(read, np.zeros(data.shape), (0.0, 1.0), count=4, tile=40)
+    assert stream.read == []
+    assert np.array_equal(mosaic.gray, build_mosaic(data, np.zeros(data.shape), (0.0, 1.0), 4, 40).gray)
+    assert read_in_order(vol, slices)[1] is None
+
+
+def test_pair_mosaic_bypasses_volume_cache(tmp_path, monkeypatch) -> None:
+    from seg_qc_tool.cache import volume_cache
+    from seg_qc_tool.models import Pair
+    from seg_qc_tool.mosaic import mosaic_cache, pair_mosaic
+
+    vol = np.arange(10 * 16 * 16, dtype=np.int16).reshape(10, 16, 16)
+    seg = np.zeros(vol.shape, dtype=np.uint8)
+    seg[6, 4:12, 4:12] = 1
+    np.save(tmp_path / "v.npy", vol)
+    np.save(tmp_path / "v_seg.npy", seg)
+    volume_cache.clear()
+    monkeypatch.setattr(mosaic_cache, "enabled", False)
+    mosaic = pair_mosaic(Pair(tmp_path / "v.npy", tmp_path / "v_seg.npy"), count=4, tile=8)
+    assert mosaic.slices == [1, 3, 6, 8]
+    assert mosaic.outline[:, 16:24].any()
+    assert len(volume_cache) == 0
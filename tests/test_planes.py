@@ -0,0 +1,43 @@
+import numpy as np
+from pathlib import Path
+from seg_qc_tool.io_utils import open_npy
+from seg_qc_tool.planes import plane, plane_aspect, plane_spacing
+from seg_qc_tool.render import SliceRenderer
+
+
+def test_planes_are_views() -> None:
+    vol = np.arange(4 * 5 * 6, dtype=np.int16).reshape(4, 5, 6)
+    axial, coronal, sagittal = plane(vol, 0, 2), plane(vol, 1, 3), plane(vol, 2, 1)
+    for view in (axial, coronal, sagittal):
+        assert np.shares_memory(view, vol)
+    assert np.array_equal(axial, vol[2])
+    # Coronal and sagittal planes show the last slice at the top
+    assert np.array_equal(coronal, vol[::-1, 3, :])
+    assert np.array_equal(sagittal, vol[::-1, :, 1])
+    # Out of range indices clamp to the last slice
+    assert np.array_equal(plane(vol, 1, 99), vol[::-1, 4, :])
+    assert plane(vol[0], 1, 0) is not None and plane(vol[0], 1, 0).shape == (5, 6)
+
+
+def test_planes_of_lazy_volumes(tmp_path: Path) -> None:
+    vol = np.arange(4 * 5 * 6, dtype=np.int16).reshape(4, 5, 6)
+    np.save(tmp_path / "vol.npy", vol)
+    lazy = open_npy(tmp_path / "vol.npy")
+    for axis in range(3):
+        assert np.array_equal(plane(lazy, axis, 2), plane(vol, axis, 2))
+
+
+def test_render_strided_plane() -> None:
+    vol = np.arange(4 * 5 * 6, dtype=np.int16).reshape(4, 5, 6)
+    out = SliceRenderer().render(plane(vol, 2, 1), 0, 119)
+    assert out.shape == (4, 5) and out.flags.c_contiguous
+    assert out[0, 0] == int(vol[3, 0, 1] * 255 / 119)
+
+
+def test_plane_aspect() -> None:
+    spacing = (3.0, 0.5, 0.8)
+    assert plane_spacing(spacing, 0) == (0.5, 0.8)
+    assert plane_aspect(spacing, 0) == 0.5 / 0.8
+    assert plane_aspect(spacing, 1) == 3.0 / 0.8
+    assert plane_aspect(spacing, 2) == 3.0 / 0.5
+    assert plane_aspect((0.0, 1.0, 1.0), 1) == 1.0
@@ -0,0 +1,42 @@
+import json
+from pathlib import Path
+
+from seg_qc_tool import profiling
+
+
+def test_spans_and_counters_only_when_enabled(tmp_path: Path) -> None:
+    profiling.reset()
+    profiling.enable(False)
+    with profiling.span("off"):
+        pass
+    profiling.count("off")
+    assert profiling.summary() == {} and profiling.counters() == {}
+
+    @profiling.timed("double")
+    def double(x):
+        return 2 * x
+
+    profiling.enable()
+    try:
+        with profiling.span("block", path=Path("a.nii")):
+            assert double(2) == 4
+        assert double(3) == 6
+        profiling.count("hit")
+        profiling.count("hit", 2)
+    finally:
+        profiling.enable(False)
+    summary = profiling.summary()
+    assert summary["double"]["calls"] == 2 and summary["block"]["calls"] == 1
+    assert summary["block"]["total_ms"] >= summary["block"]["last_ms"] >= 0
+    assert profiling.counters() == {"hit": 3}
+
+    trace = tmp_path / "trace.json"
+    profiling.export_chrome_trace(trace)
+    events = json.loads(trace.read_text())["traceEvents"]
+    spans = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in spans] == ["double", "block", "double"]
+    assert spans[1]["args"] == {"path": "a.nii"}
+    assert spans[1]["ts"] <= spans[0]["ts"] and spans[1]["dur"] >= spans[0]["dur"]
+    assert [e["args"] for e in events if e["ph"] == "C"] == [{"hit": 3}]
+    profiling.reset()
+    assert profiling.summary() == {}
@@ -0,0 +1,51 @@
+import numpy as np
+from seg_qc_tool.io_utils import normalize_slice
+from seg_qc_tool.render import OverlayRenderer, SliceRenderer, label_colors
+
+
+def _expected(slice_, vmin, vmax):
+    return (normalize_slice(slice_, vmin, vmax) * 255).astype(np.uint8)
+
+
+def test_render_matches_normalized_slice() -> None:
+    rng = np.random.default_rng(0)
+    renderer = SliceRenderer()
+    cases = [
+        (rng.integers(-1024, 3000, (7, 5)).astype(np.int16), -1024, 3000),
+        (rng.integers(0, 255, (7, 5)).astype(np.uint8), 0, 255),
+        (rng.integers(0, 4095, (7, 5)).astype(np.uint16), 100, 2000),
+        (rng.random((7, 5)).astype(np.float32) * 10 - 5, -5, 5),
+    ]
+    for slice_, vmin, vmax in cases:
+        out = renderer.render(slice_, vmin, vmax)
+        assert out.dtype == np.uint8 and out.flags.c_contiguous
+        assert np.abs(out.astype(int) - _expected(slice_, vmin, vmax)).max() <= 1
+
+
+def test_render_reuses_buffer_and_handles_views() -> None:
+    renderer = SliceRenderer()
+    vol = np.arange(60, dtype=np.float32).reshape(3, 4, 5)
+    first = renderer.render(vol[:, 1, :], 0, 59)
+    second = renderer.render(vol[:, 2, :], 0, 59)
+    assert first is second
+    assert np.array_equal(second, _expected(vol[:, 2, :], 0, 59))
+    assert not renderer.render(vol[0], 3, 3).any()
+    assert not renderer.render(vol[0].astype(np.int16), 3, 3).any()
+
+
+def test_overlay_blends_labels() -> None:
+    gray = np.array([[0, 100], [200, 255]], dtype=np.uint8)
+    labels = np.array([[0, 1], [2, 300]], dtype=np.float32)
+    colors = label_colors()
+    renderer = OverlayRenderer()
+    out = renderer.render(gray, labels, 0.5)
+    assert out.shape == (2, 2, 4)
+    assert (out[..., 3] == 255).all()
+    assert out[0, 0, :3].tolist() == [0, 0, 0]
+    expected = np.rint(100 * 0.5 + colors[1].astype(float) * 0.5)
+    assert out[0, 1, :3].tolist() == expected.tolist()
+    # labels beyond the table are clipped to its last colour
+    expected = np.rint(255 * 0.5 + colors[255].astype(float) * 0.5)
+    assert out[1, 1, :3].tolist() == expected.tolist()
+    opaque = renderer.render(gray, labels, 1.0)
+    assert opaque[1, 0, :3].tolist() == colors[2].tolist()
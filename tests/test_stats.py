@@ -0,0 +1,52 @@
+import numpy as np
+from pathlib import Path
+from seg_qc_tool.io_utils import open_npy
+from seg_qc_tool.stats import compute_slice_stats
+
+
+def _mask() -> np.ndarray:
+    seg = np.zeros((10, 6, 7), dtype=np.uint8)
+    seg[2, 1:3, 1:3] = 1
+    seg[5:7, 2:5, 3:6] = 2
+    return seg
+
+
+def test_compute_slice_stats() -> None:
+    stats = compute_slice_stats(_mask())
+    assert stats.counts[0].tolist() == [0, 0, 4, 0, 0, 9, 9, 0, 0, 0]
+    assert stats.bbox == ((2, 6), (1, 4), (1, 5))
+    assert (stats.first(), stats.last()) == (2, 6)
+    assert stats.best_slice() == 5
+    assert stats.next_labelled(2) == 5
+    assert stats.next_labelled(6) is None
+    assert stats.prev_labelled(5) == 2
+    assert stats.prev_labelled(2) is None
+    assert stats.next_labelled(0, axis=2) == 1
+
+
+def test_compute_slice_stats_lazy_and_empty(tmp_path: Path) -> None:
+    file = tmp_path / "seg.npy"
+    np.save(file, _mask())
+    lazy = compute_slice_stats(open_npy(file))
+    eager = compute_slice_stats(_mask())
+    for a, b in zip(lazy.counts, eager.counts):
+        assert np.array_equal(a, b)
+
+    empty = compute_slice_stats(np.zeros((4, 3, 3)))
+    assert empty.empty and empty.bbox is None
+    assert empty.best_slice() == 2
+    assert empty.next_labelled(0) is None
+
+
+def test_value_range_covers_sparse_lazy_masks(tmp_path: Path) -> None:
+    from seg_qc_tool.cache import volume_cache
+    from seg_qc_tool.io_utils import volume_range
+
+    seg = np.zeros((600, 4, 4), dtype=np.uint8)
+    seg[310:320, 1:3, 1:3] = 3
+    file = tmp_path / "seg.npy"
+    np.save(file, seg)
+    assert compute_slice_stats(open_npy(file)).value_range == (0.0, 3.0)
+    assert compute_slice_stats(seg).value_range == (0.0, 3.0)
+    volume_cache.clear()
+    assert volume_range(file) == (0.0, 3.0)
@@ -0,0 +1,56 @@
+import numpy as np
+import nibabel as nib
+from pathlib import Path
+from seg_qc_tool.io_utils import load_nifti, open_nifti, open_npy
+from seg_qc_tool.volume import LazyVolume
+
+
+def test_open_npy_slices(tmp_path: Path) -> None:
+    arr = np.arange(60, dtype=np.int16).reshape(3, 4, 5)
+    file = tmp_path / "vol.npy"
+    np.save(file, arr)
+    vol = open_npy(file)
+    assert isinstance(vol, LazyVolume)
+    assert vol.shape == arr.shape and vol.ndim == 3
+    assert vol.nbytes == 0
+    assert np.array_equal(vol[1], arr[1])
+    assert np.array_equal(vol[:, 2], arr[:, 2])
+    assert np.array_equal(np.asarray(vol), arr)
+
+
+def test_open_npy_2d_is_eager(tmp_path: Path) -> None:
+    from seg_qc_tool.planes import plane
+    from seg_qc_tool.render import SliceRenderer
+
+    arr = np.arange(12, dtype=np.int16).reshape(3, 4)
+    file = tmp_path / "image.npy"
+    np.save(file, arr)
+    image = open_npy(file)
+    assert type(image) is np.ndarray
+    assert np.array_equal(image, arr)
+    # 2D images are rendered as they are
+    gray = SliceRenderer().render(plane(image, 0, 0), 0, 11)
+    assert gray.shape == (3, 4) and gray.dtype == np.uint8
+
+
+def test_open_nifti_matches_eager(tmp_path: Path) -> None:
+    arr = np.arange(2 * 3 * 4, dtype=np.float32).reshape(2, 3, 4)
+    file = tmp_path / "vol.nii"
+    nib.save(nib.Nifti1Image(arr, np.eye(4)), str(file))
+    eager = load_nifti(file)
+    vol = open_nifti(file)
+    assert vol.shape == eager.shape == (4, 2, 3)
+    for k in range(vol.shape[0]):
+        assert np.array_equal(vol[k], eager[k])
+    assert np.array_equal(vol[:, 1, :], eager[:, 1, :])
+    assert np.array_equal(vol[1:3, :, 2], eager[1:3, :, 2])
+    assert np.array_equal(vol.sample(2), eager[::2])
+
+
+def test_open_nifti_4d_uses_first_frame(tmp_path: Path) -> None:
+    arr = np.random.rand(2, 3, 4, 2).astype(np.float32)
+    file = tmp_path / "vol4d.nii"
+    nib.save(nib.Nifti1Image(arr, np.eye(4)), str(file))
+    vol = open_nifti(file)
+    assert vol.shape == (4, 2, 3)
+    assert np.array_equal(vol[3], arr[:, :, 3, 0])
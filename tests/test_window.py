@@ -0,0 +1,35 @@
+import numpy as np
+from seg_qc_tool.volume import LazyVolume
+from seg_qc_tool.window import adjust_window, percentile_window, preset_window, subsample
+
+
+def test_subsample_strides_every_axis() -> None:
+    vol = np.arange(64 * 64 * 64, dtype=np.int16).reshape(64, 64, 64)
+    sample = subsample(vol, max_voxels=40_000)
+    assert sample.size <= 40_000
+    assert np.shares_memory(sample, vol)
+    assert np.array_equal(sample, vol[::2, ::2, ::2])
+    assert subsample(vol[0], max_voxels=10_000).size <= 10_000
+    lazy = LazyVolume(vol, vol.shape, vol.dtype)
+    assert np.array_equal(subsample(lazy, max_voxels=40_000), sample)
+
+
+def test_percentile_window_ignores_outliers() -> None:
+    values = np.linspace(-100, 100, 10_000, dtype=np.float32)
+    values[:10] = -3024
+    values[-1] = np.nan
+    vmin, vmax = percentile_window(values, 1, 99)
+    assert -100 <= vmin < -90 and 90 < vmax <= 100
+    # A constant sample falls back to its full range
+    assert percentile_window(np.array([0] + [5] * 1000)) == (0.0, 5.0)
+    assert percentile_window(np.array([np.nan])) == (0.0, 0.0)
+
+
+def test_preset_and_adjusted_windows() -> None:
+    assert preset_window(40, 400) == (-160, 240)
+    assert adjust_window((0, 100)) == (0, 100)
+    assert adjust_window((0, 100), contrast=1.0) == (37.5, 62.5)
+    assert adjust_window((0, 100), contrast=0.0) == (-150, 250)
+    vmin, vmax = adjust_window((0, 100), brightness=1.0)
+    # Brighter images map lower intensities to white
+    assert (vmin, vmax) == (-50, 50)